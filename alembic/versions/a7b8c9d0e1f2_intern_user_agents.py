@@ -0,0 +1,176 @@
+"""intern_user_agents
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, Sequence[str], None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# auth_sessions rows per backfill batch (one id range, committed on its own)
+BATCH_SIZE = 10_000
+
+user_agents = sa.table(
+    'user_agents',
+    sa.column('id', sa.Integer),
+    sa.column('ua_hash', sa.LargeBinary),
+    sa.column('user_agent', sa.Text),
+    sa.column('browser', sa.String),
+    sa.column('os', sa.String),
+    sa.column('device', sa.String),
+)
+
+# The User-Agent parser and key as of this revision. They are copied rather
+# than imported from app.services.user_agent so that later changes to the
+# app cannot change what this migration writes.
+_WORDS = re.compile(r"[a-z]+")
+_BROWSERS = {
+    "edg": (0, "Edge"),
+    "edge": (0, "Edge"),
+    "edga": (0, "Edge"),
+    "edgios": (0, "Edge"),
+    "opr": (1, "Opera"),
+    "opera": (1, "Opera"),
+    "yabrowser": (1, "Yandex"),
+    "firefox": (2, "Firefox"),
+    "fxios": (2, "Firefox"),
+    "crios": (3, "Chrome"),
+    "chromium": (3, "Chrome"),
+    "chrome": (3, "Chrome"),
+    "safari": (4, "Safari"),
+}
+_SYSTEMS = {
+    "windows": (0, "Windows"),
+    "android": (0, "Android"),
+    "iphone": (1, "iOS"),
+    "ipad": (1, "iOS"),
+    "ipod": (1, "iOS"),
+    "cros": (2, "ChromeOS"),
+    "macintosh": (3, "macOS"),
+    "linux": (4, "Linux"),
+}
+_KEYWORDS = frozenset(_BROWSERS) | frozenset(_SYSTEMS) | {"mobile", "mobi", "tablet"}
+_NONE = (99, "Unknown")
+
+
+def _parse_user_agent(user_agent: str) -> dict:
+    words = _KEYWORDS.intersection(_WORDS.findall(user_agent.lower()))
+    browser = min((_BROWSERS[word] for word in words if word in _BROWSERS), default=_NONE)[1]
+    system = min((_SYSTEMS[word] for word in words if word in _SYSTEMS), default=_NONE)[1]
+    mobile = "mobile" in words or "mobi" in words
+    if "ipad" in words or "tablet" in words or (system == "Android" and not mobile):
+        device = "Tablet"
+    elif mobile or system in ("Android", "iOS"):
+        device = "Mobile"
+    else:
+        device = "Desktop"
+    return {'browser': browser, 'os': system, 'device': device}
+
+
+def _user_agent_hash(user_agent: str) -> bytes:
+    return hashlib.blake2b(user_agent.encode(), digest_size=16).digest()
+
+
+def _intern(bind, agents, hashes) -> None:
+    """Insert the parsed User-Agents that user_agents does not have yet"""
+    rows = [
+        {'ua_hash': ua_hash, 'user_agent': user_agent, **_parse_user_agent(user_agent)}
+        for user_agent, ua_hash in zip(agents, hashes)
+    ]
+    if rows:
+        bind.execute(
+            postgresql.insert(user_agents).values(rows).on_conflict_do_nothing(index_elements=['ua_hash'])
+        )
+
+
+def _backfill(bind) -> None:
+    last_id = bind.execute(sa.text("SELECT max(id) FROM auth_sessions")).scalar() or 0
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        end = start + BATCH_SIZE
+        agents = bind.execute(sa.text("""
+            SELECT DISTINCT user_agent FROM auth_sessions
+            WHERE id >= :start AND id < :end AND user_agent IS NOT NULL AND user_agent_id IS NULL
+        """), {'start': start, 'end': end}).scalars().all()
+        if not agents:
+            continue
+        hashes = [_user_agent_hash(user_agent) for user_agent in agents]
+        _intern(bind, agents, hashes)
+        # The batch's own (text, hash) pairs map each session to its hash,
+        # and the hash finds the row through the user_agents unique index
+        bind.execute(sa.text("""
+            UPDATE auth_sessions s SET user_agent_id = ua.id
+            FROM unnest(:agents, :hashes) AS m(user_agent, ua_hash)
+            JOIN user_agents ua ON ua.ua_hash = m.ua_hash
+            WHERE s.id >= :start AND s.id < :end AND s.user_agent_id IS NULL AND s.user_agent = m.user_agent
+        """).bindparams(
+            sa.bindparam('agents', type_=postgresql.ARRAY(sa.Text)),
+            sa.bindparam('hashes', type_=postgresql.ARRAY(sa.LargeBinary)),
+        ), {'start': start, 'end': end, 'agents': list(agents), 'hashes': hashes})
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Table and column may already exist if they were created by create_all fallback
+    if not inspector.has_table('user_agents'):
+        op.create_table(
+            'user_agents',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('ua_hash', sa.LargeBinary(length=16), nullable=False),
+            sa.Column('user_agent', sa.Text(), nullable=False),
+            sa.Column('browser', sa.String(length=32), nullable=False),
+            sa.Column('os', sa.String(length=32), nullable=False),
+            sa.Column('device', sa.String(length=16), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('ua_hash')
+        )
+
+    columns = {column['name'] for column in inspector.get_columns('auth_sessions')}
+    if 'user_agent_id' not in columns:
+        op.add_column('auth_sessions', sa.Column('user_agent_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(
+            'auth_sessions_user_agent_id_fkey', 'auth_sessions', 'user_agents', ['user_agent_id'], ['id']
+        )
+
+    if 'user_agent' not in columns:
+        return
+
+    # Batches commit one by one: an interrupted backfill resumes where it
+    # stopped (rows already linked are skipped) and holds no long lock
+    with op.get_context().autocommit_block():
+        _backfill(bind)
+
+    op.drop_column('auth_sessions', 'device_info')
+    op.drop_column('auth_sessions', 'user_agent')
+
+
+def downgrade() -> None:
+    # device_info in the json.dumps format the app wrote before this revision
+    op.add_column('auth_sessions', sa.Column('user_agent', sa.Text(), nullable=True))
+    op.add_column('auth_sessions', sa.Column('device_info', sa.Text(), nullable=True))
+    op.execute("""
+        UPDATE auth_sessions s
+        SET user_agent = ua.user_agent,
+            device_info = '{"browser": ' || to_json(ua.browser) || ', "os": ' || to_json(ua.os)
+                || ', "device": ' || to_json(ua.device) || '}'
+        FROM user_agents ua
+        WHERE s.user_agent_id = ua.id
+    """)
+    op.drop_constraint('auth_sessions_user_agent_id_fkey', 'auth_sessions', type_='foreignkey')
+    op.drop_column('auth_sessions', 'user_agent_id')
+    op.drop_table('user_agents')
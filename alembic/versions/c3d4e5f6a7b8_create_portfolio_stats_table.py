@@ -0,0 +1,50 @@
+"""create_portfolio_stats_table
+
+Revision ID: c3d4e5f6a7b8
+Revises: b7c8d9e0f1a2, f15aa88dea9b
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+# Also merges the two heads that branched from a6dc00c8ea34
+down_revision: Union[str, Sequence[str], None] = ('b7c8d9e0f1a2', 'f15aa88dea9b')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Table may already exist if it was created by create_all fallback
+    if sa.inspect(op.get_bind()).has_table('portfolio_stats'):
+        return
+    
+    # Reuse the status enum of loan_applications
+    application_status = postgresql.ENUM(name='applicationstatus', create_type=False)
+    
+    op.create_table('portfolio_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', application_status, nullable=False),
+        sa.Column('loan_purpose', sa.String(length=100), nullable=False),
+        sa.Column('application_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status', 'loan_purpose')
+    )
+    
+    # Backfill from existing applications
+    op.execute("""
+        INSERT INTO portfolio_stats (day, status, loan_purpose, application_count, total_amount)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, status, loan_purpose, count(*), sum(loan_amount)
+        FROM loan_applications
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_stats')
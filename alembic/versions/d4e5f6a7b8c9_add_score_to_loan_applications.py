@@ -0,0 +1,40 @@
+"""add_score_to_loan_applications
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, Sequence[str], None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Columns may already exist if they were created by create_all fallback
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('loan_applications')}
+    if 'score' in columns:
+        return
+    
+    op.add_column('loan_applications', sa.Column('score', sa.Integer(), nullable=True))
+    op.add_column('loan_applications', sa.Column('scored_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_loan_applications_unscored',
+        'loan_applications',
+        ['id'],
+        postgresql_where=sa.text('score IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_loan_applications_unscored', table_name='loan_applications')
+    op.drop_column('loan_applications', 'scored_at')
+    op.drop_column('loan_applications', 'score')
@@ -0,0 +1,31 @@
+"""add_score_model_version
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, Sequence[str], None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Column may already exist if it was created by create_all fallback
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('loan_applications')}
+    if 'score_model_version' in columns:
+        return
+    
+    op.add_column('loan_applications', sa.Column('score_model_version', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('loan_applications', 'score_model_version')
@@ -0,0 +1,46 @@
+"""add_phone_normalized_to_users
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, Sequence[str], None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Column may already exist if it was created by create_all fallback
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'phone_normalized' not in columns:
+        op.add_column('users', sa.Column('phone_normalized', sa.String(length=20), nullable=True))
+        op.create_index(op.f('ix_users_phone_normalized'), 'users', ['phone_normalized'], unique=False)
+    
+    # Backfill, same rules as app.services.phone.normalize_phone
+    op.execute(r"""
+        UPDATE users
+        SET phone_normalized = '+' || CASE
+            WHEN n.digits ~ '^8[0-9]{10}$' THEN '7' || substr(n.digits, 2)
+            ELSE n.digits
+        END
+        FROM (
+            SELECT id, regexp_replace(regexp_replace(phone_number, '\D', '', 'g'), '^00', '') AS digits
+            FROM users
+            WHERE phone_number IS NOT NULL AND phone_normalized IS NULL
+        ) AS n
+        WHERE users.id = n.id AND length(n.digits) BETWEEN 7 AND 15
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_phone_normalized'), table_name='users')
+    op.drop_column('users', 'phone_normalized')
@@ -0,0 +1,371 @@
+import csv
+import io
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+import anyio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import async_session, get_db
+from ..models.application import LoanApplication, ApplicationStatus
+from ..models.user import AuthSession, UserAgent
+from ..models.schemas import BulkTransitionRequest, BulkTransitionResponse
+from ..services import portfolio_stats
+from ..services.application_service import bulk_transition, InvalidTransitionError
+from ..services.loop_monitor import loop_monitor
+from ..services.memory import (
+    store_registry, allocation_tracker, process_memory, gc_object_count, heap_walk_limiter, MEMORY_TRACE_FRAMES
+)
+from ..services.slow_queries import slow_query_log, SLOW_QUERY_TOP_N
+from ..services.velocity import velocity_index
+from .auth import enforce_rate_limit
+from .projection import parse_fields
+from .responses import dump_json
+
+router = APIRouter(tags=["admin"])
+
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "default-admin-api-key-change-in-production")
+
+# Rows fetched per server-side cursor round trip and rendered per chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = (
+    LoanApplication.id,
+    LoanApplication.user_id,
+    LoanApplication.loan_amount,
+    LoanApplication.loan_term,
+    LoanApplication.loan_purpose,
+    LoanApplication.monthly_income,
+    LoanApplication.status,
+    LoanApplication.created_at,
+    LoanApplication.updated_at,
+    LoanApplication.approved_at,
+    LoanApplication.completed_at,
+    LoanApplication.rejection_reason,
+    LoanApplication.notes,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+async def verify_admin_token(x_admin_token: str = Header(...)) -> bool:
+    """Verify that the request comes from an administrator"""
+    if x_admin_token != ADMIN_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    return True
+
+
+def _render_ndjson(rows: Sequence) -> bytes:
+    return b"".join(
+        dump_json(dict(zip(EXPORT_FIELDS, row))) + b"\n"
+        for row in rows
+    )
+
+
+def _render_csv(rows: Sequence) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            value.value if isinstance(value, Enum)
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for value in row
+        ])
+    return buffer.getvalue().encode()
+
+
+def _csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue().encode()
+
+
+async def _stream_export(
+    statement,
+    render: Callable[[Sequence], bytes],
+    header: Optional[bytes] = None
+) -> AsyncIterator[bytes]:
+    """Stream rows through a server-side cursor, one chunk per batch.
+
+    Plain column rows (no ORM identity map) and yield_per keep memory flat.
+    Each chunk waits on the client's send, so a slow reader pauses the
+    cursor instead of buffering. On disconnect the generator is cancelled
+    and cleanup runs shielded so the connection goes back to the pool.
+    """
+    if header:
+        yield header
+
+    session = async_session()
+    result = None
+    try:
+        result = await session.stream(
+            statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield render(rows)
+    finally:
+        with anyio.CancelScope(shield=True):
+            if result is not None:
+                await result.close()
+            await session.close()
+
+
+@router.get("/applications/export")
+async def export_applications(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[ApplicationStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _: bool = Depends(verify_admin_token)
+):
+    """Stream loan applications as NDJSON or CSV.
+
+    Filters: status, created_from (inclusive), created_to (exclusive).
+    """
+    statement = select(*EXPORT_COLUMNS).order_by(LoanApplication.id)
+    if status is not None:
+        statement = statement.where(LoanApplication.status == status)
+    if created_from is not None:
+        statement = statement.where(LoanApplication.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(LoanApplication.created_at < created_to)
+
+    if format == ExportFormat.CSV:
+        body = _stream_export(statement, _render_csv, header=_csv_header())
+        media_type = "text/csv"
+    else:
+        body = _stream_export(statement, _render_ndjson)
+        media_type = "application/x-ndjson"
+
+    filename = f"loan_applications_{datetime.utcnow():%Y%m%d_%H%M%S}.{format.value}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/stats/portfolio")
+async def get_portfolio_stats(
+    group_by: str = "status",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_token)
+):
+    """Application counts and loan_amount sums from the summary table.
+
+    group_by: comma-separated subset of day, status, loan_purpose.
+    date_from/date_to (inclusive) filter on the application's UTC day.
+    """
+    columns = parse_fields(group_by, tuple(portfolio_stats.GROUP_COLUMNS))
+    return {
+        "group_by": columns,
+        "stats": await portfolio_stats.get_stats(db, columns, date_from, date_to)
+    }
+
+
+@router.post("/stats/portfolio/rebuild")
+async def rebuild_portfolio_stats(
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_token)
+):
+    """Recompute the portfolio summary from loan_applications"""
+    groups = await portfolio_stats.rebuild(db)
+    await db.commit()
+    return {"status": "ok", "groups": groups}
+
+
+DEVICE_COLUMNS = {"browser": UserAgent.browser, "os": UserAgent.os, "device": UserAgent.device}
+
+
+@router.get("/stats/devices")
+async def get_device_stats(
+    group_by: str = "browser,os,device",
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_token)
+):
+    """Active sessions by parsed User-Agent fields.
+
+    group_by: comma-separated subset of browser, os, device. Sessions
+    join the small user_agents table, so no User-Agent is parsed here.
+    """
+    columns = parse_fields(group_by, tuple(DEVICE_COLUMNS))
+    group = [DEVICE_COLUMNS[name] for name in columns]
+    result = await db.execute(
+        select(*group, func.count(AuthSession.id).label("sessions"))
+        .join(UserAgent, AuthSession.user_agent_id == UserAgent.id)
+        .where(AuthSession.is_active == True)
+        .group_by(*group)
+        .order_by(func.count(AuthSession.id).desc())
+    )
+    return {
+        "group_by": columns,
+        "stats": [dict(zip((*columns, "sessions"), row)) for row in result.all()]
+    }
+
+
+@router.post("/applications/transitions", response_model=BulkTransitionResponse)
+async def transition_applications(
+    request: BulkTransitionRequest,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_token)
+):
+    """Move many applications from from_status to to_status at once.
+
+    Each id is reported as updated, conflict (its current status differs
+    from from_status) or not_found.
+    """
+    try:
+        results = await bulk_transition(
+            db,
+            request.ids,
+            request.from_status,
+            request.to_status,
+            request.rejection_reason
+        )
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BulkTransitionResponse(
+        updated=sum(1 for result in results if result.outcome == "updated"),
+        results=results
+    )
+
+
+@router.get("/velocity")
+async def get_velocity_stats(_: bool = Depends(verify_admin_token)):
+    """Velocity index: mode, flagged/blocked counts and tracked keys"""
+    return velocity_index.stats()
+
+
+@router.post("/velocity/rebuild")
+async def rebuild_velocity_index(
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_token)
+):
+    """Reload the velocity index from the last window of the database"""
+    events = await velocity_index.rebuild(db)
+    return {"status": "ok", "events": events}
+
+
+class SlowQueryOrder(str, Enum):
+    TOTAL = "total"
+    MEAN = "mean"
+    MAX = "max"
+    COUNT = "count"
+
+
+@router.get("/queries")
+async def get_query_stats(
+    limit: int = Query(SLOW_QUERY_TOP_N, ge=1, le=500),
+    order_by: SlowQueryOrder = SlowQueryOrder.TOTAL,
+    _: bool = Depends(verify_admin_token)
+):
+    """Costliest statement fingerprints over the recent window"""
+    return {
+        **slow_query_log.stats(),
+        "top": slow_query_log.top(limit, order_by.value),
+    }
+
+
+@router.post("/queries/reset")
+async def reset_query_stats(_: bool = Depends(verify_admin_token)):
+    """Start statement statistics over"""
+    slow_query_log.reset()
+    return {"status": "ok"}
+
+
+@router.get("/loop")
+async def get_loop_stats(_: bool = Depends(verify_admin_token)):
+    """Event loop lag percentiles and recent stalls (with stacks in debug mode)"""
+    return loop_monitor.stats()
+
+
+class AllocationGrouping(str, Enum):
+    LINENO = "lineno"
+    FILENAME = "filename"
+    TRACEBACK = "traceback"
+
+
+def limit_heap_walk():
+    """429 if a heap walk ran within MEMORY_HEAP_WALK_INTERVAL.
+
+    gc.get_objects() and tracemalloc snapshots hold the GIL until they
+    finish, stalling every request in the process.
+    """
+    enforce_rate_limit(heap_walk_limiter, "heap")
+
+
+@router.get("/memory")
+async def get_memory_stats(
+    gc_objects: bool = False,
+    _: bool = Depends(verify_admin_token)
+):
+    """Entry counts and approximate sizes of in-process stores, RSS and tracemalloc state"""
+    memory = process_memory()
+    if gc_objects:
+        limit_heap_walk()
+        memory["gc_objects"] = gc_object_count()
+    return {
+        **memory,
+        "stores": store_registry.report(),
+        "tracemalloc": allocation_tracker.stats(),
+    }
+
+
+@router.post("/memory/tracemalloc/start")
+async def start_allocation_tracing(
+    frames: int = Query(MEMORY_TRACE_FRAMES, ge=1, le=50),
+    _: bool = Depends(verify_admin_token)
+):
+    """Start tracing allocations (adds overhead until stopped)"""
+    allocation_tracker.start(frames)
+    return allocation_tracker.stats()
+
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_allocation_tracing(_: bool = Depends(verify_admin_token)):
+    """Stop tracing allocations and drop the baseline"""
+    allocation_tracker.stop()
+    return allocation_tracker.stats()
+
+
+@router.post("/memory/tracemalloc/snapshot")
+async def take_allocation_snapshot(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: AllocationGrouping = AllocationGrouping.LINENO,
+    _: bool = Depends(verify_admin_token)
+):
+    """Record the baseline for diffs; returns its largest allocation sites"""
+    limit_heap_walk()
+    try:
+        top = allocation_tracker.snapshot(limit, group_by.value)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**allocation_tracker.stats(), "top": top}
+
+
+@router.get("/memory/tracemalloc/diff")
+async def diff_allocation_snapshot(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: AllocationGrouping = AllocationGrouping.LINENO,
+    _: bool = Depends(verify_admin_token)
+):
+    """Allocation sites that grew the most since the baseline snapshot"""
+    limit_heap_walk()
+    try:
+        top = allocation_tracker.diff(limit, group_by.value)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**allocation_tracker.stats(), "top": top}
@@ -1,4 +1,5 @@
 import os
+import math
 import jwt
 from jwt.exceptions import PyJWTError, ExpiredSignatureError
 from datetime import datetime, timedelta
@@ -8,9 +9,14 @@ from sqlalchemy import select
 
 from app.database import get_db
 from app.models.user import User, AuthSession
-from app.models.schemas import AuthTokenRequest, AuthTokenResponse, VerifyTokenResponse
+from app.models.schemas import AuthTokenRequest, AuthTokenResponse, VerifyTokenResponse, AuthSession as AuthSessionSchema
 # from app.bot.handlers import get_user_by_auth_token  # УДАЛЕНО - перенесено в auth_service
 from app.services.auth_service import auth_token_service
+from app.services.rate_limiter import RateLimiter, auth_rate_limiter
+from app.services.velocity import velocity_index
+from app.services.query_budget import query_budget
+from app.services.user_agent import parse_user_agent, user_agent_dictionary
+from app.api.responses import FastJSONResponse, dump_json
 
 router = APIRouter()
 
@@ -19,11 +25,33 @@ JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_HOURS = 24 * 7  # 7 дней
 
+# Сколько прокси перед приложением дописывают адрес в X-Forwarded-For
+# (Railway - 1); 0 - приложение принимает соединения напрямую
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
 def get_bot_username():
     """Получение username бота (нужно настроить в переменных окружения)"""
     return os.getenv("TELEGRAM_BOT_USERNAME", "kredit_score_bot")
 
-@router.post("/telegram", response_model=AuthTokenResponse)
+def enforce_rate_limit(limiter: RateLimiter, key: str):
+    """Отклоняет запрос с 429, если лимит для ключа исчерпан"""
+    retry_after = limiter.hit(key)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Слишком много запросов, попробуйте позже",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+async def limit_token_issuance(request: Request):
+    """Лимит на выпуск auth токенов по IP клиента"""
+    enforce_rate_limit(auth_rate_limiter, get_client_ip(request))
+
+@router.post(
+    "/telegram",
+    response_model=AuthTokenResponse,
+    dependencies=[Depends(limit_token_issuance)]
+)
 async def create_auth_token(
     request_data: AuthTokenRequest,
     request: Request,
@@ -59,7 +87,11 @@ async def create_auth_token(
     )
 
 
-@router.post("/telegram/v2", response_model=AuthTokenResponse)
+@router.post(
+    "/telegram/v2",
+    response_model=AuthTokenResponse,
+    dependencies=[Depends(limit_token_issuance)]
+)
 async def create_auth_token_v2(
     request_data: AuthTokenRequest,
     request: Request,
@@ -67,12 +99,11 @@ async def create_auth_token_v2(
 ):
     """
     Создание токена авторизации для Telegram (новая версия)
-    Использует Bot API вместо прямого взаимодействия с временными хранилищами
+    Токен выпускается так же, как в Bot API (/api/bot/auth/init), но без
+    HTTP-вызова самого себя: публичный трафик не расходует лимиты бота
+    (bot_rate_limiter по ключу и IP сервера) и ограничен только
+    limit_token_issuance по IP клиента
     """
-    import aiohttp
-    import os
-    
-    # Подготовка данных для Bot API
     loan_data = {
         "loan_amount": request_data.loan_amount,
         "loan_term": request_data.loan_term,
@@ -80,50 +111,32 @@ async def create_auth_token_v2(
         "monthly_income": request_data.monthly_income
     }
     
-    # Вызов Bot API для создания токена
-    bot_api_key = os.getenv("BOT_API_KEY", "default-bot-api-key-change-in-production")
-    base_url = request.url.scheme + "://" + request.url.netloc
+    auth_token = auth_token_service.create_auth_token(loan_data)
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{base_url}/api/bot/auth/init",
-                headers={"X-Bot-Token": bot_api_key},
-                json=loan_data
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return AuthTokenResponse(
-                        auth_token=data["auth_token"],
-                        telegram_url=data["telegram_url"]
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to create auth token via Bot API"
-                    )
-    except Exception as e:
-        # Fallback to old method if Bot API fails
-        loan_data_for_service = {k: v for k, v in loan_data.items() if v is not None}
-        auth_token = auth_token_service.create_auth_token(loan_data_for_service if loan_data_for_service else None)
-        
-        bot_username = get_bot_username()
-        telegram_url = f"https://t.me/{bot_username}?start={auth_token}"
-        
-        return AuthTokenResponse(
-            auth_token=auth_token,
-            telegram_url=telegram_url
-        )
+    bot_username = get_bot_username()
+    telegram_url = f"https://t.me/{bot_username}?start={auth_token}"
+    
+    return AuthTokenResponse(
+        auth_token=auth_token,
+        telegram_url=telegram_url
+    )
 
-@router.get("/verify/{token}", response_model=VerifyTokenResponse)
+# Пользователь и INSERT сессии; +1 при первом входе с нового User-Agent
+@router.get(
+    "/verify/{token}",
+    response_model=VerifyTokenResponse,
+    dependencies=[Depends(query_budget(3))]
+)
 async def verify_auth_token(
     token: str,
     request: Request,
+    compact: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Проверка токена авторизации
     Если токен валиден, создает сессию и возвращает данные пользователя
+    compact=true убирает дублирующийся session.user из ответа
     """
     
     # Получаем ID пользователя по токену из auth service
@@ -145,6 +158,17 @@ async def verify_auth_token(
             detail="Пользователь не найден"
         )
     
+    # Проверка частоты входов с одного IP
+    client_ip = get_client_ip(request)
+    violations = velocity_index.check_login(client_ip)
+    if violations:
+        print(f"⚠️ Velocity: вход user_id={user.id} ip={client_ip}: {'; '.join(violations)}")
+        if velocity_index.blocking:
+            raise HTTPException(
+                status_code=429,
+                detail="Слишком много входов с этого адреса, попробуйте позже"
+            )
+    
     # Получаем информацию о устройстве
     user_agent = request.headers.get("user-agent", "")
     device_info = extract_device_info(user_agent)
@@ -157,32 +181,39 @@ async def verify_auth_token(
     }
     jwt_token = jwt.encode(jwt_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     
-    # Создаем сессию в базе данных
+    # Создаем сессию в базе данных; новый User-Agent добавляется в той же транзакции
+    user_agent_id = await user_agent_dictionary.intern(db, user_agent)
     session = AuthSession(
         token=jwt_token,
         user_id=user.id,
-        user_agent=user_agent,
-        device_info=str(device_info),
-        ip_address=get_client_ip(request),
+        user_agent_id=user_agent_id,
+        ip_address=client_ip,
         expires_at=datetime.utcnow() + timedelta(hours=JWT_EXPIRE_HOURS)
     )
     
     db.add(session)
     await db.commit()
-    await db.refresh(session)
+    # id User-Agent кэшируется только после commit
+    user_agent_dictionary.remember(user_agent, user_agent_id)
     
     # Удаляем использованный auth_token и данные займа
     auth_token_service.cleanup_auth_token(token)
     
-    return VerifyTokenResponse(
+    response = VerifyTokenResponse(
         access_token=jwt_token,
         token_type="bearer",
         user=user,
-        session=session,
+        session=AuthSessionSchema.model_validate(session).model_copy(update={
+            "user_agent": user_agent,
+            "device_info": parse_user_agent(user_agent).to_json()
+        }),
         device_info=device_info
     )
+    
+    exclude = {"session": {"user"}} if compact else None
+    return FastJSONResponse(dump_json(response, exclude=exclude))
 
-@router.post("/logout")
+@router.post("/logout", dependencies=[Depends(query_budget(2))])
 async def logout(
     request: Request,
     db: AsyncSession = Depends(get_db)
@@ -224,59 +255,21 @@ async def logout(
 
 def extract_device_info(user_agent: str) -> dict:
     """Извлечение информации об устройстве из User-Agent"""
-    
-    device_info = {
-        "user_agent": user_agent,
-        "browser": "Unknown",
-        "os": "Unknown",
-        "device": "Unknown"
-    }
-    
-    user_agent_lower = user_agent.lower()
-    
-    # Определение браузера
-    if "chrome" in user_agent_lower:
-        device_info["browser"] = "Chrome"
-    elif "firefox" in user_agent_lower:
-        device_info["browser"] = "Firefox"
-    elif "safari" in user_agent_lower:
-        device_info["browser"] = "Safari"
-    elif "edge" in user_agent_lower:
-        device_info["browser"] = "Edge"
-    
-    # Определение ОС
-    if "windows" in user_agent_lower:
-        device_info["os"] = "Windows"
-    elif "mac" in user_agent_lower:
-        device_info["os"] = "macOS"
-    elif "linux" in user_agent_lower:
-        device_info["os"] = "Linux"
-    elif "android" in user_agent_lower:
-        device_info["os"] = "Android"
-    elif "ios" in user_agent_lower:
-        device_info["os"] = "iOS"
-    
-    # Определение типа устройства
-    if "mobile" in user_agent_lower or "android" in user_agent_lower:
-        device_info["device"] = "Mobile"
-    elif "tablet" in user_agent_lower or "ipad" in user_agent_lower:
-        device_info["device"] = "Tablet"
-    else:
-        device_info["device"] = "Desktop"
-    
-    return device_info
+    return {"user_agent": user_agent, **parse_user_agent(user_agent).as_dict()}
 
 def get_client_ip(request: Request) -> str:
-    """Получение IP адреса клиента"""
-    
-    # Проверяем заголовки прокси
-    forwarded_for = request.headers.get("x-forwarded-for")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
-    
-    real_ip = request.headers.get("x-real-ip")
-    if real_ip:
-        return real_ip
+    """Получение IP адреса клиента
+
+    Клиент может прислать любой X-Forwarded-For, поэтому берется только
+    адрес, который дописал ближайший доверенный прокси (TRUSTED_PROXY_HOPS
+    записей с конца). Без прокси - адрес TCP-соединения. По этому адресу
+    работают лимиты и velocity, подмена заголовка их не обходит.
+    """
+    if TRUSTED_PROXY_HOPS:
+        forwarded_for = [
+            hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()
+        ]
+        if len(forwarded_for) >= TRUSTED_PROXY_HOPS:
+            return forwarded_for[-TRUSTED_PROXY_HOPS]
     
-    # Fallback на client.host
-    return request.client.host if request.client else "unknown" 
\ No newline at end of file
+    return request.client.host if request.client else "unknown"
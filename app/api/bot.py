@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional, Sequence, Tuple
 import os
-from datetime import datetime
 
 from ..database import get_db
 from ..models.user import User
+from ..models.application import LoanApplication, ApplicationStatus
 from ..models.schemas import (
     BotAuthInitRequest,
     BotAuthInitResponse,
@@ -15,12 +18,38 @@ from ..models.schemas import (
     BotUserResponse
 )
 from ..services.auth_service import auth_token_service
+from ..services.rate_limiter import bot_rate_limiter
+from ..services.bot_user_cache import bot_user_cache
+from ..services import portfolio_stats
+from ..services.scoring_pipeline import scoring_pipeline
+from ..services.phone import normalize_phone
+from ..services.velocity import velocity_index
+from ..services.query_budget import query_budget
+from ..services.tracing import traced
+from ..services.idempotency_service import bot_auth_idempotency, IdempotencyConflictError
+
+from .auth import enforce_rate_limit, get_client_ip
+from .responses import FastJSONResponse
+from .conditional import make_etag, etag_matches, not_modified
+from .projection import parse_fields, project
 
 router = APIRouter(tags=["bot"])
 
 BOT_API_KEY = os.getenv("BOT_API_KEY", "default-bot-api-key-change-in-production")
 
+# Keys of the bot user payload that can be requested with fields=
+BOT_USER_FIELDS = (
+    "id", "telegram_id", "phone_number", "first_name", "last_name", "username",
+    "created_at", "updated_at", "applications",
+    "loan_amount", "loan_term", "loan_purpose", "monthly_income"
+)
+# Keys derived from applications; everything else is a users column
+BOT_USER_APPLICATION_FIELDS = frozenset(
+    ("applications", "loan_amount", "loan_term", "loan_purpose", "monthly_income")
+)
 
+
+@traced()
 async def verify_bot_token(x_bot_token: str = Header(...)) -> bool:
     """Verify that the request comes from our bot service"""
     if x_bot_token != BOT_API_KEY:
@@ -28,7 +57,21 @@ async def verify_bot_token(x_bot_token: str = Header(...)) -> bool:
     return True
 
 
-@router.post("/auth/init", response_model=BotAuthInitResponse)
+async def limit_bot_token_issuance(
+    request: Request,
+    x_bot_token: str = Header(...),
+    _: bool = Depends(verify_bot_token)
+):
+    """Rate limit token issuance per bot key and per caller IP"""
+    enforce_rate_limit(bot_rate_limiter, f"key:{x_bot_token}")
+    enforce_rate_limit(bot_rate_limiter, f"ip:{get_client_ip(request)}")
+
+
+@router.post(
+    "/auth/init",
+    response_model=BotAuthInitResponse,
+    dependencies=[Depends(limit_bot_token_issuance)]
+)
 async def init_bot_auth(
     request: BotAuthInitRequest,
     _: bool = Depends(verify_bot_token)
@@ -52,13 +95,37 @@ async def init_bot_auth(
     )
 
 
-@router.post("/auth/complete", response_model=BotAuthCompleteResponse)
+@router.post(
+    "/auth/complete",
+    response_model=BotAuthCompleteResponse,
+    dependencies=[Depends(query_budget(4))]
+)
 async def complete_bot_auth(
     request: BotAuthCompleteRequest,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
     _: bool = Depends(verify_bot_token)
 ):
-    """Complete bot authentication process"""
+    """Complete bot authentication process.
+
+    Retries with the same auth_token (or Idempotency-Key header) replay the
+    first result without touching the database.
+    """
+    key = idempotency_key or request.auth_token
+    fingerprint = bot_auth_idempotency.fingerprint(request.model_dump_json())
+    
+    try:
+        return await bot_auth_idempotency.execute(
+            key, fingerprint, lambda: _complete_bot_auth(request, db)
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _complete_bot_auth(
+    request: BotAuthCompleteRequest,
+    db: AsyncSession
+) -> BotAuthCompleteResponse:
     is_valid, error_msg = auth_token_service.verify_auth_token(request.auth_token)
     if not is_valid:
         raise HTTPException(
@@ -68,58 +135,65 @@ async def complete_bot_auth(
     
     loan_data = auth_token_service.get_loan_data(request.auth_token) or {}
     
-    # Check if user exists
-    result = await db.execute(
-        select(User).where(User.telegram_id == request.telegram_id)
-    )
-    user = result.scalar_one_or_none()
-    
-    if user:
-        # Update existing user
-        user.phone_number = request.phone
-        user.first_name = request.first_name
-        user.last_name = request.last_name
-        user.username = request.username
-        # Create loan application
-        from app.models import LoanApplication, ApplicationStatus
-        
-        application = LoanApplication(
-            user_id=user.id,
-            loan_amount=loan_data.get("loan_amount"),
-            loan_term=loan_data.get("loan_term"),
-            loan_purpose=loan_data.get("loan_purpose"),
-            monthly_income=loan_data.get("monthly_income"),
-            status=ApplicationStatus.PENDING
-        )
-        db.add(application)
-        user.updated_at = datetime.utcnow()
-    else:
-        # Create new user
-        user = User(
-            telegram_id=request.telegram_id,
-            phone_number=request.phone,
-            first_name=request.first_name,
-            last_name=request.last_name,
-            username=request.username
+    # Velocity checks run before any database work
+    phone_normalized = normalize_phone(request.phone)
+    violations = velocity_index.check_application(phone_normalized, request.telegram_id)
+    if violations and velocity_index.blocking:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many applications: {'; '.join(violations)}"
         )
-        db.add(user)
-        await db.flush()  # Get user.id
-        
-        # Create loan application for new user
-        from app.models import LoanApplication, ApplicationStatus
-        
-        application = LoanApplication(
-            user_id=user.id,
-            loan_amount=loan_data.get("loan_amount"),
-            loan_term=loan_data.get("loan_term"),
-            loan_purpose=loan_data.get("loan_purpose"),
-            monthly_income=loan_data.get("monthly_income"),
-            status=ApplicationStatus.PENDING
+    
+    # Create or update the user in one statement; RETURNING fills the
+    # ORM object, so no select is needed first
+    profile = dict(
+        phone_number=request.phone,
+        phone_normalized=phone_normalized,
+        first_name=request.first_name,
+        last_name=request.last_name,
+        username=request.username
+    )
+    upsert = (
+        pg_insert(User)
+        .values(telegram_id=request.telegram_id, **profile)
+        .on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={**profile, "updated_at": func.now()}
         )
-        db.add(application)
+        .returning(User)
+    )
+    user = (await db.scalars(upsert, execution_options={"populate_existing": True})).one()
     
+    application = LoanApplication(
+        user_id=user.id,
+        loan_amount=loan_data.get("loan_amount"),
+        loan_term=loan_data.get("loan_term"),
+        loan_purpose=loan_data.get("loan_purpose"),
+        monthly_income=loan_data.get("monthly_income"),
+        status=ApplicationStatus.PENDING
+    )
+    if violations:
+        # Flag mode: kept for manual review
+        application.notes = f"Velocity: {'; '.join(violations)}"
+    db.add(application)
+    
+    await portfolio_stats.record_created(db, application)
     await db.commit()
-    await db.refresh(user)
+    
+    # Scored in the background; the response does not wait for it
+    scoring_pipeline.submit(application.id)
+    
+    # Load applications (with server defaults of the new one) and write the
+    # fresh payload through to the cache: the bot asks for this user right
+    # after completing auth
+    applications = await db.scalars(
+        select(LoanApplication)
+        .where(LoanApplication.user_id == user.id)
+        .order_by(LoanApplication.created_at.desc())
+        .execution_options(populate_existing=True)
+    )
+    set_committed_value(user, "applications", applications.all())
+    bot_user_cache.put(user.telegram_id, serialize_bot_user(user), bot_user_etag(user))
     
     # Save token-user mapping for verification
     auth_token_service.set_user_for_token(request.auth_token, user.id)
@@ -135,23 +209,69 @@ async def complete_bot_auth(
     )
 
 
-@router.get("/users/{telegram_id}")
-async def get_bot_user(
+async def _load_bot_user(
+    db: AsyncSession,
     telegram_id: int,
-    db: AsyncSession = Depends(get_db),
-    _: bool = Depends(verify_bot_token)
-):
-    """Get user by telegram_id"""
-    from sqlalchemy.orm import selectinload
-    
+    populate_existing: bool = False
+) -> Optional[User]:
     result = await db.execute(
-        select(User).where(User.telegram_id == telegram_id).options(selectinload(User.applications))
+        select(User)
+        .where(User.telegram_id == telegram_id)
+        .options(selectinload(User.applications))
+        .execution_options(populate_existing=populate_existing)
     )
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+    return result.scalar_one_or_none()
+
+
+def _projected_etag(etag: str, fields: List[str]) -> str:
+    return make_etag(etag, ",".join(fields))
+
+
+def _bot_user_etag(user_id: int, user_version, application_count: int, applications_version) -> str:
+    return make_etag("bot-user", user_id, user_version, application_count, applications_version)
+
+
+def bot_user_etag(user: User) -> str:
+    """ETag for a user with applications loaded"""
+    applications_version = max(
+        (app.updated_at or app.created_at for app in user.applications),
+        default=None
+    )
+    return _bot_user_etag(
+        user.id,
+        user.updated_at or user.created_at,
+        len(user.applications),
+        applications_version
+    )
+
+
+async def _current_bot_user_version(
+    db: AsyncSession,
+    telegram_id: int,
+    columns: Sequence[str] = ()
+) -> Optional[Tuple[str, tuple]]:
+    """ETag from an aggregate over the user's versions, without loading
+    application rows. Extra user columns can be fetched in the same query."""
+    result = await db.execute(
+        select(
+            User.id,
+            func.coalesce(User.updated_at, User.created_at),
+            func.count(LoanApplication.id),
+            func.max(func.coalesce(LoanApplication.updated_at, LoanApplication.created_at)),
+            *[getattr(User, name) for name in columns]
+        )
+        .outerjoin(LoanApplication, LoanApplication.user_id == User.id)
+        .where(User.telegram_id == telegram_id)
+        .group_by(User.id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return _bot_user_etag(*row[:4]), tuple(row[4:])
+
+
+def serialize_bot_user(user: User) -> dict:
+    """Build the bot user payload (user must have applications loaded)"""
     # Get latest application if exists
     latest_application = user.applications[0] if user.applications else None
     
@@ -184,6 +304,77 @@ async def get_bot_user(
     }
 
 
+@router.get("/users/{telegram_id}", dependencies=[Depends(query_budget(3))])
+async def get_bot_user(
+    telegram_id: int,
+    request: Request,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_bot_token)
+):
+    """Get user by telegram_id (served from cache while the user is active).
+
+    fields=a,b,c limits the payload. Projections that need no application
+    data select only those user columns and skip loading applications.
+
+    Supports If-None-Match: a matching ETag gets 304 from the cache, or
+    from a single aggregate query before the full rows are loaded.
+    """
+    selected = parse_fields(fields, BOT_USER_FIELDS)
+    
+    cached = bot_user_cache.get(telegram_id)
+    if cached is not None:
+        payload, etag = cached
+        if selected is not None:
+            payload = project(payload, selected)
+            etag = _projected_etag(etag, selected)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return FastJSONResponse(payload, headers={"ETag": etag})
+    
+    if selected is not None and BOT_USER_APPLICATION_FIELDS.isdisjoint(selected):
+        # User columns only: version and values come from one query
+        version = await _current_bot_user_version(db, telegram_id, selected)
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        etag = _projected_etag(version[0], selected)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return FastJSONResponse(dict(zip(selected, version[1])), headers={"ETag": etag})
+    
+    if request.headers.get("if-none-match"):
+        version = await _current_bot_user_version(db, telegram_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        etag = version[0]
+        if selected is not None:
+            etag = _projected_etag(etag, selected)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    # Taken before the query: a write-through committed meanwhile wins
+    read_at = bot_user_cache.clock()
+    user = await _load_bot_user(db, telegram_id)
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    payload = serialize_bot_user(user)
+    etag = bot_user_etag(user)
+    bot_user_cache.put(telegram_id, payload, etag, read_at=read_at)
+    
+    if selected is not None:
+        payload = project(payload, selected)
+        etag = _projected_etag(etag, selected)
+    return FastJSONResponse(payload, headers={"ETag": etag})
+
+
+@router.get("/cache/stats")
+async def bot_user_cache_stats(_: bool = Depends(verify_bot_token)):
+    """Bot user cache size and hit ratio"""
+    return bot_user_cache.stats()
+
+
 @router.get("/health")
 async def bot_health_check(_: bool = Depends(verify_bot_token)):
     """Health check endpoint for bot service"""
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from ..services import calculator
+from .responses import FastJSONResponse
+
+router = APIRouter(tags=["calculator"])
+
+
+@router.get("/loan")
+async def calculate_loan(
+    loan_amount: float = Query(..., gt=0, le=1e12),
+    loan_term: int = Query(..., gt=0, le=120),
+    monthly_income: Optional[float] = Query(None, ge=0, le=1e12)
+):
+    """
+    Калькулятор займа: ежемесячный платеж, график погашения и
+    максимальная доступная сумма по всем срокам для указанного дохода
+    """
+    return FastJSONResponse(calculator.calculate(loan_amount, loan_term, monthly_income))
@@ -0,0 +1,37 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag derived from version parts (ids, timestamps, counts)"""
+    raw = "|".join(
+        part.isoformat() if hasattr(part, "isoformat") else str(part)
+        for part in parts
+    )
+    return 'W/"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against etag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current validator"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,29 @@
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Parse a fields=a,b,c query parameter.
+
+    Returns None when the parameter is absent (full representation), or the
+    requested names in allowed order without duplicates. Unknown names are
+    rejected with 400 so typos do not silently return empty objects.
+    """
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+
+    return [name for name in allowed if name in requested]
+
+
+def project(payload: dict, fields: List[str]) -> dict:
+    """Keep only the selected keys of a payload"""
+    return {name: payload[name] for name in fields}
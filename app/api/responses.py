@@ -0,0 +1,32 @@
+from typing import Any, Optional
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+# Serializer for plain dicts/lists: pydantic-core encodes datetimes, enums
+# and nested models natively, without a jsonable_encoder pass
+_any_adapter = TypeAdapter(Any)
+
+
+def dump_json(content: Any, exclude: Optional[dict] = None) -> bytes:
+    """Serialize a model or plain payload to JSON bytes using the
+    precompiled pydantic-core serializers"""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, exclude=exclude)
+    return _any_adapter.dump_json(content, exclude=exclude)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by pydantic-core instead of json.dumps.
+
+    Handlers that return this response directly also skip FastAPI's
+    response_model re-validation and jsonable_encoder pass; response_model
+    on the route then only documents the shape in OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dump_json(content)
@@ -0,0 +1,112 @@
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..models.schemas import (
+    ScoreRequest, ScoreResponse, ScoreBatchRequest, ScoreBatchResponse, ShadowConfigRequest
+)
+from ..services.model_artifacts import model_registry, ModelArtifactError
+from ..services.scoring import DECISIONS
+from ..services.scoring_pipeline import scoring_pipeline
+from ..services.shadow_scoring import shadow_scorer, resolve_artifact_path
+from .admin import verify_admin_token
+from .responses import FastJSONResponse
+
+router = APIRouter(tags=["scoring"])
+
+
+def _finite_or_none(values: np.ndarray) -> list:
+    """JSON has no Infinity/NaN: non-finite values become null"""
+    column = values.astype(object)
+    column[~np.isfinite(values)] = None
+    return column.tolist()
+
+
+def _finite_float(value) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+@router.post("/score", response_model=ScoreResponse)
+async def score_application(
+    request: ScoreRequest,
+    _: bool = Depends(verify_admin_token)
+):
+    """Score a single application"""
+    model = model_registry.model
+    result = model.score([request.loan_amount], [request.loan_term], [request.monthly_income])
+    return ScoreResponse(
+        model_version=model.version,
+        score=float(result["score"][0]),
+        decision=str(DECISIONS[result["decision"][0]]),
+        monthly_payment=_finite_float(result["monthly_payment"][0]),
+        debt_to_income=_finite_float(result["debt_to_income"][0]),
+        term_bucket=int(result["term_bucket"][0])
+    )
+
+
+@router.post("/score/batch", response_model=ScoreBatchResponse)
+async def score_applications_batch(
+    request: ScoreBatchRequest,
+    _: bool = Depends(verify_admin_token)
+):
+    """Score a columnar batch of applications in one vectorized pass"""
+    # Column lengths and bounds are checked by ScoreBatchRequest
+    model = model_registry.model
+    result = model.score(request.loan_amount, request.loan_term, request.monthly_income)
+
+    # Columns are converted with tolist() in C; the response is returned
+    # directly so FastAPI does not re-validate 100k-element lists.
+    # No-income rows have an infinite debt_to_income and get null
+    return FastJSONResponse({
+        "model_version": model.version,
+        "count": len(request.loan_amount),
+        "score": _finite_or_none(result["score"]),
+        "decision": DECISIONS[result["decision"]].tolist(),
+        "monthly_payment": _finite_or_none(result["monthly_payment"]),
+        "debt_to_income": _finite_or_none(result["debt_to_income"])
+    })
+
+
+@router.get("/pipeline")
+async def scoring_pipeline_stats(_: bool = Depends(verify_admin_token)):
+    """Background scoring pipeline: queue depth, counters and batch latency"""
+    return scoring_pipeline.stats()
+
+
+@router.get("/models")
+async def scoring_models(_: bool = Depends(verify_admin_token)):
+    """Active scoring model version and the artifacts available"""
+    return model_registry.stats()
+
+
+@router.post("/models/reload")
+async def reload_scoring_model(_: bool = Depends(verify_admin_token)):
+    """Re-read CURRENT now instead of waiting for the next check"""
+    if not model_registry.model_dir:
+        raise HTTPException(status_code=400, detail="SCORING_MODEL_DIR is not configured")
+    model_registry.reload(force=True)
+    if model_registry.last_error:
+        raise HTTPException(status_code=500, detail=model_registry.last_error)
+    return model_registry.stats()
+
+
+@router.get("/shadow")
+async def shadow_scoring_summary(_: bool = Depends(verify_admin_token)):
+    """Candidate vs production: score divergence, decision agreement, latency"""
+    return shadow_scorer.summary()
+
+
+@router.put("/shadow")
+async def configure_shadow_scoring(
+    request: ShadowConfigRequest,
+    _: bool = Depends(verify_admin_token)
+):
+    """Set or clear the candidate model; resets the comparison log"""
+    path = resolve_artifact_path(request.version) if request.version else None
+    try:
+        shadow_scorer.set_candidate(path, request.sample_rate)
+    except ModelArtifactError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return shadow_scorer.summary()
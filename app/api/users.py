@@ -2,22 +2,52 @@ import jwt
 from jwt.exceptions import PyJWTError, ExpiredSignatureError
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from typing import List, Optional, Tuple
 
 from app.database import get_db
-from app.models.user import User, AuthSession
+from app.models.user import User, AuthSession, UserAgent
 from app.models.schemas import User as UserSchema
 from app.api.auth import JWT_SECRET, JWT_ALGORITHM
+from app.api.responses import FastJSONResponse
+from app.api.conditional import make_etag, etag_matches, not_modified
+from app.api.projection import parse_fields
+from app.services.query_budget import query_budget
+from app.services.tracing import traced
+from app.services.user_agent import DeviceInfo
 
 router = APIRouter()
 
 
-async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
+# Поля, доступные в fields= (колонки таблиц)
+USER_FIELDS = (
+    "id", "telegram_id", "phone_number", "username",
+    "first_name", "last_name", "created_at", "updated_at"
+)
+SESSION_FIELDS = ("id", "created_at", "expires_at", "ip_address", "user_agent", "device_info")
+# user_agent и device_info берутся из словаря user_agents; device_info
+# собирается из browser/os/device тем же DeviceInfo.to_json(), что и при входе
+SESSION_COLUMNS = {
+    "id": AuthSession.id,
+    "created_at": AuthSession.created_at,
+    "expires_at": AuthSession.expires_at,
+    "ip_address": AuthSession.ip_address,
+    "user_agent": UserAgent.user_agent,
+    "device_info": UserAgent.browser,
+}
+
+
+def session_device_info(browser: Optional[str], os: Optional[str], device: Optional[str]) -> Optional[str]:
+    """device_info сессии; null, если у сессии нет User-Agent"""
+    if browser is None:
+        return None
+    return DeviceInfo(browser, os, device).to_json()
+
+
+def get_bearer_claims(request: Request) -> Tuple[str, int]:
     """
-    Dependency для получения текущего пользователя из JWT токена
+    JWT из заголовка Authorization: (токен, user_id)
     """
-    
-    # Получаем JWT токен из заголовков
     auth_header = request.headers.get("authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Токен не предоставлен")
@@ -25,86 +55,207 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
     jwt_token = auth_header.split(" ")[1]
     
     try:
-        # Декодируем JWT
         payload = jwt.decode(jwt_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Неверный токен")
-        
-        # Проверяем активную сессию
-        session_result = await db.execute(
-            select(AuthSession).where(
-                AuthSession.token == jwt_token,
-                AuthSession.user_id == user_id,
-                AuthSession.is_active == True
-            )
-        )
-        session = session_result.scalar_one_or_none()
-        
-        if not session:
-            raise HTTPException(status_code=401, detail="Сессия не активна")
-        
-        # Получаем пользователя
-        user_result = await db.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="Пользователь не найден")
-        
-        return user
-        
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Токен истек")
     except PyJWTError:
         raise HTTPException(status_code=401, detail="Неверный токен")
+    
+    user_id = payload.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Неверный токен")
+    
+    return jwt_token, user_id
+
+
+def active_session_filter(jwt_token: str, user_id: int):
+    """Условие активной сессии для токена"""
+    return (
+        AuthSession.token == jwt_token,
+        AuthSession.user_id == user_id,
+        AuthSession.is_active == True
+    )
 
-@router.get("/me", response_model=UserSchema)
+
+@traced()
+async def get_current_user_id(request: Request, db: AsyncSession = Depends(get_db)) -> int:
+    """
+    Dependency: проверка JWT токена и активной сессии без загрузки пользователя
+    """
+    jwt_token, user_id = get_bearer_claims(request)
+    
+    # Проверяем активную сессию (только id, без user_agent/device_info)
+    session_result = await db.execute(
+        select(AuthSession.id).where(*active_session_filter(jwt_token, user_id))
+    )
+    if not session_result.scalar_one_or_none():
+        raise HTTPException(status_code=401, detail="Сессия не активна")
+    
+    return user_id
+
+
+@traced()
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
+    """
+    Dependency для получения текущего пользователя из JWT токена
+    Проверка сессии и загрузка пользователя - один запрос
+    """
+    jwt_token, user_id = get_bearer_claims(request)
+    
+    result = await db.execute(
+        select(User)
+        .join(AuthSession, AuthSession.user_id == User.id)
+        .where(*active_session_filter(jwt_token, user_id))
+    )
+    user = result.scalars().first()
+    
+    if not user:
+        raise HTTPException(status_code=401, detail="Сессия не активна")
+    
+    return user
+
+
+async def load_user(db: AsyncSession, user_id: int) -> User:
+    """Загрузка пользователя по id (сессия уже проверена)"""
+    user_result = await db.execute(select(User).where(User.id == user_id))
+    user = user_result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    
+    return user
+
+def user_version(user: User):
+    """Версия профиля пользователя для ETag"""
+    return user.updated_at or user.created_at
+
+def sessions_etag(
+    user_id: int,
+    version,
+    session_count: int,
+    last_session_id,
+    fields: Optional[List[str]]
+) -> str:
+    """ETag списка активных сессий: новая сессия меняет max(id), выход - count"""
+    return make_etag(
+        "sessions", user_id, version, session_count, last_session_id,
+        ",".join(fields) if fields is not None else "*"
+    )
+
+@router.get("/me", response_model=UserSchema, dependencies=[Depends(query_budget(2))])
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    fields: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получение информации о текущем пользователе
+    fields=id,telegram_id,... выбирает только нужные колонки
+    Поддерживает If-None-Match (ответ 304 без сериализации)
     """
-    return current_user
+    selected = parse_fields(fields, USER_FIELDS)
+    
+    if selected is None:
+        current_user = await load_user(db, user_id)
+        etag = make_etag("user", current_user.id, user_version(current_user))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        return FastJSONResponse(
+            UserSchema.model_validate(current_user),
+            headers={"ETag": etag}
+        )
+    
+    # Выбираем только запрошенные колонки (+ версия для ETag)
+    result = await db.execute(
+        select(
+            func.coalesce(User.updated_at, User.created_at),
+            *[getattr(User, name) for name in selected]
+        ).where(User.id == user_id)
+    )
+    row = result.one_or_none()
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    
+    etag = make_etag("user", user_id, row[0], ",".join(selected))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return FastJSONResponse(dict(zip(selected, row[1:])), headers={"ETag": etag})
 
-@router.get("/me/sessions")
+@router.get("/me/sessions", dependencies=[Depends(query_budget(4))])
 async def get_user_sessions(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    fields: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Получение всех активных сессий пользователя
+    fields=id,expires_at,... выбирает колонки сессий; "user" добавляет
+    данные пользователя (без fields возвращается всё)
+    Поддерживает If-None-Match: версия списка сессий проверяется
+    агрегатным запросом до загрузки строк
     """
-    
-    result = await db.execute(
-        select(AuthSession).where(
-            AuthSession.user_id == current_user.id,
-            AuthSession.is_active == True
-        ).order_by(AuthSession.created_at.desc())
+    selected = parse_fields(fields, SESSION_FIELDS + ("user",))
+    include_user = selected is None or "user" in selected
+    session_fields = (
+        list(SESSION_FIELDS) if selected is None
+        else [name for name in selected if name != "user"]
     )
-    sessions = result.scalars().all()
+    
+    current_user = await load_user(db, user_id) if include_user else None
+    version = user_version(current_user) if current_user else None
+    
+    if request.headers.get("if-none-match"):
+        version_result = await db.execute(
+            select(func.count(AuthSession.id), func.max(AuthSession.id)).where(
+                AuthSession.user_id == user_id,
+                AuthSession.is_active == True
+            )
+        )
+        etag = sessions_etag(user_id, version, *version_result.one(), selected)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
+    # Загружаем только нужные колонки; id нужен для ETag. Для device_info
+    # на его месте browser, а os и device идут последними
+    with_device_info = "device_info" in session_fields
+    query = select(
+        AuthSession.id,
+        *[SESSION_COLUMNS[name] for name in session_fields],
+        *((UserAgent.os, UserAgent.device) if with_device_info else ())
+    ).where(
+        AuthSession.user_id == user_id,
+        AuthSession.is_active == True
+    ).order_by(AuthSession.created_at.desc())
+    if "user_agent" in session_fields or with_device_info:
+        query = query.outerjoin(UserAgent, AuthSession.user_agent_id == UserAgent.id)
+    result = await db.execute(query)
+    rows = result.all()
     
     # Формируем ответ с информацией о сессиях
-    sessions_data = []
-    for session in sessions:
-        session_info = {
-            "id": session.id,
-            "created_at": session.created_at,
-            "expires_at": session.expires_at,
-            "ip_address": session.ip_address,
-            "user_agent": session.user_agent,
-            "device_info": session.device_info
-        }
-        sessions_data.append(session_info)
+    sessions_data = [dict(zip(session_fields, row[1:])) for row in rows]
+    if with_device_info:
+        for session, row in zip(sessions_data, rows):
+            session["device_info"] = session_device_info(session["device_info"], row[-2], row[-1])
+    
+    etag = sessions_etag(
+        user_id, version, len(rows), max((row[0] for row in rows), default=None), selected
+    )
     
-    return {
-        "user": current_user,
+    response = {
         "sessions": sessions_data,
         "total_sessions": len(sessions_data)
     }
+    if current_user is not None:
+        response = {"user": UserSchema.model_validate(current_user), **response}
+    
+    return FastJSONResponse(response, headers={"ETag": etag})
 
-@router.get("/me/device-info")
+@router.get("/me/device-info", dependencies=[Depends(query_budget(1))])
 async def get_device_info(
     request: Request,
     current_user: User = Depends(get_current_user)
@@ -118,8 +269,8 @@ async def get_device_info(
     user_agent = request.headers.get("user-agent", "")
     device_info = extract_device_info(user_agent)
     
-    return {
-        "user": current_user,
+    return FastJSONResponse({
+        "user": UserSchema.model_validate(current_user),
         "current_session": {
             "ip_address": get_client_ip(request),
             "device_info": device_info,
@@ -130,4 +281,4 @@ async def get_device_info(
                 "connection": request.headers.get("connection", ""),
             }
         }
-    } 
\ No newline at end of file
+    }) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
@@ -6,9 +6,25 @@ from alembic.config import Config
 from alembic import command
 from sqlalchemy import create_engine
 import json
+import asyncio
 
-from app.api import auth, users, bot
-from app.database import engine, Base
+from app.api import auth, users, bot, admin, scoring, calculator
+from app.api.responses import FastJSONResponse
+from app.database import engine, Base, async_session
+from app.services.scoring_pipeline import scoring_pipeline, SCORING_PIPELINE_ENABLED
+from app.services.shadow_scoring import shadow_scorer, resolve_artifact_path, SCORING_SHADOW_MODEL
+from app.services.velocity import velocity_index
+from app.services.metrics import MetricsMiddleware, metrics_registry, instrument_engine
+from app.services.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
+from app.services.memory import store_registry
+from app.services.slow_queries import slow_query_log
+from app.services.tracing import TracingMiddleware, trace_exporter, trace_statement, trace_pool
+from app.services.query_budget import QueryBudgetMiddleware, track_statements, QUERY_BUDGET_MODE
+from app.services.auth_service import auth_token_service
+from app.services.bot_user_cache import bot_user_cache
+from app.services.user_agent import user_agent_dictionary
+from app.services.idempotency_service import bot_auth_idempotency
+from app.services.rate_limiter import auth_rate_limiter, bot_rate_limiter
 # from app.bot.bot import telegram_bot
 
 # Загружаем переменные окружения
@@ -17,7 +33,8 @@ load_dotenv()
 app = FastAPI(
     title="KreditScore4 API",
     description="API для авторизации через Telegram Bot",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Настройка CORS
@@ -46,14 +63,102 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Бюджет SQL-запросов на маршрут (dev/тесты). Внутри MetricsMiddleware,
+# которая создает счетчики запроса
+if QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+    track_statements(engine.sync_engine)
+
+# Трассировка: trace id из/в traceparent, спаны зависимостей, соединений из пула и SQL
+app.add_middleware(TracingMiddleware, exporter=trace_exporter)
+
+# Метрики: задержка по маршрутам, коды ответов, время в БД.
+# Добавляется последним, чтобы быть внешним слоем и учитывать CORS
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+instrument_engine(engine.sync_engine, observers=[slow_query_log.observe, trace_statement])
+trace_pool(engine.sync_engine)
+
+metrics_registry.register_gauge(
+    "auth_token_service_entries",
+    "Entries in the in-memory auth token stores",
+    lambda: [
+        ({"store": "auth_tokens"}, len(auth_token_service.auth_tokens)),
+        ({"store": "loan_data"}, len(auth_token_service.loan_data_storage)),
+        ({"store": "token_user_mapping"}, len(auth_token_service.token_user_mapping)),
+    ]
+)
+metrics_registry.register_gauge(
+    "db_pool_connections",
+    "Database connection pool state",
+    lambda: [
+        ({"state": "size"}, engine.pool.size()),
+        ({"state": "checked_out"}, engine.pool.checkedout()),
+        ({"state": "checked_in"}, engine.pool.checkedin()),
+        ({"state": "overflow"}, max(engine.pool.overflow(), 0)),
+    ]
+)
+metrics_registry.register_gauge(
+    "bot_user_cache_entries",
+    "Cached bot user payloads",
+    lambda: [({}, len(bot_user_cache.entries))]
+)
+metrics_registry.register_gauge(
+    "scoring_queue_depth",
+    "Applications waiting for background scoring",
+    lambda: [({}, scoring_pipeline.queue.qsize())]
+)
+metrics_registry.register_histogram(
+    "event_loop_lag_seconds",
+    "Event loop scheduling delay",
+    loop_monitor.histogram
+)
+metrics_registry.register_gauge(
+    "event_loop_lag_recent_seconds",
+    "Event loop lag percentiles over the recent window",
+    lambda: [
+        ({"quantile": quantile}, value)
+        for quantile, value in zip(("0.5", "0.95", "0.99"), loop_monitor.percentiles().values())
+        if value is not None
+    ]
+)
+metrics_registry.register_gauge(
+    "event_loop_stalls",
+    "Times the event loop was blocked beyond the threshold",
+    lambda: [({}, loop_monitor.stall_count)]
+)
+
+# Хранилища в памяти процесса для GET /api/admin/memory
+store_registry.register("auth_tokens", lambda: auth_token_service.auth_tokens)
+store_registry.register("loan_data", lambda: auth_token_service.loan_data_storage)
+store_registry.register("token_user_mapping", lambda: auth_token_service.token_user_mapping)
+store_registry.register("bot_user_cache", lambda: bot_user_cache.entries)
+store_registry.register("bot_user_cache_index", lambda: bot_user_cache.telegram_id_by_user)
+store_registry.register("bot_user_cache_stamps", lambda: bot_user_cache.stamps)
+store_registry.register("user_agent_ids", lambda: user_agent_dictionary.ids)
+store_registry.register("bot_auth_idempotency", lambda: bot_auth_idempotency.completed)
+store_registry.register("auth_rate_limiter", lambda: auth_rate_limiter.buckets)
+store_registry.register("bot_rate_limiter", lambda: bot_rate_limiter.buckets)
+store_registry.register("velocity_index", lambda: velocity_index.events)
+store_registry.register("slow_query_fingerprints", lambda: slow_query_log.current)
+store_registry.register("slow_query_fingerprints_previous", lambda: slow_query_log.previous)
+store_registry.register("metrics_routes", lambda: metrics_registry.routes)
+store_registry.register("loop_lag_samples", lambda: loop_monitor.recent)
+
 # Подключение роутеров
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(bot.router, prefix="/api/bot", tags=["bot"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(scoring.router, prefix="/api/scoring", tags=["scoring"])
+app.include_router(calculator.router, prefix="/api/calculator", tags=["calculator"])
 
 @app.on_event("startup")
 async def startup_event():
     """Применение миграций и создание таблиц при запуске"""
+    # Задержка event loop: запускаем первым, чтобы видеть и остальной старт
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    
     try:
         # Применяем Alembic миграции
         print("🔄 Применяем миграции...")
@@ -65,7 +170,8 @@ async def startup_event():
             sync_url = database_url.replace("postgresql+asyncpg://", "postgresql://")
             alembic_cfg.set_main_option("sqlalchemy.url", sync_url)
         
-        command.upgrade(alembic_cfg, "head")
+        # Alembic синхронный (psycopg2) - выполняем в потоке, не блокируя event loop
+        await asyncio.to_thread(command.upgrade, alembic_cfg, "head")
         print("✅ Миграции применены успешно!")
         
         # Создаем таблицы напрямую через SQLAlchemy (если их еще нет)
@@ -83,6 +189,27 @@ async def startup_event():
             await conn.run_sync(Base.metadata.create_all)
         print("✅ Таблицы созданы через create_all (fallback)")
     
+    # Восстанавливаем velocity-индекс из базы за последнее окно
+    try:
+        async with async_session() as db:
+            events = await velocity_index.rebuild(db)
+        print(f"✅ Velocity-индекс восстановлен: {events} событий")
+    except Exception as e:
+        print(f"⚠️ Ошибка при восстановлении velocity-индекса: {e}")
+    
+    # Фоновый скоринг новых заявок
+    if SCORING_PIPELINE_ENABLED:
+        await scoring_pipeline.start()
+        print("✅ Скоринг заявок запущен")
+        
+        # Теневой скоринг модели-кандидата
+        if SCORING_SHADOW_MODEL:
+            try:
+                shadow_scorer.set_candidate(resolve_artifact_path(SCORING_SHADOW_MODEL))
+                print(f"✅ Теневой скоринг: {shadow_scorer.candidate_version}")
+            except Exception as e:
+                print(f"⚠️ Ошибка при загрузке модели-кандидата: {e}")
+    
     # OLD: Настройка Telegram Bot webhook (отключено - используется отдельный bot service)
     # try:
     #     print("🤖 Настраиваем Telegram Bot webhook...")
@@ -112,6 +239,11 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Корректное завершение работы бота"""
+    await scoring_pipeline.stop()
+    await shadow_scorer.stop()
+    trace_exporter.close()
+    await loop_monitor.stop()
+    
     # OLD: Останавливаем telegram бота (отключено)
     # try:
     #     print("🤖 Останавливаем Telegram Bot...")
@@ -119,7 +251,6 @@ async def shutdown_event():
     #     print("✅ Telegram Bot остановлен")
     # except Exception as e:
     #     print(f"⚠️ Ошибка при остановке Telegram Bot: {e}")
-    pass
 
 @app.get("/")
 async def root():
@@ -129,6 +260,14 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(admin.verify_admin_token)])
+async def metrics():
+    """Метрики в формате Prometheus (с X-Admin-Token, как /api/admin/*)"""
+    return Response(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # OLD: Webhook endpoint (отключен - обслуживается bot service)
 # @app.post("/webhook")
 # async def telegram_webhook(request: Request):
@@ -1,5 +1,5 @@
-from .user import User, AuthSession
-from .application import LoanApplication, ApplicationStatus
+from .user import User, AuthSession, UserAgent
+from .application import LoanApplication, ApplicationStatus, PortfolioStat
 from .schemas import (
     UserBase, UserCreate, UserUpdate, User as UserSchema,
     AuthSessionBase, AuthSessionCreate, AuthSession as AuthSessionSchema,
@@ -7,7 +7,8 @@ from .schemas import (
 )
 
 __all__ = [
-    "User", "AuthSession",
+    "User", "AuthSession", "UserAgent",
+    "LoanApplication", "ApplicationStatus", "PortfolioStat",
     "UserBase", "UserCreate", "UserUpdate", "UserSchema",
     "AuthSessionBase", "AuthSessionCreate", "AuthSessionSchema",
     "AuthTokenRequest", "AuthTokenResponse", "VerifyTokenResponse"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, BigInteger, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, ForeignKey, BigInteger, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -38,5 +38,31 @@ class LoanApplication(Base):
     rejection_reason = Column(String(500), nullable=True)
     notes = Column(String(1000), nullable=True)
     
+    # Automatic scoring, filled by the background scoring pipeline
+    score = Column(Integer, nullable=True)
+    score_model_version = Column(String(50), nullable=True)
+    scored_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Relationship
-    user = relationship("User", back_populates="applications") 
\ No newline at end of file
+    user = relationship("User", back_populates="applications")
+    
+    __table_args__ = (
+        # Lets the scoring pipeline find unscored applications without a scan
+        Index("ix_loan_applications_unscored", "id", postgresql_where=score.is_(None)),
+    )
+
+
+class PortfolioStat(Base):
+    """Counts and loan_amount sums per (day, status, purpose).
+
+    Maintained incrementally on application creation and status changes;
+    day is the UTC date of the application's created_at.
+    """
+    __tablename__ = "portfolio_stats"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(ApplicationStatus), primary_key=True)
+    loan_purpose = Column(String(100), primary_key=True)
+    
+    application_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, confloat, conint, conlist, model_validator
 from datetime import datetime
 from typing import Optional, List
 
+from .application import ApplicationStatus
+
 class UserBase(BaseModel):
     telegram_id: int
     phone_number: Optional[str] = None
@@ -109,4 +111,69 @@ class BotUserResponse(BaseModel):
     loan_purpose: Optional[str] = None
     monthly_income: Optional[float] = None
     created_at: datetime
-    updated_at: Optional[datetime] = None 
\ No newline at end of file
+    updated_at: Optional[datetime] = None 
+
+# Admin API schemas
+class BulkTransitionRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=10000)
+    from_status: ApplicationStatus  # ожидаемый текущий статус (optimistic concurrency)
+    to_status: ApplicationStatus
+    rejection_reason: Optional[str] = Field(None, max_length=500)
+
+class TransitionOutcome(BaseModel):
+    id: int
+    outcome: str  # updated | not_found | conflict
+    status: Optional[ApplicationStatus] = None
+
+class BulkTransitionResponse(BaseModel):
+    updated: int
+    results: List[TransitionOutcome]
+
+# Scoring API schemas
+# Границы входных данных скоринга (одиночный и пакетный запрос)
+LoanAmount = confloat(gt=0, le=1e12, allow_inf_nan=False)
+LoanTerm = conint(gt=0, le=120)  # в месяцах
+MonthlyIncome = confloat(ge=0, le=1e12, allow_inf_nan=False)
+MAX_SCORE_BATCH = 100000
+
+class ScoreRequest(BaseModel):
+    loan_amount: LoanAmount
+    loan_term: LoanTerm
+    monthly_income: MonthlyIncome
+
+class ScoreResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    model_version: str
+    score: float
+    decision: str
+    monthly_payment: Optional[float] = None
+    debt_to_income: Optional[float] = None
+    term_bucket: int
+
+class ScoreBatchRequest(BaseModel):
+    """Columnar batch: the i-th application is (loan_amount[i], loan_term[i], monthly_income[i])"""
+    loan_amount: conlist(LoanAmount, min_length=1, max_length=MAX_SCORE_BATCH)
+    loan_term: conlist(LoanTerm, min_length=1, max_length=MAX_SCORE_BATCH)
+    monthly_income: conlist(MonthlyIncome, min_length=1, max_length=MAX_SCORE_BATCH)
+    
+    @model_validator(mode="after")
+    def check_equal_length(self):
+        if not len(self.loan_amount) == len(self.loan_term) == len(self.monthly_income):
+            raise ValueError("Batch columns must have equal length")
+        return self
+
+class ScoreBatchResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    model_version: str
+    count: int
+    score: List[Optional[float]]
+    decision: List[str]
+    monthly_payment: List[Optional[float]]
+    debt_to_income: List[Optional[float]]
+
+class ShadowConfigRequest(BaseModel):
+    """Candidate version (name in SCORING_MODEL_DIR or artifact path); null disables shadow mode"""
+    version: Optional[str] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, BigInteger, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,6 +10,8 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     telegram_id = Column(BigInteger, unique=True, index=True, nullable=False)
     phone_number = Column(String(20), nullable=True)
+    # phone_number in +<digits> form, see app.services.phone.normalize_phone
+    phone_normalized = Column(String(20), index=True, nullable=True)
     username = Column(String(100), nullable=True)
     first_name = Column(String(100), nullable=True)
     last_name = Column(String(100), nullable=True)
@@ -21,14 +23,29 @@ class User(Base):
     sessions = relationship("AuthSession", back_populates="user")
     applications = relationship("LoanApplication", back_populates="user", order_by="desc(LoanApplication.created_at)")
 
+class UserAgent(Base):
+    """Словарь различных User-Agent: разобранные поля хранятся один раз"""
+    __tablename__ = "user_agents"
+    
+    id = Column(Integer, primary_key=True)
+    # blake2b (16 байт) от исходной строки
+    ua_hash = Column(LargeBinary(16), unique=True, nullable=False)
+    user_agent = Column(Text, nullable=False)
+    browser = Column(String(32), nullable=False)
+    os = Column(String(32), nullable=False)
+    device = Column(String(16), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class AuthSession(Base):
     __tablename__ = "auth_sessions"
+    # id и created_at возвращаются из INSERT ... RETURNING, без refresh
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     token = Column(String(255), unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    user_agent = Column(Text, nullable=True)
-    device_info = Column(Text, nullable=True)
+    # User-Agent хранится один раз в user_agents, см. app.services.user_agent
+    user_agent_id = Column(Integer, ForeignKey("user_agents.id"), nullable=True)
     ip_address = Column(String(45), nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
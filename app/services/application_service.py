@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application import ApplicationStatus, LoanApplication
+from app.models.schemas import TransitionOutcome
+from app.services import portfolio_stats
+from app.services.bot_user_cache import bot_user_cache
+
+ALLOWED_TRANSITIONS = {
+    ApplicationStatus.PENDING: {
+        ApplicationStatus.APPROVED,
+        ApplicationStatus.REJECTED,
+        ApplicationStatus.CANCELLED,
+    },
+    ApplicationStatus.APPROVED: {
+        ApplicationStatus.COMPLETED,
+        ApplicationStatus.CANCELLED,
+    },
+}
+
+
+class InvalidTransitionError(Exception):
+    """Raised for a status change that the lifecycle does not allow"""
+
+
+def validate_transition(from_status: ApplicationStatus, to_status: ApplicationStatus):
+    """Check a status change against ALLOWED_TRANSITIONS"""
+    if to_status not in ALLOWED_TRANSITIONS.get(from_status, ()):
+        raise InvalidTransitionError(
+            f"Transition {from_status.value} -> {to_status.value} is not allowed"
+        )
+
+
+def _ids_param(ids: Sequence[int]):
+    # One array parameter instead of one placeholder per id
+    return any_(bindparam("ids", list(ids), type_=ARRAY(Integer)))
+
+
+async def bulk_transition(
+    db: AsyncSession,
+    ids: Sequence[int],
+    from_status: ApplicationStatus,
+    to_status: ApplicationStatus,
+    rejection_reason: Optional[str] = None
+) -> List[TransitionOutcome]:
+    """Move applications from one status to another with a single UPDATE.
+
+    The status predicate is the optimistic concurrency check: rows that
+    changed status since the caller read them are reported as conflicts
+    instead of being overwritten. Portfolio stats are adjusted in the same
+    transaction; cached bot user payloads are dropped after commit.
+    """
+    validate_transition(from_status, to_status)
+    ids = list(dict.fromkeys(ids))
+
+    values = {"status": to_status, "updated_at": func.now()}
+    if to_status == ApplicationStatus.APPROVED:
+        values["approved_at"] = func.now()
+    elif to_status == ApplicationStatus.COMPLETED:
+        values["completed_at"] = func.now()
+    elif to_status == ApplicationStatus.REJECTED:
+        values["rejection_reason"] = rejection_reason
+
+    result = await db.execute(
+        update(LoanApplication)
+        .where(LoanApplication.id == _ids_param(ids), LoanApplication.status == from_status)
+        .values(**values)
+        .returning(
+            LoanApplication.id,
+            LoanApplication.user_id,
+            LoanApplication.created_at,
+            LoanApplication.loan_purpose,
+            LoanApplication.loan_amount
+        )
+        .execution_options(synchronize_session=False)
+    )
+    updated_rows = result.all()
+
+    await portfolio_stats.apply_deltas(
+        db,
+        portfolio_stats.transition_deltas(
+            ((row.created_at, row.loan_purpose, row.loan_amount) for row in updated_rows),
+            from_status,
+            to_status
+        )
+    )
+
+    # Classify the misses: gone, or no longer in from_status
+    updated_ids = {row.id for row in updated_rows}
+    missed_ids = [application_id for application_id in ids if application_id not in updated_ids]
+    current_status: Dict[int, ApplicationStatus] = {}
+    if missed_ids:
+        missed = await db.execute(
+            select(LoanApplication.id, LoanApplication.status)
+            .where(LoanApplication.id == _ids_param(missed_ids))
+        )
+        current_status = dict(missed.all())
+
+    await db.commit()
+
+    for user_id in {row.user_id for row in updated_rows}:
+        bot_user_cache.invalidate_user(user_id)
+
+    outcomes = []
+    for application_id in ids:
+        if application_id in updated_ids:
+            outcomes.append(TransitionOutcome(id=application_id, outcome="updated", status=to_status))
+        elif application_id in current_status:
+            outcomes.append(TransitionOutcome(
+                id=application_id, outcome="conflict", status=current_status[application_id]
+            ))
+        else:
+            outcomes.append(TransitionOutcome(id=application_id, outcome="not_found"))
+    return outcomes
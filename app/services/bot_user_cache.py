@@ -0,0 +1,137 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class BotUserCache:
+    """LRU + TTL cache of bot user payloads keyed by telegram_id.
+
+    Entries are written through by the handlers that change a user or its
+    applications, so reads during an active bot conversation never reach
+    the database. Each payload is stored with its ETag so conditional
+    reads can be answered without serializing. A user_id -> telegram_id
+    index lets status changes, which only know application.user_id,
+    invalidate the right entry.
+
+    A reader that loads a user after a miss can finish after a writer
+    has committed and written through (or invalidated) the same user. So
+    every write and invalidation takes a number from a clock and stamps
+    the telegram_id and user_id it touched; the reader takes clock() before
+    its query and passes it to put() as read_at, and the put is dropped if
+    either id was stamped since. Stamps are kept for the max_size most
+    recently written ids; a reader older than the last stamp dropped is
+    refused too.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # telegram_id -> (expires_at, payload, etag)
+        self.entries: "OrderedDict[int, Tuple[float, dict, str]]" = OrderedDict()
+        self.telegram_id_by_user: Dict[int, int] = {}
+        # ("telegram_id" | "user_id", id) -> clock value of its last write
+        self.stamps: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+        self.ticks = 0
+        self.forgotten_before = 0
+        self.stale_puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clock(self) -> int:
+        """Current write clock, taken by a reader before it queries"""
+        return self.ticks
+
+    def _stamp(self, telegram_id: Optional[int] = None, user_id: Optional[int] = None):
+        self.ticks += 1
+        for key in (("telegram_id", telegram_id), ("user_id", user_id)):
+            if key[1] is None:
+                continue
+            self.stamps[key] = self.ticks
+            self.stamps.move_to_end(key)
+        while len(self.stamps) > self.max_size:
+            _, self.forgotten_before = self.stamps.popitem(last=False)
+
+    def _changed_since(self, read_at: int, telegram_id: int, user_id: int) -> bool:
+        return (
+            read_at < self.forgotten_before
+            or self.stamps.get(("telegram_id", telegram_id), 0) > read_at
+            or self.stamps.get(("user_id", user_id), 0) > read_at
+        )
+
+    def get(self, telegram_id: int) -> Optional[Tuple[dict, str]]:
+        """Get cached (payload, etag), refreshing its LRU position"""
+        entry = self.entries.get(telegram_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload, etag = entry
+        if expires_at < time.monotonic():
+            self._drop(telegram_id)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(telegram_id)
+        self.hits += 1
+        return payload, etag
+
+    def put(self, telegram_id: int, payload: dict, etag: str, read_at: Optional[int] = None) -> bool:
+        """Store payload for telegram_id, evicting the least recently used.
+
+        Writers that just committed the change pass no read_at. Readers
+        pass the clock() taken before their query; if the user was written
+        or invalidated since, the payload may predate that and is not
+        stored. Returns whether it was stored.
+        """
+        if read_at is None:
+            self._stamp(telegram_id, payload["id"])
+        elif self._changed_since(read_at, telegram_id, payload["id"]):
+            self.stale_puts += 1
+            return False
+
+        self.entries[telegram_id] = (time.monotonic() + self.ttl_seconds, payload, etag)
+        self.entries.move_to_end(telegram_id)
+        self.telegram_id_by_user[payload["id"]] = telegram_id
+
+        while len(self.entries) > self.max_size:
+            _, (_, evicted, _) = self.entries.popitem(last=False)
+            self.telegram_id_by_user.pop(evicted["id"], None)
+        return True
+
+    def _drop(self, telegram_id: int):
+        entry = self.entries.pop(telegram_id, None)
+        if entry is not None:
+            self.telegram_id_by_user.pop(entry[1]["id"], None)
+
+    def invalidate(self, telegram_id: int):
+        """Drop cached payload for telegram_id"""
+        self._stamp(telegram_id=telegram_id)
+        self._drop(telegram_id)
+
+    def invalidate_user(self, user_id: int):
+        """Drop cached payload for a user by its primary key"""
+        self._stamp(user_id=user_id)
+        telegram_id = self.telegram_id_by_user.get(user_id)
+        if telegram_id is not None:
+            self._drop(telegram_id)
+
+    def stats(self) -> dict:
+        """Cache size and hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_puts": self.stale_puts,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+# Singleton instance
+bot_user_cache = BotUserCache(
+    max_size=int(os.getenv("BOT_USER_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("BOT_USER_CACHE_TTL", "300"))
+)
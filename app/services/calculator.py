@@ -0,0 +1,132 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from app.services.model_artifacts import model_registry
+from app.services.scoring import annuity_payment
+
+# Terms offered on the frontend, in months
+LOAN_TERMS = np.array([3, 6, 9, 12, 18, 24, 36, 48, 60])
+
+CALCULATOR_CACHE_SIZE = int(os.getenv("CALCULATOR_CACHE_SIZE", "2048"))
+
+
+def amortization_schedule(amount: float, monthly_rate: float, term: int) -> dict:
+    """Full annuity schedule as columns, computed without a Python loop.
+
+    After k payments the balance of an annuity is
+        B_k = A * g^k - P * (g^k - 1) / r,  g = 1 + r
+    so every row follows from the vector of growth factors g^k.
+    """
+    payment = float(annuity_payment(amount, monthly_rate, term))
+    months = np.arange(1, term + 1)
+
+    if monthly_rate == 0:
+        balance_after = amount - payment * months
+        interest = np.zeros(term)
+    else:
+        growth = (1.0 + monthly_rate) ** months
+        balance_after = amount * growth - payment * (growth - 1.0) / monthly_rate
+        balance_before = np.concatenate(([amount], balance_after[:-1]))
+        interest = balance_before * monthly_rate
+
+    principal = payment - interest
+    # Last row absorbs floating point residue so the loan closes at 0
+    balance_after[-1] = 0.0
+
+    return {
+        "month": months.tolist(),
+        "payment": np.full(term, payment).round(2).tolist(),
+        "principal": principal.round(2).tolist(),
+        "interest": interest.round(2).tolist(),
+        "balance": balance_after.round(2).tolist(),
+    }
+
+
+def max_affordable_amounts(monthly_income: float, monthly_rate: float, max_dti: float) -> dict:
+    """Largest loan per term whose payment stays within max_dti of income"""
+    max_payment = monthly_income * max_dti
+    if monthly_rate == 0:
+        amounts = max_payment * LOAN_TERMS
+    else:
+        amounts = max_payment * (1.0 - (1.0 + monthly_rate) ** -LOAN_TERMS) / monthly_rate
+
+    return {
+        "max_monthly_payment": round(max_payment, 2),
+        "by_term": [
+            {"loan_term": int(term), "max_loan_amount": round(float(amount), 2)}
+            for term, amount in zip(LOAN_TERMS, amounts)
+        ],
+    }
+
+
+def normalize_inputs(loan_amount: float, loan_term: int, monthly_income: Optional[float]):
+    """Cache key: amounts rounded to cents, so 1e6 and 1000000.0 share an entry"""
+    return (
+        round(float(loan_amount), 2),
+        int(loan_term),
+        round(float(monthly_income), 2) if monthly_income is not None else None,
+    )
+
+
+@lru_cache(maxsize=CALCULATOR_CACHE_SIZE)
+def _calculate(
+    annual_rate: float,
+    max_dti: float,
+    loan_amount: float,
+    loan_term: int,
+    monthly_income: Optional[float]
+) -> dict:
+    monthly_rate = annual_rate / 12
+    schedule = amortization_schedule(loan_amount, monthly_rate, loan_term)
+    monthly_payment = schedule["payment"][0]
+    total_paid = float(np.sum(schedule["payment"]))
+
+    result = {
+        "loan_amount": loan_amount,
+        "loan_term": loan_term,
+        "annual_rate": annual_rate,
+        "monthly_payment": monthly_payment,
+        "total_paid": round(total_paid, 2),
+        "total_interest": round(total_paid - loan_amount, 2),
+        "schedule": schedule,
+    }
+
+    if monthly_income is not None:
+        result["monthly_income"] = monthly_income
+        result["debt_to_income"] = (
+            round(monthly_payment / monthly_income, 4) if monthly_income > 0 else None
+        )
+        result["affordability"] = max_affordable_amounts(monthly_income, monthly_rate, max_dti)
+
+    return result
+
+
+def calculate(loan_amount: float, loan_term: int, monthly_income: Optional[float] = None) -> dict:
+    """Payment, schedule and affordability for the active model's terms.
+
+    Results are memoized in a bounded LRU on the model's rate and DTI
+    limit plus the normalized inputs, so a repeated query costs a dict
+    lookup. The key holds plain numbers rather than the model, so a
+    replaced model (and its artifact mapping) is not kept alive by the
+    cache. The returned dict is shared between callers: do not mutate it.
+    """
+    model = model_registry.model
+    return _calculate(
+        model.annual_rate, model.max_dti, *normalize_inputs(loan_amount, loan_term, monthly_income)
+    )
+
+
+def cache_info() -> dict:
+    """Calculator cache statistics"""
+    info = _calculate.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": info.hits / lookups if lookups else 0.0,
+    }
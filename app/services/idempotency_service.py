@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused with a different payload"""
+
+
+class IdempotencyService:
+    """Replay cache for retried requests.
+
+    The first successful result for a key is stored and returned to every
+    repeat within the TTL. Concurrent duplicates wait for the in-flight
+    attempt instead of running the handler a second time. Failures are not
+    cached, so a waiter whose leader failed simply retries on its own.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, sweep_interval: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        # key -> (expires_at, fingerprint, result)
+        self.completed: Dict[str, Tuple[float, str, Any]] = {}
+        self.in_flight: Dict[str, asyncio.Event] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    @staticmethod
+    def fingerprint(payload: str) -> str:
+        """Short digest of the request payload bound to a key"""
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str, fingerprint: str) -> Optional[Any]:
+        """Return the stored result for key, if any"""
+        entry = self.completed.get(key)
+        if entry is None:
+            return None
+
+        expires_at, stored_fingerprint, result = entry
+        if expires_at < time.monotonic():
+            del self.completed[key]
+            return None
+
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyConflictError(
+                "Idempotency key was already used with a different payload"
+            )
+
+        return result
+
+    async def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run handler once per key and replay its result for duplicates"""
+        while True:
+            result = self.get(key, fingerprint)
+            if result is not None:
+                return result
+
+            pending = self.in_flight.get(key)
+            if pending is None:
+                break
+
+            await pending.wait()
+
+        done = asyncio.Event()
+        self.in_flight[key] = done
+        try:
+            result = await handler()
+            self.store(key, fingerprint, result)
+            return result
+        finally:
+            del self.in_flight[key]
+            done.set()
+
+    def store(self, key: str, fingerprint: str, result: Any):
+        """Remember the result for key"""
+        now = time.monotonic()
+        self.completed[key] = (now + self.ttl_seconds, fingerprint, result)
+
+        if now >= self._next_sweep:
+            self.cleanup_expired(now)
+
+    def cleanup_expired(self, now: Optional[float] = None):
+        """Remove all expired results"""
+        now = now if now is not None else time.monotonic()
+        expired_keys = [
+            key for key, (expires_at, _, _) in self.completed.items()
+            if expires_at < now
+        ]
+
+        for key in expired_keys:
+            del self.completed[key]
+
+        self._next_sweep = now + self.sweep_interval
+
+
+# Singleton instance for POST /api/bot/auth/complete. The TTL matches the
+# auth token lifetime, after which a retry can no longer succeed anyway.
+bot_auth_idempotency = IdempotencyService(ttl_seconds=600)
@@ -0,0 +1,12 @@
+from typing import Iterable
+
+import numpy as np
+
+
+def latency_percentiles(samples: Iterable[float]) -> dict:
+    """p50/p95/p99/max of recent latency samples"""
+    values = np.fromiter(samples, dtype=np.float64)
+    if not values.size:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(values.max())}
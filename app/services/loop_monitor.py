@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from app.services.latency import latency_percentiles
+from app.services.metrics import Histogram
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+# How often the monitor task wakes up, in seconds
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+# A loop that does not run the monitor for this long counts as blocked
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+# Capture the stack of the code blocking the loop (watchdog thread)
+LOOP_MONITOR_DEBUG = os.getenv("LOOP_MONITOR_DEBUG", "false").lower() == "true"
+
+# Seconds; loop lag is normally well under a millisecond
+LOOP_LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopLagMonitor:
+    """Continuous event-loop scheduling delay.
+
+    A task sleeps for interval and measures how late it wakes up: that
+    lateness is the time every ready callback waited for the loop, so it
+    is what a request would have been delayed by. Lag goes to a
+    histogram for /metrics and a recent window for percentiles.
+
+    With debug on, a watchdog thread also checks the task's heartbeat.
+    When the loop has been silent for longer than the threshold, the
+    watchdog takes the stack of the loop thread while it is still
+    blocked, which shows the call holding the loop rather than the code
+    that runs after it.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold_ms: float = 100,
+        debug: bool = False,
+        window: int = 3000,
+        max_stalls: int = 50
+    ):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.debug = debug
+        self.histogram = Histogram(LOOP_LAG_BUCKETS)
+        self.recent: deque = deque(maxlen=window)
+        self.stalls: deque = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self.max_lag = 0.0
+
+        self.task: Optional[asyncio.Task] = None
+        self.heartbeat = time.monotonic()
+        self.loop_thread_id: Optional[int] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+
+    async def start(self):
+        if self.task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.task = asyncio.create_task(self._measure())
+        if self.debug:
+            self.stopping.clear()
+            self.watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self.watchdog.start()
+
+    async def stop(self):
+        self.stopping.set()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.watchdog is not None:
+            self.watchdog.join(timeout=1)
+            self.watchdog = None
+
+    async def _measure(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.heartbeat = time.monotonic()
+            self.histogram.observe(lag)
+            self.recent.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.threshold:
+                self.stall_count += 1
+                if not self.debug:
+                    # The watchdog records stalls with their stack in debug mode
+                    self._record_stall(lag, None)
+
+    def _watch(self):
+        reported = None
+        limit = self.interval + self.threshold
+        while not self.stopping.wait(self.threshold / 4):
+            beat = self.heartbeat
+            silent = time.monotonic() - beat
+            if silent < limit or beat == reported:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else None
+            self._record_stall(silent - self.interval, stack)
+            print(f"Event loop blocked for {(silent - self.interval) * 1000:.0f} ms so far:\n{stack}")
+
+    def _record_stall(self, lag: float, stack: Optional[str]):
+        self.stalls.append({"at": datetime.utcnow(), "lag_ms": round(lag * 1000, 1), "stack": stack})
+
+    def percentiles(self) -> dict:
+        return latency_percentiles(self.recent)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.task is not None,
+            "interval_seconds": self.interval,
+            "threshold_ms": self.threshold * 1000,
+            "debug": self.debug,
+            "lag_seconds": self.percentiles(),
+            "max_lag_seconds": self.max_lag,
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=LOOP_MONITOR_INTERVAL,
+    threshold_ms=LOOP_BLOCK_THRESHOLD_MS,
+    debug=LOOP_MONITOR_DEBUG
+)
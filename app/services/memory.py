@@ -0,0 +1,210 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from itertools import islice
+from typing import Callable, List, Optional, Tuple
+
+from app.services.rate_limiter import RateLimiter
+
+# Entries measured per store; the rest of the store is extrapolated from them
+MEMORY_SIZE_SAMPLE = int(os.getenv("MEMORY_SIZE_SAMPLE", "1000"))
+# Frames kept per allocation when tracemalloc is started from the admin API
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+# Minimum seconds between heap walks (GC object count, tracemalloc snapshots)
+MEMORY_HEAP_WALK_INTERVAL = float(os.getenv("MEMORY_HEAP_WALK_INTERVAL", "60"))
+
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+# Depth at which nested objects stop being followed: entries of in-process
+# stores are small records, deeper references are usually shared objects
+_MAX_DEPTH = 4
+
+
+def _deep_size(obj, seen: set, depth: int) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth >= _MAX_DEPTH or isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+
+    depth += 1
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_size(key, seen, depth) + _deep_size(value, seen, depth)
+    elif isinstance(obj, _CONTAINERS):
+        for item in obj:
+            size += _deep_size(item, seen, depth)
+    else:
+        attrs = getattr(obj, "__dict__", None)
+        if attrs is not None:
+            size += _deep_size(attrs, seen, depth)
+        for slot in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, slot):
+                size += _deep_size(getattr(obj, slot), seen, depth)
+    return size
+
+
+def approximate_size(store, sample: int = MEMORY_SIZE_SAMPLE) -> Tuple[int, int]:
+    """(entries, approximate bytes) of a dict-like or sequence store.
+
+    Only the first sample entries are walked and the average is scaled
+    to the whole store, so a million-token dict costs the same to
+    measure as a small one. Objects shared between entries are counted
+    once per entry, so the figure is an upper bound.
+    """
+    entries = len(store)
+    size = sys.getsizeof(store)
+    if not entries:
+        return 0, size
+
+    measured = 0
+    walked = 0
+    if isinstance(store, dict):
+        for key, value in islice(store.items(), sample):
+            seen = set()
+            measured += _deep_size(key, seen, 1) + _deep_size(value, seen, 1)
+            walked += 1
+    else:
+        for item in islice(store, sample):
+            measured += _deep_size(item, set(), 1)
+            walked += 1
+    return entries, size + measured * entries // walked
+
+
+class StoreRegistry:
+    """In-process stores and caches reported by the memory endpoint.
+
+    Stores are registered by getter, like metrics gauges, so a store that
+    is replaced rather than mutated (a rotated window) is still found.
+    """
+
+    def __init__(self):
+        self.stores: List[Tuple[str, Callable[[], object]]] = []
+
+    def register(self, name: str, get_store: Callable[[], object]):
+        self.stores.append((name, get_store))
+
+    def report(self, sample: int = MEMORY_SIZE_SAMPLE) -> List[dict]:
+        report = []
+        for name, get_store in self.stores:
+            try:
+                entries, size = approximate_size(get_store(), sample)
+            except Exception as e:
+                report.append({"name": name, "error": str(e)})
+                continue
+            report.append({"name": name, "entries": entries, "approx_bytes": size})
+        return sorted(report, key=lambda store: store.get("approx_bytes", 0), reverse=True)
+
+
+def gc_object_count() -> int:
+    """Objects tracked by the garbage collector.
+
+    Builds a list of every tracked object, which takes tens of
+    milliseconds on a large heap and holds the GIL throughout: the event
+    loop stalls for that long even if this runs in another thread.
+    Callers go through heap_walk_limiter.
+    """
+    return len(gc.get_objects())
+
+
+def process_memory() -> dict:
+    """RSS from /proc (Linux) and garbage collector counters"""
+    memory = {"gc_counts": gc.get_count()}
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = statm.read().split()
+        memory["rss_bytes"] = int(pages[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        memory["rss_bytes"] = None
+    return memory
+
+
+class AllocationTracker:
+    """tracemalloc snapshots diffed against a baseline.
+
+    start() begins tracing (a few percent of CPU and memory overhead while
+    on), snapshot() records a baseline, and diff() takes a new snapshot
+    and returns the allocation sites that grew the most since then.
+    Allocations made by tracemalloc itself and by the import system are
+    filtered out.
+    """
+
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_at: Optional[float] = None
+
+    def start(self, frames: int = MEMORY_TRACE_FRAMES):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self.baseline = None
+        self.baseline_at = None
+
+    def _take(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        return tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+
+    def snapshot(self, limit: int = 20, group_by: str = "lineno") -> List[dict]:
+        """Record a new baseline and return its largest allocation sites"""
+        self.baseline = self._take()
+        self.baseline_at = time.time()
+        return [
+            {
+                "site": _format_site(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in self.baseline.statistics(group_by)[:limit]
+        ]
+
+    def diff(self, limit: int = 20, group_by: str = "lineno") -> List[dict]:
+        """Allocation sites by growth since the baseline"""
+        if self.baseline is None:
+            raise RuntimeError("No baseline snapshot taken")
+        stats = self._take().compare_to(self.baseline, group_by)
+        return [
+            {
+                "site": _format_site(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def stats(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "baseline_at": self.baseline_at,
+        }
+
+
+def _format_site(traceback: tracemalloc.Traceback) -> List[str]:
+    return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+
+
+store_registry = StoreRegistry()
+allocation_tracker = AllocationTracker()
+
+# Heap walks stall the whole process, so the admin API allows one per
+# MEMORY_HEAP_WALK_INTERVAL
+heap_walk_limiter = RateLimiter(rate=1 / MEMORY_HEAP_WALK_INTERVAL, burst=1)
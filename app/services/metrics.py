@@ -0,0 +1,235 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; shared by request and DB time histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense.
+
+    observe() is a bisect and three increments; buckets are made
+    cumulative only when rendered.
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """Per-request accumulator, reachable from engine events via a ContextVar"""
+    __slots__ = ("db_seconds", "db_statements", "budget", "statement_counts")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        # Filled in by app.services.query_budget when it is enabled
+        self.budget: Optional[int] = None
+        self.statement_counts: Optional[Dict[str, int]] = None
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class _RouteMetrics:
+    __slots__ = ("latency", "db_latency", "db_statements", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_latency = Histogram()
+        self.db_statements = 0
+        self.statuses: Dict[int, int] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _render_histogram(lines: List[str], name: str, histogram: Histogram, **labels):
+    # Label text is built once; only le varies per bucket
+    label_text = _labels(**labels) if labels else ""
+    bucket_prefix = f"{name}_bucket{label_text[:-1]},le=\"" if labels else f"{name}_bucket{{le=\""
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f"{bucket_prefix}{bound!r}\"}} {cumulative}")
+    lines.append(f"{bucket_prefix}+Inf\"}} {histogram.count}")
+    lines.append(f"{name}_sum{label_text} {histogram.sum!r}")
+    lines.append(f"{name}_count{label_text} {histogram.count}")
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text format.
+
+    Request metrics are keyed by (method, route template), never by the
+    raw path, so cardinality is bounded by the number of routes. Gauges
+    are callables sampled at scrape time, which keeps the stores they
+    describe free of any metrics bookkeeping.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self.in_flight = 0
+        self.gauges: List[Tuple[str, str, Callable[[], Iterable[Tuple[dict, float]]]]] = []
+        self.histograms: List[Tuple[str, str, Histogram]] = []
+        self.started_at = time.time()
+
+    def route(self, method: str, path: str) -> _RouteMetrics:
+        key = (method, path)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = _RouteMetrics()
+        return metrics
+
+    def register_gauge(self, name: str, help: str, sample: Callable[[], Iterable[Tuple[dict, float]]]):
+        """sample() returns (labels, value) pairs at scrape time"""
+        self.gauges.append((name, help, sample))
+
+    def register_histogram(self, name: str, help: str, histogram: Histogram):
+        """A histogram owned and observed by another component"""
+        self.histograms.append((name, help, histogram))
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        lines.append("# HELP http_requests_in_flight Requests being served")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        lines.append("# HELP http_requests_total Responses by route and status code")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, path), metrics in self.routes.items():
+            for status, count in metrics.statuses.items():
+                lines.append(f"http_requests_total{_labels(method=method, route=path, status=status)} {count}")
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, path), metrics in self.routes.items():
+            _render_histogram(lines, "http_request_duration_seconds", metrics.latency, method=method, route=path)
+
+        lines.append("# HELP http_request_db_seconds Database time per request by route")
+        lines.append("# TYPE http_request_db_seconds histogram")
+        for (method, path), metrics in self.routes.items():
+            _render_histogram(lines, "http_request_db_seconds", metrics.db_latency, method=method, route=path)
+
+        lines.append("# HELP http_request_db_statements_total SQL statements executed by route")
+        lines.append("# TYPE http_request_db_statements_total counter")
+        for (method, path), metrics in self.routes.items():
+            lines.append(f"http_request_db_statements_total{_labels(method=method, route=path)} {metrics.db_statements}")
+
+        for name, help, sample in self.gauges:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                for labels, value in sample():
+                    lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+            except Exception as e:
+                lines.append(f"# {name} unavailable: {_escape(str(e))}")
+
+        for name, help, histogram in self.histograms:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            _render_histogram(lines, name, histogram)
+
+        lines.append("# HELP process_uptime_seconds Seconds since the metrics registry was created")
+        lines.append("# TYPE process_uptime_seconds gauge")
+        lines.append(f"process_uptime_seconds {time.time() - self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and DB time per route.
+
+    Runs in the request's own task (unlike BaseHTTPMiddleware), so the
+    RequestStats set here is what the engine events see while the
+    handler queries. The route template is read from scope["route"],
+    which the router fills in during matching.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry"):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            current_request.reset(token)
+
+            route = scope.get("route")
+            metrics = registry.route(scope["method"], route.path if route is not None else "unmatched")
+            metrics.latency.observe(elapsed)
+            metrics.db_latency.observe(stats.db_seconds)
+            metrics.db_statements += stats.db_statements
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+
+
+def instrument_engine(engine: Engine, observers: Sequence[Callable[[str, float], None]] = ()):
+    """Add cursor execution time to the current request's RequestStats.
+
+    Pass the sync engine (AsyncEngine.sync_engine). Timing uses a stack in
+    connection.info, as statements on one connection never overlap.
+    observers are called with (statement, seconds) for every statement,
+    inside a request or not.
+    """
+    observers = tuple(observers)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_seconds += elapsed
+            stats.db_statements += 1
+        for observe in observers:
+            observe(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+metrics_registry = MetricsRegistry()
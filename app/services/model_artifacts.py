@@ -0,0 +1,269 @@
+import json
+import mmap
+import os
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.scoring import DEFAULT_MODEL, ScoringModel
+
+# Directory with model artifacts and a CURRENT file naming the active one
+SCORING_MODEL_DIR = os.getenv("SCORING_MODEL_DIR", "")
+# How often CURRENT is checked for a new version, in seconds
+SCORING_MODEL_CHECK_INTERVAL = float(os.getenv("SCORING_MODEL_CHECK_INTERVAL", "5"))
+
+CURRENT_POINTER = "CURRENT"
+ARTIFACT_SUFFIX = ".ksmodel"
+
+# Layout: MAGIC | header length (uint64 LE) | JSON header, space-padded to
+# 8 bytes | little-endian float64 arrays at header-relative offsets
+MAGIC = b"KSMODEL\x01"
+_PREFIX_SIZE = len(MAGIC) + 8
+
+_SCALARS = (
+    "version",
+    "annual_rate",
+    "intercept",
+    "dti_weight",
+    "loan_to_income_weight",
+    "log_income_weight",
+    "approve_threshold",
+    "reject_threshold",
+    "max_dti",
+)
+_ARRAYS = ("term_bucket_edges", "term_bucket_weights")
+
+
+class ModelArtifactError(Exception):
+    """Raised for a missing, truncated or malformed model artifact"""
+
+
+def write_artifact(model: ScoringModel, path: str):
+    """Serialize a model; the file appears atomically under its final name.
+
+    A version is immutable once written: the temp file is hard-linked into
+    place, which fails if path exists, and ModelArtifactError is raised
+    instead of replacing an artifact that workers may have loaded.
+    """
+    payload = []
+    arrays = {}
+    offset = 0
+    for name in _ARRAYS:
+        values = np.ascontiguousarray(getattr(model, name), dtype="<f8")
+        arrays[name] = {"offset": offset, "length": int(values.size)}
+        payload.append(values.tobytes())
+        offset += values.nbytes
+
+    header = {name: getattr(model, name) for name in _SCALARS}
+    header["arrays"] = arrays
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b" " * (-len(header_bytes) % 8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            f.writelines(payload)
+        os.link(tmp_path, path)
+    except FileExistsError:
+        raise ModelArtifactError(f"{path} already exists")
+    finally:
+        os.unlink(tmp_path)
+
+
+def load_artifact(path: str) -> ScoringModel:
+    """Map an artifact read-only and build a model over it without copying.
+
+    The arrays are views into the mapping, so every process that loads the
+    same file shares its pages through the OS page cache. A file that
+    fails to load has its mapping closed before the error is raised.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise ModelArtifactError(f"Cannot map {path}: {e}")
+
+    try:
+        return _model_over(path, buffer)
+    except ModelArtifactError as e:
+        # Frames of the failed load may still hold array views, which
+        # keep the mapping from closing
+        error = e
+        while error is not None:
+            traceback.clear_frames(error.__traceback__)
+            error = error.__context__
+        buffer.close()
+        raise
+
+
+def _model_over(path: str, buffer: mmap.mmap) -> ScoringModel:
+    if len(buffer) < _PREFIX_SIZE or buffer[:len(MAGIC)] != MAGIC:
+        raise ModelArtifactError(f"{path} is not a scoring model artifact")
+
+    header_size = int.from_bytes(buffer[len(MAGIC):_PREFIX_SIZE], "little")
+    payload_start = _PREFIX_SIZE + header_size
+    if payload_start > len(buffer):
+        raise ModelArtifactError(f"{path} is truncated")
+
+    try:
+        header = json.loads(buffer[_PREFIX_SIZE:payload_start])
+        params = {name: header[name] for name in _SCALARS}
+        for name in _ARRAYS:
+            spec = header["arrays"][name]
+            start = payload_start + spec["offset"]
+            if start + spec["length"] * 8 > len(buffer):
+                raise ModelArtifactError(f"{path} is truncated")
+            params[name] = np.frombuffer(buffer, dtype="<f8", count=spec["length"], offset=start)
+        return ScoringModel(**params)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ModelArtifactError(f"{path} has an invalid header: {e}")
+
+
+# Worker-side cache: path -> model. Artifacts are immutable once published,
+# so a path identifies a version; only the most recent few stay mapped.
+_loaded_models: Dict[str, ScoringModel] = {}
+_LOADED_MODELS_MAX = 2
+
+
+def _model_for(artifact_path: Optional[str]) -> ScoringModel:
+    if artifact_path is None:
+        return DEFAULT_MODEL
+    model = _loaded_models.get(artifact_path)
+    if model is None:
+        model = load_artifact(artifact_path)
+        if len(_loaded_models) >= _LOADED_MODELS_MAX:
+            _loaded_models.pop(next(iter(_loaded_models)))
+        _loaded_models[artifact_path] = model
+    return model
+
+
+def score_batch(
+    artifact_path: Optional[str],
+    loan_amount: Sequence[float],
+    loan_term: Sequence[int],
+    monthly_income: Sequence[float]
+) -> Tuple[str, List[int], List[int], float]:
+    """Model version, scores, decision codes and model seconds for one batch.
+
+    Entry point for worker processes: takes and returns plain lists so
+    the arguments pickle cheaply, and the model travels as a path that
+    each worker maps once instead of as pickled coefficients. The time
+    covers model evaluation only, not the round trip to the worker.
+    """
+    model = _model_for(artifact_path)
+    started = time.perf_counter()
+    result = model.score(loan_amount, loan_term, monthly_income)
+    elapsed = time.perf_counter() - started
+    return (
+        model.version,
+        result["score"].astype(np.int64).tolist(),
+        result["decision"].astype(np.int64).tolist(),
+        elapsed,
+    )
+
+
+class ModelRegistry:
+    """The active scoring model, hot-reloaded from SCORING_MODEL_DIR.
+
+    Publishing a version means writing a new artifact file and then
+    replacing CURRENT with its file name. Readers check CURRENT at most
+    once per check_interval and swap (path, model) as one reference, so a
+    request or batch always sees one consistent version and nothing waits
+    on a reload. Without a model directory the built-in model is used.
+    """
+
+    def __init__(self, model_dir: str = "", check_interval: float = 5):
+        self.model_dir = model_dir
+        self.check_interval = check_interval
+        self.active: Tuple[Optional[str], ScoringModel] = (None, DEFAULT_MODEL)
+        self.pointer_mtime: Optional[int] = None
+        self.next_check = 0.0
+        self.loaded_at: Optional[datetime] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def current(self) -> Tuple[Optional[str], ScoringModel]:
+        """(artifact path, model) of the active version"""
+        if self.model_dir and time.monotonic() >= self.next_check:
+            self.reload()
+        return self.active
+
+    @property
+    def model(self) -> ScoringModel:
+        return self.current()[1]
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the version named by CURRENT if it changed; True on a swap"""
+        self.next_check = time.monotonic() + self.check_interval
+        pointer = os.path.join(self.model_dir, CURRENT_POINTER)
+        try:
+            mtime = os.stat(pointer).st_mtime_ns
+            if mtime == self.pointer_mtime and not force:
+                return False
+            with open(pointer) as f:
+                name = f.read().strip()
+            path = os.path.join(self.model_dir, name)
+            if path == self.active[0] and not force:
+                self.pointer_mtime = mtime
+                return False
+            model = load_artifact(path)
+        except (OSError, ModelArtifactError) as e:
+            # Keep serving the previous version
+            if str(e) != self.last_error:
+                print(f"Scoring model reload failed: {e}")
+            self.last_error = str(e)
+            return False
+
+        self.active = (path, model)
+        self.pointer_mtime = mtime
+        self.loaded_at = datetime.utcnow()
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def publish(self, model: ScoringModel) -> str:
+        """Write an artifact for the model and make it current.
+
+        Raises ModelArtifactError if the version was already published;
+        CURRENT is left untouched then.
+        """
+        path = os.path.join(self.model_dir, f"{model.version}{ARTIFACT_SUFFIX}")
+        write_artifact(model, path)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(os.path.basename(path) + "\n")
+        os.replace(tmp_path, os.path.join(self.model_dir, CURRENT_POINTER))
+        return path
+
+    def available_versions(self) -> List[str]:
+        if not self.model_dir or not os.path.isdir(self.model_dir):
+            return []
+        return sorted(
+            name[:-len(ARTIFACT_SUFFIX)]
+            for name in os.listdir(self.model_dir)
+            if name.endswith(ARTIFACT_SUFFIX)
+        )
+
+    def stats(self) -> dict:
+        path, model = self.current()
+        return {
+            "version": model.version,
+            "artifact": path,
+            "model_dir": self.model_dir or None,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "available_versions": self.available_versions(),
+        }
+
+
+model_registry = ModelRegistry(SCORING_MODEL_DIR, SCORING_MODEL_CHECK_INTERVAL)
@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Canonical +<digits> form used for lookups and velocity checks.
+
+    "+7 (912) 345-67-89", "8 912 345 67 89" and "0079123456789" all map to
+    "+79123456789". Returns None when there are too few digits to be a
+    phone number.
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub("", phone)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    # Russian trunk prefix: 8 XXX XXX XX XX is +7 XXX XXX XX XX
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    if len(digits) < 7 or len(digits) > 15:
+        return None
+    return "+" + digits
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application import ApplicationStatus, LoanApplication, PortfolioStat
+
+# (day, status, loan_purpose) -> (count delta, amount delta)
+StatKey = Tuple[date, ApplicationStatus, str]
+StatDeltas = Dict[StatKey, Tuple[int, float]]
+
+GROUP_COLUMNS = {
+    "status": PortfolioStat.status,
+    "loan_purpose": PortfolioStat.loan_purpose,
+    "day": PortfolioStat.day,
+}
+
+
+def _upsert():
+    statement = insert(PortfolioStat)
+    return statement.on_conflict_do_update(
+        index_elements=[PortfolioStat.day, PortfolioStat.status, PortfolioStat.loan_purpose],
+        set_={
+            "application_count": PortfolioStat.application_count + statement.excluded.application_count,
+            "total_amount": PortfolioStat.total_amount + statement.excluded.total_amount,
+        }
+    )
+
+
+def utc_day(moment: datetime) -> date:
+    """Stats day for a created_at timestamp"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+async def record_created(db: AsyncSession, application: LoanApplication):
+    """Count a new application in the caller's transaction.
+
+    The day is computed by the database from now(), which is the same
+    transaction timestamp that fills created_at.
+    """
+    await db.execute(
+        _upsert().values(
+            day=cast(func.timezone("UTC", func.now()), Date),
+            status=application.status,
+            loan_purpose=application.loan_purpose,
+            application_count=1,
+            total_amount=application.loan_amount
+        )
+    )
+
+
+def transition_deltas(
+    rows: Iterable[Tuple[datetime, str, float]],
+    from_status: ApplicationStatus,
+    to_status: ApplicationStatus
+) -> StatDeltas:
+    """Deltas for applications (created_at, loan_purpose, loan_amount) that
+    moved from one status to another"""
+    deltas: StatDeltas = defaultdict(lambda: (0, 0.0))
+    for created_at, loan_purpose, loan_amount in rows:
+        day = utc_day(created_at)
+        count, amount = deltas[(day, from_status, loan_purpose)]
+        deltas[(day, from_status, loan_purpose)] = (count - 1, amount - loan_amount)
+        count, amount = deltas[(day, to_status, loan_purpose)]
+        deltas[(day, to_status, loan_purpose)] = (count + 1, amount + loan_amount)
+    return deltas
+
+
+async def apply_deltas(db: AsyncSession, deltas: StatDeltas):
+    """Apply aggregated deltas in the caller's transaction"""
+    if not deltas:
+        return
+
+    # Fixed key order so concurrent writers lock rows in the same order
+    await db.execute(
+        _upsert(),
+        [
+            {
+                "day": day,
+                "status": status,
+                "loan_purpose": loan_purpose,
+                "application_count": count,
+                "total_amount": amount,
+            }
+            for (day, status, loan_purpose), (count, amount) in sorted(
+                deltas.items(), key=lambda item: (item[0][0], item[0][1].value, item[0][2])
+            )
+        ]
+    )
+
+
+async def rebuild(db: AsyncSession) -> int:
+    """Recompute the summary from loan_applications (drift repair).
+
+    The table lock makes concurrent incremental updates wait until the
+    caller commits the rebuilt snapshot, so none of them is lost or
+    doubled. Commit right after this returns.
+    """
+    await db.execute(text("LOCK TABLE portfolio_stats IN EXCLUSIVE MODE"))
+    await db.execute(delete(PortfolioStat))
+
+    day = cast(func.timezone("UTC", LoanApplication.created_at), Date)
+    result = await db.execute(
+        insert(PortfolioStat).from_select(
+            ["day", "status", "loan_purpose", "application_count", "total_amount"],
+            select(
+                day,
+                LoanApplication.status,
+                LoanApplication.loan_purpose,
+                func.count(LoanApplication.id),
+                func.sum(LoanApplication.loan_amount)
+            ).group_by(day, LoanApplication.status, LoanApplication.loan_purpose)
+        )
+    )
+    return result.rowcount
+
+
+async def get_stats(
+    db: AsyncSession,
+    group_by: List[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> List[dict]:
+    """Read counts and sums from the summary table.
+
+    Cost depends on the number of (day, status, purpose) groups in range,
+    not on the number of applications.
+    """
+    columns = [GROUP_COLUMNS[name] for name in group_by]
+    statement = select(
+        *columns,
+        func.sum(PortfolioStat.application_count),
+        func.sum(PortfolioStat.total_amount)
+    ).group_by(*columns).order_by(*columns)
+
+    if date_from is not None:
+        statement = statement.where(PortfolioStat.day >= date_from)
+    if date_to is not None:
+        statement = statement.where(PortfolioStat.day <= date_to)
+
+    result = await db.execute(statement)
+    stats = []
+    for row in result.all():
+        item = dict(zip(group_by, row))
+        if "status" in item:
+            item["status"] = item["status"].value
+        item["application_count"] = int(row[-2] or 0)
+        item["total_amount"] = float(row[-1] or 0)
+        stats.append(item)
+    return stats
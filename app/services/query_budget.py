@@ -0,0 +1,115 @@
+import os
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.metrics import RequestStats, current_request
+
+# off: no checks; report: headers and warnings; strict: a violating statement raises
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
+# Identical statements per request that count as an N+1 pattern
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode by the statement that breaks a request's budget"""
+
+
+def query_budget(limit: int):
+    """Route dependency declaring how many SQL statements the route may run.
+
+    Route-level dependencies are resolved before the endpoint's own, so
+    the budget covers statements issued by auth dependencies as well:
+
+        @router.get("/me", dependencies=[Depends(query_budget(2))])
+    """
+
+    async def declare_budget():
+        stats = current_request.get()
+        if stats is not None:
+            stats.budget = limit
+
+    return declare_budget
+
+
+def violations(stats: RequestStats, repeat_threshold: int) -> List[str]:
+    problems = []
+    if stats.budget is not None and stats.db_statements > stats.budget:
+        problems.append(f"{stats.db_statements} statements, budget {stats.budget}")
+    for statement, count in (stats.statement_counts or {}).items():
+        if count >= repeat_threshold:
+            problems.append(f"{count}x {' '.join(statement.split())[:200]}")
+    return problems
+
+
+def track_statements(engine: Engine, mode: str = QUERY_BUDGET_MODE, repeat_threshold: int = QUERY_REPEAT_THRESHOLD):
+    """Count statements per SQL text for the current request.
+
+    The text is the compiled statement with bind placeholders, so the same
+    query with different ids is one key: that is the N+1 shape. Statements
+    outside a request (startup, background pipeline) are ignored.
+    """
+    strict = mode == "strict"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        if stats is None:
+            return
+        if stats.statement_counts is None:
+            stats.statement_counts = {}
+        count = stats.statement_counts.get(statement, 0) + 1
+        stats.statement_counts[statement] = count
+
+        if not strict:
+            return
+        # db_statements is incremented after execution, so this one is + 1
+        if stats.budget is not None and stats.db_statements + 1 > stats.budget:
+            raise QueryBudgetExceeded(
+                f"Statement {stats.db_statements + 1} exceeds the budget of {stats.budget}: {statement}"
+            )
+        if count == repeat_threshold:
+            raise QueryBudgetExceeded(f"Statement repeated {count} times in one request: {statement}")
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware reporting per-request statement counts.
+
+    Must sit inside MetricsMiddleware, which owns the RequestStats. Adds
+    X-Query-Count, X-Query-Budget and X-Query-Repeated to every response
+    and prints a warning for requests over budget or with repeated
+    statements.
+    """
+
+    def __init__(self, app, repeat_threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            stats = current_request.get()
+            if message["type"] == "http.response.start" and stats is not None:
+                repeated = sum(
+                    1 for count in (stats.statement_counts or {}).values()
+                    if count >= self.repeat_threshold
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(stats.db_statements).encode()))
+                if stats.budget is not None:
+                    headers.append((b"x-query-budget", str(stats.budget).encode()))
+                headers.append((b"x-query-repeated", str(repeated).encode()))
+                message = {**message, "headers": headers}
+
+                problems = violations(stats, self.repeat_threshold)
+                if problems:
+                    route = scope.get("route")
+                    path = route.path if route is not None else scope["path"]
+                    print(f"Query budget: {scope['method']} {path}: " + "; ".join(problems))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,105 @@
+import os
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Optional
+
+
+def sweep_keys(entries: Dict[str, Any], is_expired: Callable[[Any], bool], max_keys: int):
+    """Drop expired entries, then the oldest ones if still at max_keys.
+
+    Still at the cap (e.g. a flood of spoofed keys): drop the oldest
+    tenth so the scan is amortized over many inserts. Used by limiters
+    and counters, where forgetting a key only ever makes the check laxer.
+    """
+    expired_keys = [key for key, entry in entries.items() if is_expired(entry)]
+    for key in expired_keys:
+        del entries[key]
+
+    if len(entries) >= max_keys:
+        overflow = len(entries) - max_keys * 9 // 10
+        for key in list(islice(entries, overflow)):
+            del entries[key]
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimiter:
+    """In-process token bucket limiter.
+
+    Each key holds one slotted bucket. A bucket that has been idle long
+    enough to refill completely is indistinguishable from a missing one,
+    so periodic sweeps drop it; this keeps memory proportional to the
+    number of keys active within one refill period.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int = 100_000,
+        sweep_interval: float = 60
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.refill_seconds = burst / rate
+        self.buckets: Dict[str, _Bucket] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def hit(self, key: str, now: Optional[float] = None) -> float:
+        """Consume one token for key.
+
+        Returns 0.0 if the request is allowed, otherwise the number of
+        seconds until a token becomes available.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if now >= self._next_sweep or len(self.buckets) >= self.max_keys:
+                self.cleanup_expired(now)
+            self.buckets[key] = _Bucket(self.burst - 1, now)
+            return 0.0
+
+        tokens = bucket.tokens + (now - bucket.updated_at) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        bucket.updated_at = now
+
+        if tokens >= 1:
+            bucket.tokens = tokens - 1
+            return 0.0
+
+        bucket.tokens = tokens
+        return (1 - tokens) / self.rate
+
+    def cleanup_expired(self, now: Optional[float] = None):
+        """Remove buckets that have refilled completely"""
+        if now is None:
+            now = time.monotonic()
+
+        idle_before = now - self.refill_seconds
+        sweep_keys(self.buckets, lambda bucket: bucket.updated_at <= idle_before, self.max_keys)
+        self._next_sweep = now + self.sweep_interval
+
+
+# Per client IP on the public token endpoints
+auth_rate_limiter = RateLimiter(
+    rate=float(os.getenv("AUTH_RATE_LIMIT_PER_MINUTE", "20")) / 60,
+    burst=int(os.getenv("AUTH_RATE_LIMIT_BURST", "10"))
+)
+
+# Per bot key and per caller IP on the bot token endpoint. The bot service
+# issues tokens for all of its users, so the budget is much larger.
+bot_rate_limiter = RateLimiter(
+    rate=float(os.getenv("BOT_RATE_LIMIT_PER_SECOND", "50")),
+    burst=int(os.getenv("BOT_RATE_LIMIT_BURST", "200"))
+)
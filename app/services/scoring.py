@@ -0,0 +1,128 @@
+import numpy as np
+from typing import Dict, Sequence
+
+# Score scale, FICO-like
+SCORE_MIN = 300
+SCORE_MAX = 850
+
+# Decision codes returned by ScoringModel.score and their names
+DECISION_APPROVE = 0
+DECISION_REVIEW = 1
+DECISION_REJECT = 2
+DECISIONS = np.array(["approve", "review", "reject"])
+
+
+def annuity_payment(amount, monthly_rate: float, term):
+    """Monthly annuity payment; works on scalars and arrays"""
+    amount = np.asarray(amount, dtype=np.float64)
+    term = np.asarray(term, dtype=np.float64)
+    if monthly_rate == 0:
+        return amount / term
+    return amount * monthly_rate / (1.0 - (1.0 + monthly_rate) ** -term)
+
+
+class ScoringModel:
+    """Logistic affordability model evaluated over whole arrays.
+
+    Features per application:
+      - annuity monthly payment at the model's rate
+      - debt-to-income: payment / monthly_income
+      - loan-to-annual-income: loan_amount / (12 * monthly_income)
+      - log of monthly income
+      - term bucket (see term_bucket_edges), one weight per bucket
+    The logit is mapped to SCORE_MIN..SCORE_MAX; thresholds on the score
+    and a hard DTI cap give the decision.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        annual_rate: float,
+        intercept: float,
+        dti_weight: float,
+        loan_to_income_weight: float,
+        log_income_weight: float,
+        term_bucket_edges: Sequence[int],
+        term_bucket_weights: Sequence[float],
+        approve_threshold: float,
+        reject_threshold: float,
+        max_dti: float
+    ):
+        if len(term_bucket_weights) != len(term_bucket_edges) + 1:
+            raise ValueError("term_bucket_weights needs one weight per bucket")
+
+        self.version = version
+        self.annual_rate = annual_rate
+        self.monthly_rate = annual_rate / 12
+        self.intercept = intercept
+        self.dti_weight = dti_weight
+        self.loan_to_income_weight = loan_to_income_weight
+        self.log_income_weight = log_income_weight
+        self.term_bucket_edges = np.asarray(term_bucket_edges, dtype=np.float64)
+        self.term_bucket_weights = np.asarray(term_bucket_weights, dtype=np.float64)
+        self.approve_threshold = approve_threshold
+        self.reject_threshold = reject_threshold
+        self.max_dti = max_dti
+
+    def features(self, loan_amount, loan_term, monthly_income) -> Dict[str, np.ndarray]:
+        """Affordability features for equally sized arrays"""
+        loan_amount = np.asarray(loan_amount, dtype=np.float64)
+        loan_term = np.asarray(loan_term, dtype=np.float64)
+        monthly_income = np.asarray(monthly_income, dtype=np.float64)
+
+        payment = annuity_payment(loan_amount, self.monthly_rate, loan_term)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dti = np.where(monthly_income > 0, payment / monthly_income, np.inf)
+            loan_to_income = np.where(
+                monthly_income > 0, loan_amount / (12 * monthly_income), np.inf
+            )
+        term_bucket = np.searchsorted(self.term_bucket_edges, loan_term, side="left")
+
+        return {
+            "monthly_payment": payment,
+            "debt_to_income": dti,
+            "loan_to_income": loan_to_income,
+            "term_bucket": term_bucket,
+            "log_income": np.log(np.maximum(monthly_income, 1.0)),
+        }
+
+    def score(self, loan_amount, loan_term, monthly_income) -> Dict[str, np.ndarray]:
+        """Score arrays of applications in one vectorized pass"""
+        features = self.features(loan_amount, loan_term, monthly_income)
+        dti = features["debt_to_income"]
+
+        # Infinite ratios (no income) saturate the logit rather than NaN
+        logit = (
+            self.intercept
+            + self.dti_weight * np.minimum(dti, 10.0)
+            + self.loan_to_income_weight * np.minimum(features["loan_to_income"], 10.0)
+            + self.log_income_weight * features["log_income"]
+            + self.term_bucket_weights[features["term_bucket"]]
+        )
+        probability = 1.0 / (1.0 + np.exp(-logit))
+        score = np.rint(SCORE_MIN + (SCORE_MAX - SCORE_MIN) * probability)
+
+        decision = np.full(score.shape, DECISION_REVIEW, dtype=np.int8)
+        decision[score >= self.approve_threshold] = DECISION_APPROVE
+        decision[(score < self.reject_threshold) | (dti > self.max_dti)] = DECISION_REJECT
+
+        features["score"] = score
+        features["decision"] = decision
+        return features
+
+
+# Built-in coefficients, used until a model artifact is deployed
+DEFAULT_MODEL = ScoringModel(
+    version="builtin-1",
+    annual_rate=0.24,
+    intercept=-2.0,
+    dti_weight=-6.0,
+    loan_to_income_weight=-0.8,
+    log_income_weight=0.35,
+    term_bucket_edges=[6, 12, 24, 36],
+    term_bucket_weights=[0.4, 0.3, 0.0, -0.3, -0.6],
+    approve_threshold=650,
+    reject_threshold=500,
+    max_dti=0.5
+)
+
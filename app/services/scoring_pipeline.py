@@ -0,0 +1,330 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, any_, bindparam, case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.database import async_session
+from app.models.application import ApplicationStatus, LoanApplication
+from app.services import portfolio_stats
+from app.services.bot_user_cache import bot_user_cache
+from app.services.latency import latency_percentiles
+from app.services.model_artifacts import model_registry, score_batch
+from app.services.scoring import DECISION_APPROVE, DECISION_REJECT
+from app.services.shadow_scoring import shadow_scorer
+
+SCORING_PIPELINE_ENABLED = os.getenv("SCORING_PIPELINE_ENABLED", "false").lower() == "true"
+# Off: only score and model version are written and status stays PENDING
+# for a human. On: approve/reject decisions of the active model are applied,
+# which should wait until the model is signed off.
+SCORING_AUTO_DECISIONS = os.getenv("SCORING_AUTO_DECISIONS", "false").lower() == "true"
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", "500"))
+# How long the first queued application waits for the batch to fill up
+SCORING_BATCH_WAIT = float(os.getenv("SCORING_BATCH_WAIT", "0.2"))
+SCORING_POLL_INTERVAL = float(os.getenv("SCORING_POLL_INTERVAL", "5"))
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "1"))
+SCORING_QUEUE_SIZE = int(os.getenv("SCORING_QUEUE_SIZE", "10000"))
+
+AUTO_REJECTION_REASON = "Rejected by automatic scoring"
+
+
+def _scored_update(
+    model_version: str,
+    ids: List[int],
+    scores: List[int],
+    decisions: List[int],
+    auto_decisions: bool
+):
+    """One UPDATE ... FROM unnest(...) for the whole batch.
+
+    The status and score predicates make the write a no-op for rows that
+    were scored or moved by an admin in the meantime. Without
+    auto_decisions the status columns are left as they are.
+    """
+    scored = func.unnest(
+        bindparam("scored_ids", ids, type_=ARRAY(Integer)),
+        bindparam("scores", scores, type_=ARRAY(Integer)),
+        bindparam("decisions", decisions, type_=ARRAY(Integer))
+    ).table_valued("id", "score", "decision").render_derived(name="scored")
+
+    status_type = LoanApplication.status.type
+    approved = scored.c.decision == DECISION_APPROVE
+    rejected = scored.c.decision == DECISION_REJECT
+
+    values = dict(
+        score=scored.c.score,
+        score_model_version=model_version,
+        scored_at=func.now(),
+        updated_at=func.now()
+    )
+    if auto_decisions:
+        values.update(
+            status=case(
+                (approved, literal(ApplicationStatus.APPROVED, status_type)),
+                (rejected, literal(ApplicationStatus.REJECTED, status_type)),
+                else_=LoanApplication.status
+            ),
+            approved_at=case((approved, func.now()), else_=LoanApplication.approved_at),
+            rejection_reason=case(
+                (rejected, AUTO_REJECTION_REASON), else_=LoanApplication.rejection_reason
+            )
+        )
+
+    return (
+        update(LoanApplication)
+        .where(
+            LoanApplication.id == scored.c.id,
+            LoanApplication.status == ApplicationStatus.PENDING,
+            LoanApplication.score.is_(None)
+        )
+        .values(**values)
+        .returning(
+            LoanApplication.id,
+            LoanApplication.user_id,
+            LoanApplication.created_at,
+            LoanApplication.loan_purpose,
+            LoanApplication.loan_amount,
+            LoanApplication.status
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+class ScoringPipeline:
+    """Scores new PENDING applications in the background.
+
+    Handlers submit application ids after commit; a poller also picks up
+    unscored rows that were never submitted (other writers, restarts,
+    a full queue). Ids are grouped into batches of up to batch_size, or
+    whatever arrived within batch_wait, scored in a process pool so the
+    event loop never runs model code, and written back with one UPDATE per
+    batch. With auto_decisions, approve and reject decisions move the
+    application out of PENDING and review keeps it pending; without, every
+    application stays pending with its score set for a human. The poller
+    also finds applications created before the pipeline was first enabled,
+    so decisions must stay off until the model is signed off.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        batch_wait: float = 0.2,
+        poll_interval: float = 5,
+        workers: int = 1,
+        queue_size: int = 10_000,
+        auto_decisions: bool = False
+    ):
+        self.batch_size = batch_size
+        self.auto_decisions = auto_decisions
+        self.batch_wait = batch_wait
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.queue: "asyncio.Queue[int]" = asyncio.Queue(maxsize=queue_size)
+        # application_id -> monotonic time it was queued; also dedupes submits
+        self.queued: Dict[int, float] = {}
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.tasks: List[asyncio.Task] = []
+        self.batches_in_flight: set = set()
+        self.slots: Optional[asyncio.Semaphore] = None
+
+        self.batches = 0
+        self.scored = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.batch_seconds: deque = deque(maxlen=1000)
+        self.queue_wait_seconds: deque = deque(maxlen=1000)
+
+    @property
+    def running(self) -> bool:
+        return bool(self.tasks)
+
+    def submit(self, application_id: int) -> bool:
+        """Queue an application for scoring; never blocks the caller"""
+        if not self.running:
+            return False
+        if application_id in self.queued:
+            return True
+        try:
+            self.queue.put_nowait(application_id)
+        except asyncio.QueueFull:
+            # The poller will find it once the backlog drains
+            self.dropped += 1
+            return False
+        self.queued[application_id] = time.monotonic()
+        return True
+
+    async def start(self):
+        if self.running:
+            return
+        # spawn: forking a process that runs an event loop and DB pool is unsafe
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Spawn a worker now rather than on the first real batch
+        self.executor.submit(score_batch, None, [1.0], [12], [1.0])
+        self.slots = asyncio.Semaphore(self.workers)
+        self.tasks = [
+            asyncio.create_task(self._consume()),
+            asyncio.create_task(self._poll()),
+        ]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, *self.batches_in_flight, return_exceptions=True)
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def _next_batch(self) -> List[int]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _consume(self):
+        while True:
+            batch = await self._next_batch()
+            # One batch per worker process in flight; the next one is
+            # collected while these are being scored
+            await self.slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self.batches_in_flight.add(task)
+            task.add_done_callback(self.batches_in_flight.discard)
+
+    async def _run_batch(self, ids: List[int]):
+        started = time.monotonic()
+        try:
+            await self.process_batch(ids)
+            self.batches += 1
+        except Exception as e:
+            self.failed_batches += 1
+            print(f"Scoring batch of {len(ids)} failed: {e}")
+        finally:
+            self.slots.release()
+            finished = time.monotonic()
+            self.batch_seconds.append(finished - started)
+            for application_id in ids:
+                queued_at = self.queued.pop(application_id, None)
+                if queued_at is not None:
+                    self.queue_wait_seconds.append(finished - queued_at)
+
+    async def process_batch(self, ids: List[int]):
+        """Score and write back one batch"""
+        async with async_session() as db:
+            result = await db.execute(
+                select(
+                    LoanApplication.id,
+                    LoanApplication.loan_amount,
+                    LoanApplication.loan_term,
+                    LoanApplication.monthly_income
+                ).where(
+                    LoanApplication.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+                    LoanApplication.status == ApplicationStatus.PENDING,
+                    LoanApplication.score.is_(None)
+                )
+            )
+            rows = result.all()
+            self.skipped += len(ids) - len(rows)
+            if not rows:
+                return
+
+            # Release the connection while the worker computes
+            await db.commit()
+
+            row_ids, loan_amount, loan_term, monthly_income = (list(column) for column in zip(*rows))
+            # Workers map the artifact themselves; only its path is sent
+            artifact_path, _ = model_registry.current()
+            loop = asyncio.get_running_loop()
+            model_version, scores, decisions, model_seconds = await loop.run_in_executor(
+                self.executor, score_batch, artifact_path, loan_amount, loan_term, monthly_income
+            )
+
+            result = await db.execute(
+                _scored_update(model_version, row_ids, scores, decisions, self.auto_decisions)
+            )
+            updated_rows = result.all()
+
+            for to_status in (ApplicationStatus.APPROVED, ApplicationStatus.REJECTED):
+                moved = [row for row in updated_rows if row.status == to_status]
+                await portfolio_stats.apply_deltas(
+                    db,
+                    portfolio_stats.transition_deltas(
+                        ((row.created_at, row.loan_purpose, row.loan_amount) for row in moved),
+                        ApplicationStatus.PENDING,
+                        to_status
+                    )
+                )
+            await db.commit()
+
+        self.scored += len(updated_rows)
+        self.skipped += len(rows) - len(updated_rows)
+        for user_id in {row.user_id for row in updated_rows}:
+            bot_user_cache.invalidate_user(user_id)
+
+        shadow_scorer.observe(
+            row_ids, loan_amount, loan_term, monthly_income,
+            model_version, scores, decisions, model_seconds
+        )
+
+    async def _poll(self):
+        while True:
+            try:
+                async with async_session() as db:
+                    result = await db.execute(
+                        select(LoanApplication.id)
+                        .where(
+                            LoanApplication.score.is_(None),
+                            LoanApplication.status == ApplicationStatus.PENDING
+                        )
+                        .order_by(LoanApplication.id)
+                        .limit(self.queue.maxsize)
+                    )
+                    for application_id in result.scalars():
+                        if not self.submit(application_id):
+                            break
+            except Exception as e:
+                print(f"Scoring poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        """Queue depth, throughput counters and latency percentiles"""
+        return {
+            "running": self.running,
+            "auto_decisions": self.auto_decisions,
+            "queue_depth": self.queue.qsize(),
+            "queued": len(self.queued),
+            "batches_in_flight": len(self.batches_in_flight),
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "scored": self.scored,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "batch_seconds": latency_percentiles(self.batch_seconds),
+            "queue_wait_seconds": latency_percentiles(self.queue_wait_seconds),
+        }
+
+
+scoring_pipeline = ScoringPipeline(
+    batch_size=SCORING_BATCH_SIZE,
+    batch_wait=SCORING_BATCH_WAIT,
+    poll_interval=SCORING_POLL_INTERVAL,
+    workers=SCORING_WORKERS,
+    queue_size=SCORING_QUEUE_SIZE,
+    auto_decisions=SCORING_AUTO_DECISIONS
+)
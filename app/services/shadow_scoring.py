@@ -0,0 +1,245 @@
+import asyncio
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.services.latency import latency_percentiles
+from app.services.model_artifacts import ARTIFACT_SUFFIX, SCORING_MODEL_DIR, load_artifact, score_batch
+from app.services.scoring import DECISIONS
+
+# Candidate artifact: a version name in SCORING_MODEL_DIR or a file path
+SCORING_SHADOW_MODEL = os.getenv("SCORING_SHADOW_MODEL", "")
+SCORING_SHADOW_SAMPLE_RATE = float(os.getenv("SCORING_SHADOW_SAMPLE_RATE", "0.1"))
+SCORING_SHADOW_LOG_SIZE = int(os.getenv("SCORING_SHADOW_LOG_SIZE", "100000"))
+
+# One row per shadow-scored application, 14 bytes each
+COMPARISON_DTYPE = np.dtype([
+    ("application_id", np.int64),
+    ("production_score", np.int16),
+    ("candidate_score", np.int16),
+    ("production_decision", np.int8),
+    ("candidate_decision", np.int8),
+], align=False)
+
+
+def resolve_artifact_path(name: str, model_dir: str = SCORING_MODEL_DIR) -> str:
+    """Version name in the model directory, or a path as is"""
+    if os.sep in name or name.endswith(ARTIFACT_SUFFIX):
+        return name
+    return os.path.join(model_dir, f"{name}{ARTIFACT_SUFFIX}")
+
+
+class ShadowScorer:
+    """Runs a candidate model next to production on sampled live batches.
+
+    After the pipeline has written a batch, a sample of its rows is scored
+    again by the candidate in a dedicated worker process, as a detached
+    task: production never waits for it. If the previous shadow batch is
+    still running the sample is dropped rather than queued, so a slow
+    candidate cannot build a backlog. Results go to a fixed-size ring of
+    COMPARISON_DTYPE rows; model timings are per application, measured
+    inside the workers so both models are compared on compute alone.
+    """
+
+    def __init__(self, sample_rate: float = 0.1, log_size: int = 100_000):
+        self.sample_rate = sample_rate
+        self.log = np.zeros(log_size, dtype=COMPARISON_DTYPE)
+        self.log_next = 0
+        self.log_count = 0
+
+        self.candidate_path: Optional[str] = None
+        self.candidate_version: Optional[str] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.task: Optional[asyncio.Task] = None
+        self.rng = np.random.default_rng()
+
+        self.production_versions: set = set()
+        self.sampled = 0
+        self.dropped = 0
+        self.failed = 0
+        # Seconds per application, one sample per batch
+        self.production_seconds: deque = deque(maxlen=1000)
+        self.candidate_seconds: deque = deque(maxlen=1000)
+
+    @property
+    def enabled(self) -> bool:
+        return self.candidate_path is not None and self.sample_rate > 0
+
+    def set_candidate(self, artifact_path: Optional[str], sample_rate: Optional[float] = None):
+        """Switch the candidate; the comparison log starts over"""
+        if artifact_path is not None:
+            # Fail here rather than in every shadow batch
+            self.candidate_version = load_artifact(artifact_path).version
+        else:
+            self.candidate_version = None
+        self.candidate_path = artifact_path
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        self.reset()
+        if self.enabled:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+            # Start the worker and map the artifact before the first sample
+            self.executor.submit(score_batch, artifact_path, [1.0], [12], [1.0])
+
+    def reset(self):
+        self.log_next = 0
+        self.log_count = 0
+        self.production_versions = set()
+        self.sampled = 0
+        self.dropped = 0
+        self.failed = 0
+        self.production_seconds.clear()
+        self.candidate_seconds.clear()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def observe(
+        self,
+        application_ids: Sequence[int],
+        loan_amount: Sequence[float],
+        loan_term: Sequence[int],
+        monthly_income: Sequence[float],
+        production_version: str,
+        production_scores: Sequence[int],
+        production_decisions: Sequence[int],
+        production_seconds: float
+    ):
+        """Offer a scored production batch for shadow scoring; never blocks"""
+        if not self.enabled or not application_ids:
+            return
+        self.production_versions.add(production_version)
+        self.production_seconds.append(production_seconds / len(application_ids))
+
+        if self.task is not None and not self.task.done():
+            self.dropped += 1
+            return
+
+        picked = np.flatnonzero(self.rng.random(len(application_ids)) < self.sample_rate)
+        if not picked.size:
+            return
+
+        def take(column):
+            return np.asarray(column)[picked]
+
+        self.task = asyncio.create_task(self._shadow_batch(
+            self.candidate_path,
+            take(application_ids),
+            take(loan_amount).tolist(),
+            take(loan_term).tolist(),
+            take(monthly_income).tolist(),
+            take(production_scores),
+            take(production_decisions)
+        ))
+
+    async def _shadow_batch(
+        self,
+        artifact_path: str,
+        application_ids: np.ndarray,
+        loan_amount: List[float],
+        loan_term: List[int],
+        monthly_income: List[float],
+        production_scores: np.ndarray,
+        production_decisions: np.ndarray
+    ):
+        loop = asyncio.get_running_loop()
+        try:
+            _, scores, decisions, seconds = await loop.run_in_executor(
+                self.executor, score_batch, artifact_path, loan_amount, loan_term, monthly_income
+            )
+        except Exception as e:
+            self.failed += 1
+            print(f"Shadow scoring failed: {e}")
+            return
+        if artifact_path != self.candidate_path:
+            # Candidate was switched while this batch ran
+            return
+
+        rows = np.empty(len(application_ids), dtype=COMPARISON_DTYPE)
+        rows["application_id"] = application_ids
+        rows["production_score"] = production_scores
+        rows["candidate_score"] = scores
+        rows["production_decision"] = production_decisions
+        rows["candidate_decision"] = decisions
+        self._append(rows)
+        self.sampled += len(rows)
+        self.candidate_seconds.append(seconds / len(rows))
+
+    def _append(self, rows: np.ndarray):
+        size = len(self.log)
+        rows = rows[-size:]
+        end = self.log_next + len(rows)
+        if end <= size:
+            self.log[self.log_next:end] = rows
+        else:
+            split = size - self.log_next
+            self.log[self.log_next:] = rows[:split]
+            self.log[:end - size] = rows[split:]
+        self.log_next = end % size
+        self.log_count = min(self.log_count + len(rows), size)
+
+    def comparisons(self) -> np.ndarray:
+        """Logged rows, oldest first"""
+        if self.log_count < len(self.log):
+            return self.log[:self.log_count]
+        return np.concatenate((self.log[self.log_next:], self.log[:self.log_next]))
+
+    def summary(self) -> dict:
+        """Score divergence, decision agreement and per-model latency"""
+        rows = self.comparisons()
+        summary = {
+            "enabled": self.enabled,
+            "candidate_version": self.candidate_version,
+            "production_versions": sorted(self.production_versions),
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "logged": len(rows),
+            "dropped_batches": self.dropped,
+            "failed_batches": self.failed,
+            "latency_seconds_per_application": {
+                "production": latency_percentiles(self.production_seconds),
+                "candidate": latency_percentiles(self.candidate_seconds),
+            },
+        }
+        if not len(rows):
+            return summary
+
+        diff = rows["candidate_score"].astype(np.int32) - rows["production_score"]
+        abs_diff = np.abs(diff)
+        p50, p95, p99 = np.percentile(abs_diff, [50, 95, 99])
+        summary["score_difference"] = {
+            "mean": float(diff.mean()),
+            "mean_abs": float(abs_diff.mean()),
+            "p50_abs": float(p50),
+            "p95_abs": float(p95),
+            "p99_abs": float(p99),
+            "max_abs": int(abs_diff.max()),
+        }
+
+        # confusion[production][candidate] as counts of decision pairs
+        pairs = rows["production_decision"].astype(np.intp) * len(DECISIONS) + rows["candidate_decision"]
+        confusion = np.bincount(pairs, minlength=len(DECISIONS) ** 2).reshape(len(DECISIONS), -1)
+        summary["decision_agreement"] = float(np.trace(confusion) / len(rows))
+        summary["decisions"] = {
+            str(production): {
+                str(candidate): int(confusion[i, j]) for j, candidate in enumerate(DECISIONS)
+            }
+            for i, production in enumerate(DECISIONS)
+        }
+        return summary
+
+
+shadow_scorer = ShadowScorer(SCORING_SHADOW_SAMPLE_RATE, SCORING_SHADOW_LOG_SIZE)
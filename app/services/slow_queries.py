@@ -0,0 +1,161 @@
+import hashlib
+import os
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Statements at or over this duration are logged
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+# Fraction of slow statements written to the log; all of them are counted
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+# Top fingerprints cover the current and the previous window
+SLOW_QUERY_WINDOW_SECONDS = float(os.getenv("SLOW_QUERY_WINDOW_SECONDS", "300"))
+SLOW_QUERY_TOP_N = int(os.getenv("SLOW_QUERY_TOP_N", "20"))
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+")
+_NUMBERS = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+# ? or ?::TYPE lists, as rendered for IN (...) and VALUES (...)
+_VALUE = r"\?(?:::\w+(?:\[\])?)?"
+_VALUE_LISTS = re.compile(r"\(\s*" + _VALUE + r"(?:\s*,\s*" + _VALUE + r")*\s*\)")
+_REPEATED_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """(id, normalized text) of a statement with all values stripped.
+
+    Bind placeholders and literals become ?, and value lists collapse to
+    (...), so "IN ($1, $2)" and "IN ($1, $2, $3)" share a fingerprint.
+    SQLAlchemy reuses compiled statement strings, so the cache keeps this
+    off the per-statement cost.
+    """
+    text = _COMMENTS.sub(" ", statement)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _VALUE_LISTS.sub("(...)", text)
+    text = _REPEATED_ROWS.sub("(...)", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest(), text
+
+
+class _FingerprintStats:
+    __slots__ = ("text", "count", "total_seconds", "max_seconds", "slow_count")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow_count = 0
+
+
+class SlowQueryLog:
+    """Per-fingerprint statement costs and a sampled log of slow statements.
+
+    Every statement is counted against its fingerprint; only statements
+    over the threshold are logged, and of those only a sample_rate
+    fraction, so a slow database cannot flood the output. Totals are kept
+    for two rotating windows: the top list always covers between one and
+    two windows of recent traffic, and old fingerprints age out.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 100,
+        sample_rate: float = 1.0,
+        window_seconds: float = 300,
+        max_fingerprints: int = 2000
+    ):
+        self.threshold_seconds = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.max_fingerprints = max_fingerprints
+        self.current: Dict[str, _FingerprintStats] = {}
+        self.previous: Dict[str, _FingerprintStats] = {}
+        self.window_started = time.monotonic()
+        self.slow = 0
+        self.logged = 0
+        self.untracked = 0
+
+    def observe(self, statement: str, seconds: float):
+        now = time.monotonic()
+        if now - self.window_started >= self.window_seconds:
+            self.previous = self.current
+            self.current = {}
+            self.window_started = now
+
+        fingerprint_id, text = fingerprint(statement)
+        stats = self.current.get(fingerprint_id)
+        if stats is None:
+            if len(self.current) >= self.max_fingerprints:
+                self.untracked += 1
+                return
+            stats = self.current[fingerprint_id] = _FingerprintStats(text)
+        stats.count += 1
+        stats.total_seconds += seconds
+        if seconds > stats.max_seconds:
+            stats.max_seconds = seconds
+
+        if seconds >= self.threshold_seconds:
+            stats.slow_count += 1
+            self.slow += 1
+            if self.sample_rate >= 1 or random.random() < self.sample_rate:
+                self.logged += 1
+                print(f"Slow query {seconds * 1000:.1f} ms [{fingerprint_id}]: {text[:1000]}")
+
+    def top(self, limit: int = 20, order_by: str = "total") -> List[dict]:
+        """Costliest fingerprints over the last one to two windows"""
+        merged: Dict[str, dict] = {}
+        for window in (self.previous, self.current):
+            for fingerprint_id, stats in window.items():
+                entry = merged.get(fingerprint_id)
+                if entry is None:
+                    entry = merged[fingerprint_id] = {
+                        "fingerprint": fingerprint_id,
+                        "statement": stats.text,
+                        "count": 0,
+                        "slow_count": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                    }
+                entry["count"] += stats.count
+                entry["slow_count"] += stats.slow_count
+                entry["total_ms"] += stats.total_seconds * 1000
+                entry["max_ms"] = max(entry["max_ms"], stats.max_seconds * 1000)
+
+        for entry in merged.values():
+            entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        key = {"total": "total_ms", "mean": "mean_ms", "max": "max_ms", "count": "count"}[order_by]
+        return sorted(merged.values(), key=lambda entry: entry[key], reverse=True)[:limit]
+
+    def reset(self):
+        self.current = {}
+        self.previous = {}
+        self.window_started = time.monotonic()
+        self.slow = 0
+        self.logged = 0
+        self.untracked = 0
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_seconds * 1000,
+            "sample_rate": self.sample_rate,
+            "window_seconds": self.window_seconds,
+            "slow_statements": self.slow,
+            "logged_statements": self.logged,
+            "untracked_statements": self.untracked,
+            "fingerprints": len(self.current.keys() | self.previous.keys()),
+        }
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+    sample_rate=SLOW_QUERY_SAMPLE_RATE,
+    window_seconds=SLOW_QUERY_WINDOW_SECONDS
+)
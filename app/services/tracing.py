@@ -0,0 +1,356 @@
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.slow_queries import fingerprint
+
+# Fraction of requests traced when the caller sent no sampling decision
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Chrome trace event file: open in https://ui.perfetto.dev or chrome://tracing
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.json")
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+# Spans kept per trace; the rest are counted as dropped
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_HEADER = "x-trace-id"
+_TRACEPARENT_KEY = TRACEPARENT_HEADER.encode()
+_TRACE_ID_KEY = TRACE_ID_HEADER.encode()
+
+
+class Trace:
+    """Spans of one request, as Chrome trace "complete" events"""
+    __slots__ = ("trace_id", "parent_id", "sampled", "track", "name", "events", "dropped")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], sampled: bool, track: int):
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.track = track
+        self.name = ""
+        self.events: List[dict] = []
+        self.dropped = 0
+
+    def add(
+        self,
+        name: str,
+        category: str,
+        start_us: int,
+        seconds: float,
+        span_id: str,
+        parent_id: Optional[str],
+        attrs: dict
+    ):
+        if len(self.events) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_us,
+            "dur": round(seconds * 1e6, 1),
+            "tid": self.track,
+            "args": {"span_id": span_id, "parent_id": parent_id, **attrs},
+        })
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+_tracks = count(1)
+
+
+def _span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span id, sampled) from a W3C traceparent header"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def start_trace(traceparent: Optional[str], sample_rate: float = TRACE_SAMPLE_RATE) -> Trace:
+    """Continue the caller's trace, or start one with a head sampling decision"""
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = sample_rate > 0 and random.random() < sample_rate
+    return Trace(trace_id, parent_id, sampled, next(_tracks))
+
+
+def traceparent(trace: Trace, span_id: Optional[str]) -> str:
+    return f"00-{trace.trace_id}-{span_id or _span_id()}-{'01' if trace.sampled else '00'}"
+
+
+@contextmanager
+def span(name: str, category: str = "app", **attrs):
+    """Record a span around a block when the current request is sampled"""
+    trace = current_trace.get()
+    if trace is None or not trace.sampled:
+        yield
+        return
+
+    span_id = _span_id()
+    parent_id = current_span_id.get()
+    token = current_span_id.set(span_id)
+    start_us = time.time_ns() // 1000
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        current_span_id.reset(token)
+        trace.add(name, category, start_us, elapsed, span_id, parent_id, attrs)
+
+
+def traced(name: Optional[str] = None, category: str = "dependency"):
+    """Span around every call of an async function (e.g. a FastAPI dependency).
+
+    functools.wraps keeps the signature visible to FastAPI's dependency
+    resolution.
+    """
+
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def trace_statement(statement: str, seconds: float):
+    """Statement observer for metrics.instrument_engine: one span per SQL statement"""
+    trace = current_trace.get()
+    if trace is None or not trace.sampled:
+        return
+    start_us = time.time_ns() // 1000 - round(seconds * 1e6)
+    trace.add(
+        "sql", "db", start_us, seconds, _span_id(), current_span_id.get(),
+        {"statement": fingerprint(statement)[1][:500]}
+    )
+
+
+def trace_pool(engine: Engine):
+    """One span per pooled connection a sampled request holds.
+
+    Pass the sync engine (AsyncEngine.sync_engine). The span starts when
+    the pool hands the connection out and ends at checkin, so it shows
+    where in the request a connection was taken and how long it was held;
+    new_connection marks checkouts that had to open one. The trace is
+    kept on the connection record, as checkin may run outside the
+    request's context (e.g. when a session is garbage collected).
+    """
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        connection_record.info["trace_fresh"] = True
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        trace = current_trace.get()
+        fresh = connection_record.info.pop("trace_fresh", False)
+        if trace is None or not trace.sampled:
+            return
+        connection_record.info["trace_span"] = (
+            trace, current_span_id.get(), time.time_ns() // 1000, time.perf_counter(), fresh
+        )
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        held = connection_record.info.pop("trace_span", None)
+        if held is None:
+            return
+        trace, parent_id, start_us, started, fresh = held
+        trace.add(
+            "db.connection", "db", start_us, time.perf_counter() - started, _span_id(), parent_id,
+            {"new_connection": fresh}
+        )
+
+
+class TraceExporter:
+    """Appends sampled traces to a Chrome trace event file.
+
+    The file is a JSON array whose closing bracket is optional in that
+    format, so each trace is appended as whole lines and the file stays
+    loadable while the server runs. Each request gets its own track,
+    named after the route and trace id. Past max_bytes the file is
+    moved to <path>.1 and a new one started.
+
+    export() only queues the trace: a writer thread serializes and
+    writes whatever has queued up and flushes once per batch, so no
+    file I/O happens on the event loop. A full queue drops traces rather
+    than holding up requests.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, max_queue: int = 10_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.file = None
+        self.pid = os.getpid()
+        self.exported = 0
+        self.dropped = 0
+        self.queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self.writer: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        if self.writer is None:
+            with self.lock:
+                if self.writer is None:
+                    self.writer = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self.writer.start()
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._write([trace for trace in batch if trace is not None])
+            except OSError as e:
+                print(f"Trace export failed: {e}")
+            if stop:
+                return
+
+    def _open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.file.tell() == 0:
+            self.file.write("[\n")
+
+    def _write(self, traces: List[Trace]):
+        for trace in traces:
+            if self.file is None:
+                self._open()
+            elif self.file.tell() >= self.max_bytes:
+                self.file.close()
+                os.replace(self.path, self.path + ".1")
+                self._open()
+
+            lines = [json.dumps({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": trace.track,
+                "args": {"name": f"{trace.name} {trace.trace_id}"},
+            })]
+            for span in trace.events:
+                span["pid"] = self.pid
+                span["args"]["trace_id"] = trace.trace_id
+                lines.append(json.dumps(span))
+            self.file.write(",\n".join(lines) + ",\n")
+            self.exported += 1
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        """Write what is queued and close the file (called at shutdown)"""
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join(timeout=5)
+            self.writer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: trace context in, root span, trace id out.
+
+    Every response carries traceparent and X-Trace-Id, sampled or not, so
+    the bot service can log the id it got back. The sampling decision is
+    made once at the edge: an incoming traceparent's flag wins, otherwise
+    sample_rate applies.
+    """
+
+    def __init__(self, app, exporter: TraceExporter, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for key, value in scope["headers"]:
+            if key == _TRACEPARENT_KEY:
+                incoming = value.decode("latin-1")
+                break
+
+        trace = start_trace(incoming, self.sample_rate)
+        root_id = _span_id()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((_TRACEPARENT_KEY, traceparent(trace, root_id).encode()))
+                headers.append((_TRACE_ID_KEY, trace.trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        trace_token = current_trace.set(trace)
+        span_token = current_span_id.set(root_id)
+        start_us = time.time_ns() // 1000
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_span_id.reset(span_token)
+            current_trace.reset(trace_token)
+
+            if trace.sampled:
+                route = scope.get("route")
+                trace.name = f"{scope['method']} {route.path if route is not None else scope['path']}"
+                trace.add(
+                    trace.name, "http.server", start_us, elapsed, root_id, trace.parent_id,
+                    {"status": status_code, "dropped_spans": trace.dropped}
+                )
+                self.exporter.export(trace)
+
+
+trace_exporter = TraceExporter(TRACE_EXPORT_PATH, TRACE_EXPORT_MAX_BYTES)
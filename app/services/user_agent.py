@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import UserAgent
+
+# Distinct raw User-Agent strings kept parsed; a few hundred cover most traffic
+USER_AGENT_CACHE_SIZE = int(os.getenv("USER_AGENT_CACHE_SIZE", "4096"))
+
+# Every byte that is not an ASCII letter becomes a space and letters are
+# lowercased, so one translate and one split turn a User-Agent into its
+# lowercase words in C; the words any rule looks at are then picked out
+# with a single set intersection. A regex pass (findall, or an alternation
+# of the keywords) costs several times more per call.
+_WORD_BYTES = bytes(
+    byte | 0x20 if chr(byte).isascii() and chr(byte).isalpha() else 0x20
+    for byte in range(256)
+)
+
+# (word, name) in order of precedence: the first word found wins.
+# Browsers built on Chrome also send "Chrome/" and "Safari/", iOS sends
+# "like Mac OS X" and Android sends "Linux", so the more specific words
+# come first.
+_BROWSERS = (
+    (b"edg", "Edge"),
+    (b"edge", "Edge"),
+    (b"edga", "Edge"),
+    (b"edgios", "Edge"),
+    (b"opr", "Opera"),
+    (b"opera", "Opera"),
+    (b"yabrowser", "Yandex"),
+    (b"firefox", "Firefox"),
+    (b"fxios", "Firefox"),
+    (b"crios", "Chrome"),
+    (b"chromium", "Chrome"),
+    (b"chrome", "Chrome"),
+    (b"safari", "Safari"),
+)
+_SYSTEMS = (
+    (b"android", "Android"),
+    (b"windows", "Windows"),
+    (b"iphone", "iOS"),
+    (b"ipad", "iOS"),
+    (b"ipod", "iOS"),
+    (b"cros", "ChromeOS"),
+    (b"macintosh", "macOS"),
+    (b"linux", "Linux"),
+)
+_KEYWORDS = frozenset(word for word, _ in _BROWSERS + _SYSTEMS) | {b"mobile", b"mobi", b"tablet"}
+
+
+def _first(rules, words) -> str:
+    for word, name in rules:
+        if word in words:
+            return name
+    return "Unknown"
+
+
+class DeviceInfo:
+    """Browser, OS and device type parsed from a User-Agent.
+
+    Instances are shared through the parse cache, so treat them as
+    read-only.
+    """
+    __slots__ = ("browser", "os", "device")
+
+    def __init__(self, browser: str, os: str, device: str):
+        self.browser = browser
+        self.os = os
+        self.device = device
+
+    def as_dict(self) -> dict:
+        return {"browser": self.browser, "os": self.os, "device": self.device}
+
+    def to_json(self) -> str:
+        """Stored in AuthSession.device_info"""
+        return json.dumps(self.as_dict())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DeviceInfo) and (self.browser, self.os, self.device) == (
+            other.browser, other.os, other.device
+        )
+
+    def __repr__(self) -> str:
+        return f"DeviceInfo(browser={self.browser!r}, os={self.os!r}, device={self.device!r})"
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def parse_user_agent(user_agent: str) -> DeviceInfo:
+    """Classify a User-Agent in a single pass, cached by the raw string"""
+    # Non-ASCII characters become "?", a separator like any other
+    words = _KEYWORDS.intersection(
+        user_agent.encode("ascii", "replace").translate(_WORD_BYTES).split()
+    )
+    browser = _first(_BROWSERS, words)
+    system = _first(_SYSTEMS, words)
+
+    # iPads send "Mobile" and Android tablets omit it
+    mobile = b"mobile" in words or b"mobi" in words
+    if b"ipad" in words or b"tablet" in words or (system == "Android" and not mobile):
+        device = "Tablet"
+    elif mobile or system in ("Android", "iOS"):
+        device = "Mobile"
+    else:
+        device = "Desktop"
+    return DeviceInfo(browser, system, device)
+
+
+def user_agent_hash(user_agent: str) -> bytes:
+    """Key of a User-Agent in the user_agents table"""
+    return hashlib.blake2b(user_agent.encode(), digest_size=16).digest()
+
+
+class UserAgentDictionary:
+    """user_agents row ids by raw User-Agent, for AuthSession.user_agent_id.
+
+    A User-Agent seen for the first time is upserted with its parsed
+    fields on the caller's session, in the same transaction as the login
+    that needs it, so no second pooled connection is taken. The id is
+    only cached by remember() once that transaction has committed: a
+    login that rolls back cannot leave an id in the cache that the
+    database never got. Every later login with the same browser costs no
+    statement.
+    """
+
+    def __init__(self, max_size: int = USER_AGENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.ids: "OrderedDict[bytes, int]" = OrderedDict()
+
+    async def intern(self, db: AsyncSession, user_agent: str) -> int:
+        user_agent_id = self.ids.get(user_agent_hash(user_agent))
+        if user_agent_id is not None:
+            return user_agent_id
+
+        device = parse_user_agent(user_agent)
+        statement = pg_insert(UserAgent).values(
+            ua_hash=user_agent_hash(user_agent),
+            user_agent=user_agent,
+            browser=device.browser,
+            os=device.os,
+            device=device.device
+        )
+        # A no-op update so RETURNING yields the id of an existing row too
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserAgent.ua_hash],
+            set_={"ua_hash": statement.excluded.ua_hash}
+        ).returning(UserAgent.id)
+        return (await db.execute(statement)).scalar_one()
+
+    def remember(self, user_agent: str, user_agent_id: int):
+        """Cache an id from intern() after the caller's commit"""
+        key = user_agent_hash(user_agent)
+        self.ids[key] = user_agent_id
+        self.ids.move_to_end(key)
+        while len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+
+
+user_agent_dictionary = UserAgentDictionary()
@@ -0,0 +1,242 @@
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.application import LoanApplication
+from app.models.user import AuthSession, User
+from app.services.rate_limiter import sweep_keys
+
+VELOCITY_WINDOW_SECONDS = float(os.getenv("VELOCITY_WINDOW_SECONDS", "3600"))
+# Applications per phone and per telegram_id within the window
+VELOCITY_PHONE_LIMIT = int(os.getenv("VELOCITY_PHONE_LIMIT", "3"))
+VELOCITY_TELEGRAM_LIMIT = int(os.getenv("VELOCITY_TELEGRAM_LIMIT", "3"))
+# Distinct telegram_ids submitting with one phone within the window
+VELOCITY_PHONE_ACCOUNTS_LIMIT = int(os.getenv("VELOCITY_PHONE_ACCOUNTS_LIMIT", "1"))
+# Logins (verified auth tokens) per client IP within the window
+VELOCITY_IP_LIMIT = int(os.getenv("VELOCITY_IP_LIMIT", "20"))
+# flag: record and let through; block: reject with 429
+VELOCITY_MODE = os.getenv("VELOCITY_MODE", "flag")
+
+
+class SlidingWindowCounter:
+    """Events per key over the last window_seconds.
+
+    A key keeps at most limit + 1 timestamps, oldest first: enough to tell
+    whether the limit is exceeded, so memory per key is bounded however
+    hot the key is. Expired timestamps are popped from the left on each
+    hit, which makes a hit O(1) amortized. Keys whose newest event left
+    the window are dropped by periodic sweeps, as in RateLimiter.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        limit: int,
+        max_keys: int = 100_000,
+        sweep_interval: float = 60
+    ):
+        self.window_seconds = window_seconds
+        self.limit = limit
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.events: Dict[str, deque] = {}
+        self._next_sweep = time.time() + sweep_interval
+
+    def hit(self, key: str, now: float) -> int:
+        """Record an event; returns the window count, capped at limit + 1"""
+        events = self.events.get(key)
+        if events is None:
+            if now >= self._next_sweep or len(self.events) >= self.max_keys:
+                self.cleanup_expired(now)
+            events = self.events[key] = deque(maxlen=self.limit + 1)
+
+        cutoff = now - self.window_seconds
+        while events and events[0] <= cutoff:
+            events.popleft()
+        events.append(now)
+        return len(events)
+
+    @staticmethod
+    def last_seen(events) -> float:
+        return events[-1]
+
+    def cleanup_expired(self, now: float):
+        """Remove keys with no events inside the window"""
+        cutoff = now - self.window_seconds
+        sweep_keys(self.events, lambda events: self.last_seen(events) <= cutoff, self.max_keys)
+        self._next_sweep = now + self.sweep_interval
+
+
+class DistinctWindowCounter(SlidingWindowCounter):
+    """Distinct members per key over the window (telegram_ids per phone).
+
+    Members are kept in last-seen order, so expired ones are popped from
+    the front and a repeat sighting is a move_to_end.
+    """
+
+    def hit(self, key: str, member, now: float) -> int:
+        """Record member under key; returns distinct members, capped at limit + 1"""
+        members = self.events.get(key)
+        if members is None:
+            if now >= self._next_sweep or len(self.events) >= self.max_keys:
+                self.cleanup_expired(now)
+            members = self.events[key] = OrderedDict()
+
+        cutoff = now - self.window_seconds
+        while members and next(iter(members.values())) <= cutoff:
+            members.popitem(last=False)
+        members[member] = now
+        members.move_to_end(member)
+        if len(members) > self.limit + 1:
+            members.popitem(last=False)
+        return len(members)
+
+    @staticmethod
+    def last_seen(members) -> float:
+        return next(reversed(members.values()))
+
+
+class VelocityIndex:
+    """Sliding-window velocity checks for application and login bursts.
+
+    Checks record the event and report every limit it exceeds, in O(1)
+    amortized, before any database work. Times are wall clock so the
+    index can be rebuilt from created_at columns after a restart.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        phone_limit: int = 3,
+        telegram_limit: int = 3,
+        phone_accounts_limit: int = 1,
+        ip_limit: int = 20,
+        mode: str = "flag"
+    ):
+        self.window_seconds = window_seconds
+        self.mode = mode
+        self.applications_by_phone = SlidingWindowCounter(window_seconds, phone_limit)
+        self.applications_by_telegram_id = SlidingWindowCounter(window_seconds, telegram_limit)
+        self.accounts_by_phone = DistinctWindowCounter(window_seconds, phone_accounts_limit)
+        self.logins_by_ip = SlidingWindowCounter(window_seconds, ip_limit)
+        self.counters = (
+            self.applications_by_phone,
+            self.applications_by_telegram_id,
+            self.accounts_by_phone,
+            self.logins_by_ip,
+        )
+        self.flagged = 0
+        self.blocked = 0
+
+    @property
+    def blocking(self) -> bool:
+        return self.mode == "block"
+
+    def _result(self, violations: List[str]) -> List[str]:
+        if violations:
+            if self.blocking:
+                self.blocked += 1
+            else:
+                self.flagged += 1
+        return violations
+
+    def _check(self, name: str, counter: SlidingWindowCounter, count: int) -> Optional[str]:
+        if count > counter.limit:
+            return f"{name} over {counter.limit} in {self.window_seconds:g}s"
+        return None
+
+    def check_application(
+        self,
+        phone: Optional[str],
+        telegram_id: int,
+        now: Optional[float] = None,
+        count: bool = True
+    ) -> List[str]:
+        """Record an application attempt; returns the limits it exceeds"""
+        if now is None:
+            now = time.time()
+
+        checks = [(
+            "applications per telegram_id",
+            self.applications_by_telegram_id,
+            self.applications_by_telegram_id.hit(str(telegram_id), now)
+        )]
+        if phone:
+            checks.append((
+                "applications per phone",
+                self.applications_by_phone,
+                self.applications_by_phone.hit(phone, now)
+            ))
+            checks.append((
+                "telegram accounts per phone",
+                self.accounts_by_phone,
+                self.accounts_by_phone.hit(phone, telegram_id, now)
+            ))
+
+        violations = [v for v in (self._check(*check) for check in checks) if v]
+        return self._result(violations) if count else violations
+
+    def check_login(self, ip: str, now: Optional[float] = None, count: bool = True) -> List[str]:
+        """Record a login from a client IP; returns the limits it exceeds"""
+        if now is None:
+            now = time.time()
+        violation = self._check("logins per IP", self.logins_by_ip, self.logins_by_ip.hit(ip, now))
+        violations = [violation] if violation else []
+        return self._result(violations) if count else violations
+
+    async def rebuild(self, db: AsyncSession):
+        """Replay the last window of applications and sessions from the DB.
+
+        Attempts that were blocked never reached the database, so after a
+        restart the index only knows about accepted ones.
+        """
+        since = datetime.fromtimestamp(time.time() - self.window_seconds, tz=timezone.utc)
+        for counter in self.counters:
+            counter.events.clear()
+
+        applications = await db.execute(
+            select(User.phone_normalized, User.telegram_id, LoanApplication.created_at)
+            .join(User, User.id == LoanApplication.user_id)
+            .where(LoanApplication.created_at >= since)
+            .order_by(LoanApplication.created_at)
+        )
+        replayed = 0
+        for phone, telegram_id, created_at in applications:
+            self.check_application(phone, telegram_id, created_at.timestamp(), count=False)
+            replayed += 1
+
+        logins = await db.execute(
+            select(AuthSession.ip_address, AuthSession.created_at)
+            .where(AuthSession.created_at >= since, AuthSession.ip_address.is_not(None))
+            .order_by(AuthSession.created_at)
+        )
+        for ip, created_at in logins:
+            self.check_login(ip, created_at.timestamp(), count=False)
+            replayed += 1
+        return replayed
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "window_seconds": self.window_seconds,
+            "flagged": self.flagged,
+            "blocked": self.blocked,
+            "tracked_phones": len(self.applications_by_phone.events),
+            "tracked_telegram_ids": len(self.applications_by_telegram_id.events),
+            "tracked_ips": len(self.logins_by_ip.events),
+        }
+
+
+velocity_index = VelocityIndex(
+    window_seconds=VELOCITY_WINDOW_SECONDS,
+    phone_limit=VELOCITY_PHONE_LIMIT,
+    telegram_limit=VELOCITY_TELEGRAM_LIMIT,
+    phone_accounts_limit=VELOCITY_PHONE_ACCOUNTS_LIMIT,
+    ip_limit=VELOCITY_IP_LIMIT,
+    mode=VELOCITY_MODE
+)
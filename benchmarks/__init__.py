@@ -0,0 +1,4 @@
+# Micro-benchmarks for hot paths. Run from the repository root, e.g.:
+#   python -m benchmarks.bench_rate_limiter
+# Regression suite with stored baselines (benchmarks/baseline.json):
+#   python -m benchmarks.suite
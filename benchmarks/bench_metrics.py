@@ -0,0 +1,73 @@
+"""
+Per-request overhead of the metrics middleware and engine hooks
+
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+
+from app.services.metrics import Histogram, MetricsMiddleware, MetricsRegistry, RequestStats, current_request
+from benchmarks.timing import per_call_ns, report
+
+
+class _Route:
+    path = "/api/users/me"
+
+
+async def _endpoint(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    pass
+
+
+def _run_requests(app, count: int) -> float:
+    """Mean ns per request for count sequential requests on one loop"""
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(count):
+            await app({"type": "http", "method": "GET", "path": "/api/users/me"}, _receive, _send)
+        return (loop.time() - started) / count * 1e9
+
+    return min(asyncio.run(run()) for _ in range(5))
+
+
+def main():
+    print("Metrics")
+
+    histogram = Histogram()
+    report("Histogram.observe", per_call_ns(lambda: histogram.observe(0.0123)))
+
+    stats = RequestStats()
+    current_request.set(stats)
+
+    def on_statement():
+        # What after_cursor_execute adds per statement
+        request_stats = current_request.get()
+        if request_stats is not None:
+            request_stats.db_seconds += 0.0001
+            request_stats.db_statements += 1
+
+    report("per-statement request accounting", per_call_ns(on_statement))
+
+    bare = _run_requests(_endpoint, 100_000)
+    wrapped = _run_requests(MetricsMiddleware(_endpoint, MetricsRegistry()), 100_000)
+    report("request, bare ASGI app", bare)
+    report("request, with MetricsMiddleware", wrapped)
+    report("middleware overhead per request", wrapped - bare)
+
+    registry = MetricsRegistry()
+    for i in range(50):
+        registry.route("GET", f"/api/route/{i}").latency.observe(0.01)
+    report("render, 50 routes", per_call_ns(registry.render, number=1_000))
+
+
+if __name__ == "__main__":
+    main()
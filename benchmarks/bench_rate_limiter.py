@@ -0,0 +1,48 @@
+"""
+Per-request cost of the token issuance rate limiter
+
+    python -m benchmarks.bench_rate_limiter
+"""
+import itertools
+import tracemalloc
+
+from app.services.rate_limiter import RateLimiter
+from benchmarks.timing import per_call_ns, report
+
+
+def main():
+    print("RateLimiter.hit")
+
+    # Same client over and over, always allowed
+    limiter = RateLimiter(rate=1e9, burst=10)
+    report("hit, existing key, allowed", per_call_ns(lambda: limiter.hit("10.0.0.1")))
+
+    # Same client over and over, always limited
+    limiter = RateLimiter(rate=1e-9, burst=1)
+    limiter.hit("10.0.0.1")
+    report("hit, existing key, limited", per_call_ns(lambda: limiter.hit("10.0.0.1")))
+
+    # Every request from a new client (worst case for memory)
+    limiter = RateLimiter(rate=1, burst=10, max_keys=100_000)
+    counter = itertools.count()
+    for _ in range(100_000):
+        limiter.hit(f"ip:{next(counter)}")
+    report(
+        "hit, new key every call (capped at 100k keys)",
+        per_call_ns(lambda: limiter.hit(f"ip:{next(counter)}"))
+    )
+
+    # Memory per tracked key
+    tracemalloc.start()
+    limiter = RateLimiter(rate=1, burst=10, max_keys=1_000_000)
+    keys = [f"ip:{i}" for i in range(100_000)]
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        limiter.hit(key)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{'memory per key (excluding key string)':<50} {(after - before) / len(keys):>12,.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
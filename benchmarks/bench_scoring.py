@@ -0,0 +1,53 @@
+"""
+Scoring throughput per core
+
+    python -m benchmarks.bench_scoring
+
+BLAS threading is pinned to one thread so the numbers are per core.
+"""
+import os
+
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(variable, "1")
+
+import time
+
+import numpy as np
+
+from app.services.scoring import DEFAULT_MODEL
+
+
+def synthetic_applications(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    loan_amount = rng.uniform(1_000, 50_000_000, count)
+    loan_term = rng.choice([3, 6, 9, 12, 18, 24, 36, 48, 60], count)
+    monthly_income = rng.uniform(0, 30_000_000, count)
+    return loan_amount, loan_term, monthly_income
+
+
+def throughput(count: int, repeat: int = 5) -> float:
+    columns = synthetic_applications(count)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        DEFAULT_MODEL.score(*columns)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main():
+    print("ScoringModel.score, vectorized, 1 core")
+    for count in (1, 100, 10_000, 100_000, 1_000_000):
+        print(f"{count:>10,} applications per call {throughput(count):>16,.0f} applications/s")
+
+    # Row-at-a-time calls, as a loop over single applications would do
+    loan_amount, loan_term, monthly_income = synthetic_applications(10_000)
+    start = time.perf_counter()
+    for i in range(len(loan_amount)):
+        DEFAULT_MODEL.score(loan_amount[i:i + 1], loan_term[i:i + 1], monthly_income[i:i + 1])
+    elapsed = time.perf_counter() - start
+    print(f"{'one call per application':>35} {len(loan_amount) / elapsed:>16,.0f} applications/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Response serialization: FastAPI default path vs FastJSONResponse
+
+    python -m benchmarks.bench_serialization
+
+"default" is what FastAPI does for a handler that returns a model or dict:
+response_model re-validation / jsonable_encoder, then json.dumps in
+JSONResponse. "fast" is a handler returning FastJSONResponse directly.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.bot import serialize_bot_user
+from app.api.responses import FastJSONResponse, dump_json
+from app.main import app
+from app.models.application import ApplicationStatus, LoanApplication
+from app.models.schemas import AuthSession as AuthSessionSchema, VerifyTokenResponse
+from app.models.user import AuthSession, User
+
+ITERATIONS = 20_000
+
+
+def build_fixtures():
+    now = datetime.now(timezone.utc)
+    user = User(
+        id=42,
+        telegram_id=5_123_456_789,
+        phone_number="+998901234567",
+        username="borrower",
+        first_name="Ivan",
+        last_name="Petrov",
+        created_at=now,
+        updated_at=now
+    )
+    session = AuthSession(
+        id=7,
+        token="x" * 160,
+        user_id=user.id,
+        user_agent_id=3,
+        ip_address="203.0.113.10",
+        is_active=True,
+        created_at=now,
+        expires_at=now + timedelta(days=7),
+        user=user
+    )
+    user.applications = [
+        LoanApplication(
+            id=i,
+            user_id=user.id,
+            loan_amount=5_000_000.0 + i,
+            loan_term=12,
+            loan_purpose="Ремонт",
+            monthly_income=8_000_000.0,
+            status=ApplicationStatus.PENDING,
+            created_at=now
+        )
+        for i in range(5)
+    ]
+    verify_response = VerifyTokenResponse(
+        access_token=session.token,
+        user=user,
+        # As verify_auth_token fills it: User-Agent fields come from user_agents
+        session=AuthSessionSchema.model_validate(session).model_copy(update={
+            "user_agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15",
+            "device_info": '{"browser": "Safari", "os": "iOS", "device": "Mobile"}'
+        }),
+        device_info={"browser": "Safari", "os": "iOS", "device": "Mobile"}
+    )
+    return verify_response, serialize_bot_user(user)
+
+
+def response_field(path: str):
+    for route in app.routes:
+        if getattr(route, "path", None) == path:
+            return route.response_field
+    raise LookupError(path)
+
+
+async def measure(name: str, make_response):
+    body_bytes = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        response = await make_response()
+        body_bytes += len(response.body)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    print(
+        f"{name:<40} {cpu / ITERATIONS * 1e6:>8.1f} us CPU/response"
+        f" {body_bytes / wall / 1e6:>8.1f} MB/s"
+        f" {body_bytes // ITERATIONS:>6} bytes"
+    )
+
+
+async def main():
+    verify_response, bot_user = build_fixtures()
+    verify_field = response_field("/api/auth/verify/{token}")
+
+    async def verify_default():
+        content = await serialize_response(field=verify_field, response_content=verify_response)
+        return JSONResponse(content)
+
+    async def verify_fast():
+        return FastJSONResponse(dump_json(verify_response))
+
+    async def verify_fast_compact():
+        return FastJSONResponse(dump_json(verify_response, exclude={"session": {"user"}}))
+
+    async def bot_user_default():
+        return JSONResponse(jsonable_encoder(bot_user))
+
+    async def bot_user_fast():
+        return FastJSONResponse(bot_user)
+
+    print("VerifyTokenResponse")
+    await measure("default (response_model + json.dumps)", verify_default)
+    await measure("fast", verify_fast)
+    await measure("fast, compact (no session.user)", verify_fast_compact)
+    print("Bot user payload")
+    await measure("default (jsonable_encoder + json.dumps)", bot_user_default)
+    await measure("fast", bot_user_fast)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
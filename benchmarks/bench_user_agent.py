@@ -0,0 +1,161 @@
+"""
+User-Agent classification: the previous substring scans vs parse_user_agent
+
+    python -m benchmarks.bench_user_agent
+
+Prints each implementation's answer for common User-Agents next to the
+expected one, then the per-call cost: the old function, the single-pass
+parser without its cache (a User-Agent seen for the first time) and with
+it (every later login from the same browser).
+"""
+from app.services.user_agent import DeviceInfo, parse_user_agent
+from benchmarks.timing import autorange_ns, report
+
+# (label, User-Agent, expected browser/os/device)
+USER_AGENTS = (
+    (
+        "Chrome, Windows",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+        DeviceInfo("Chrome", "Windows", "Desktop"),
+    ),
+    (
+        "Chrome, macOS",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+        DeviceInfo("Chrome", "macOS", "Desktop"),
+    ),
+    (
+        "Safari, macOS",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.5 Safari/605.1.15",
+        DeviceInfo("Safari", "macOS", "Desktop"),
+    ),
+    (
+        "Safari, iPhone",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+        DeviceInfo("Safari", "iOS", "Mobile"),
+    ),
+    (
+        "Safari, iPad",
+        "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+        DeviceInfo("Safari", "iOS", "Tablet"),
+    ),
+    (
+        "Chrome, iPhone",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) CriOS/126.0.6478.54 Mobile/15E148 Safari/604.1",
+        DeviceInfo("Chrome", "iOS", "Mobile"),
+    ),
+    (
+        "Telegram, iPhone",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Mobile/15E148",
+        DeviceInfo("Unknown", "iOS", "Mobile"),
+    ),
+    (
+        "Chrome, Android",
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.6478.71 Mobile Safari/537.36",
+        DeviceInfo("Chrome", "Android", "Mobile"),
+    ),
+    (
+        "Telegram WebView, Android",
+        "Mozilla/5.0 (Linux; Android 14; SM-S918B Build/UP1A.231005.007; wv) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Version/4.0 Chrome/126.0.6478.71 Mobile Safari/537.36 Telegram-Android/11.0.0",
+        DeviceInfo("Chrome", "Android", "Mobile"),
+    ),
+    (
+        "Chrome, Android tablet",
+        "Mozilla/5.0 (Linux; Android 13; SM-X710) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+        DeviceInfo("Chrome", "Android", "Tablet"),
+    ),
+    (
+        "Edge, Windows",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36 Edg/126.0.2592.68",
+        DeviceInfo("Edge", "Windows", "Desktop"),
+    ),
+    (
+        "Yandex, Windows",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0.0.0 YaBrowser/24.6.0.0 Safari/537.36",
+        DeviceInfo("Yandex", "Windows", "Desktop"),
+    ),
+    (
+        "Firefox, Linux",
+        "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0",
+        DeviceInfo("Firefox", "Linux", "Desktop"),
+    ),
+)
+
+
+def legacy_extract_device_info(user_agent: str) -> dict:
+    """extract_device_info before parse_user_agent, for comparison"""
+    device_info = {
+        "user_agent": user_agent,
+        "browser": "Unknown",
+        "os": "Unknown",
+        "device": "Unknown"
+    }
+    user_agent_lower = user_agent.lower()
+    if "chrome" in user_agent_lower:
+        device_info["browser"] = "Chrome"
+    elif "firefox" in user_agent_lower:
+        device_info["browser"] = "Firefox"
+    elif "safari" in user_agent_lower:
+        device_info["browser"] = "Safari"
+    elif "edge" in user_agent_lower:
+        device_info["browser"] = "Edge"
+    if "windows" in user_agent_lower:
+        device_info["os"] = "Windows"
+    elif "mac" in user_agent_lower:
+        device_info["os"] = "macOS"
+    elif "linux" in user_agent_lower:
+        device_info["os"] = "Linux"
+    elif "android" in user_agent_lower:
+        device_info["os"] = "Android"
+    elif "ios" in user_agent_lower:
+        device_info["os"] = "iOS"
+    if "mobile" in user_agent_lower or "android" in user_agent_lower:
+        device_info["device"] = "Mobile"
+    elif "tablet" in user_agent_lower or "ipad" in user_agent_lower:
+        device_info["device"] = "Tablet"
+    else:
+        device_info["device"] = "Desktop"
+    return device_info
+
+
+def _describe(browser: str, os: str, device: str) -> str:
+    return f"{browser}/{os}/{device}"
+
+
+def main():
+    print(f"{'user agent':<28} {'expected':<26} {'legacy':<26} {'parse_user_agent':<26}")
+    legacy_wrong = new_wrong = 0
+    for label, user_agent, expected in USER_AGENTS:
+        legacy = legacy_extract_device_info(user_agent)
+        parsed = parse_user_agent.__wrapped__(user_agent)
+        legacy_wrong += legacy["browser"] != expected.browser or legacy["os"] != expected.os or legacy["device"] != expected.device
+        new_wrong += parsed != expected
+        print(
+            f"{label:<28} {_describe(expected.browser, expected.os, expected.device):<26} "
+            f"{_describe(legacy['browser'], legacy['os'], legacy['device']):<26} "
+            f"{_describe(parsed.browser, parsed.os, parsed.device):<26}"
+        )
+    print(f"misclassified: legacy {legacy_wrong}/{len(USER_AGENTS)}, parse_user_agent {new_wrong}/{len(USER_AGENTS)}")
+    print()
+
+    uncached = parse_user_agent.__wrapped__
+    for label, user_agent, _ in USER_AGENTS[:1] + USER_AGENTS[7:9]:
+        print(label)
+        report("  legacy substring scans", autorange_ns(lambda: legacy_extract_device_info(user_agent)))
+        report("  parse_user_agent, first time (uncached)", autorange_ns(lambda: uncached(user_agent)))
+        report("  parse_user_agent, cached", autorange_ns(lambda: parse_user_agent(user_agent)))
+
+
+if __name__ == "__main__":
+    main()
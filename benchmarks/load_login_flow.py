@@ -0,0 +1,299 @@
+"""
+End-to-end load test of the Telegram login flow against a local server
+
+Each virtual user runs the full flow once:
+
+    POST /api/bot/auth/init -> POST /api/bot/auth/complete
+    -> GET /api/auth/verify/{token} -> GET /api/users/me
+
+Starts uvicorn against DATABASE_URL (a local Postgres) with rate limits
+raised out of the way, or drives an already running server with
+--base-url. Prints throughput and p50/p95/p99 per step and saves the
+same numbers as JSON for comparing releases. Needs aiohttp
+(pip install -r requirements-dev.txt).
+
+The server runs a single worker: auth tokens from /auth/complete live in
+the memory of the process that issued them, so with several workers a
+verify landing on another process fails.
+
+    python -m benchmarks.load_login_flow --users 2000 --concurrency 50
+    python -m benchmarks.load_login_flow --base-url http://localhost:8000 --bot-token ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from app.services.latency import latency_percentiles
+
+STEPS = ("auth_init", "auth_complete", "auth_verify", "users_me")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0.0.0 Mobile Safari/537.36"
+)
+
+# Server environment: limits that would otherwise throttle a single client IP
+SERVER_ENV = {
+    "AUTH_RATE_LIMIT_PER_MINUTE": "1000000000",
+    "AUTH_RATE_LIMIT_BURST": "1000000000",
+    "BOT_RATE_LIMIT_PER_SECOND": "1000000000",
+    "BOT_RATE_LIMIT_BURST": "1000000000",
+    "VELOCITY_IP_LIMIT": "1000000000",
+}
+
+
+class StepFailed(Exception):
+    pass
+
+
+class FlowStats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {step: [] for step in STEPS}
+        self.errors: Dict[str, Dict[str, int]] = {step: {} for step in STEPS}
+        self.completed_flows = 0
+        self.failed_flows = 0
+
+    def error(self, step: str, reason: str):
+        self.errors[step][reason] = self.errors[step].get(reason, 0) + 1
+
+
+async def _step(
+    stats: FlowStats,
+    step: str,
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    **kwargs
+) -> dict:
+    started = time.perf_counter()
+    try:
+        async with session.request(method, url, **kwargs) as resp:
+            body = await resp.read()
+            elapsed = time.perf_counter() - started
+            if resp.status != 200:
+                stats.error(step, str(resp.status))
+                raise StepFailed
+    except aiohttp.ClientError as e:
+        stats.error(step, type(e).__name__)
+        raise StepFailed
+    stats.latency[step].append(elapsed)
+    return json.loads(body)
+
+
+async def run_flow(
+    stats: FlowStats,
+    session: aiohttp.ClientSession,
+    base_url: str,
+    bot_token: str,
+    telegram_id: int
+):
+    bot_headers = {"X-Bot-Token": bot_token}
+
+    init = await _step(
+        stats, "auth_init", session, "POST", f"{base_url}/api/bot/auth/init",
+        headers=bot_headers,
+        json={
+            "loan_amount": 50000,
+            "loan_term": 12,
+            "loan_purpose": "Load test",
+            "monthly_income": 80000,
+        }
+    )
+    auth_token = init["auth_token"]
+
+    await _step(
+        stats, "auth_complete", session, "POST", f"{base_url}/api/bot/auth/complete",
+        headers=bot_headers,
+        json={
+            "auth_token": auth_token,
+            "telegram_id": telegram_id,
+            # One phone per user, so velocity checks see no shared phones
+            "phone": f"+1555{telegram_id % 10_000_000:07d}",
+            "first_name": "Load",
+            "last_name": "Test",
+            "username": f"load{telegram_id}",
+        }
+    )
+
+    verified = await _step(
+        stats, "auth_verify", session, "GET", f"{base_url}/api/auth/verify/{auth_token}",
+        headers={"User-Agent": USER_AGENT},
+        params={"compact": "true"}
+    )
+
+    await _step(
+        stats, "users_me", session, "GET", f"{base_url}/api/users/me",
+        headers={"Authorization": f"Bearer {verified['access_token']}", "User-Agent": USER_AGENT}
+    )
+
+
+async def run_load(
+    base_url: str,
+    bot_token: str,
+    users: int,
+    concurrency: int,
+    telegram_id_base: int
+) -> dict:
+    stats = FlowStats()
+    next_user = iter(range(users))
+
+    async def virtual_user(session: aiohttp.ClientSession):
+        for index in next_user:
+            try:
+                await run_flow(stats, session, base_url, bot_token, telegram_id_base + index)
+                stats.completed_flows += 1
+            except StepFailed:
+                stats.failed_flows += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    requests = sum(len(samples) for samples in stats.latency.values())
+    return {
+        "duration_seconds": elapsed,
+        "completed_flows": stats.completed_flows,
+        "failed_flows": stats.failed_flows,
+        "flows_per_second": stats.completed_flows / elapsed,
+        "requests_per_second": requests / elapsed,
+        "steps": {
+            step: {
+                "requests": len(stats.latency[step]),
+                "errors": stats.errors[step],
+                "latency_seconds": latency_percentiles(stats.latency[step]),
+            }
+            for step in STEPS
+        },
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _wait_until_ready(base_url: str, bot_token: str, server: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                async with session.get(
+                    f"{base_url}/api/bot/health", headers={"X-Bot-Token": bot_token}
+                ) as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {timeout:g}s")
+
+
+def start_server(port: int, bot_token: str, log_path: str) -> subprocess.Popen:
+    env = {**os.environ, **SERVER_ENV, "BOT_API_KEY": bot_token}
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--no-access-log",
+        ],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+
+
+def print_report(result: dict):
+    print(
+        f"{result['completed_flows']} flows ok, {result['failed_flows']} failed "
+        f"in {result['duration_seconds']:.1f}s: "
+        f"{result['flows_per_second']:,.1f} flows/s, {result['requests_per_second']:,.1f} req/s"
+    )
+    print(f"{'step':<16} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  errors")
+    for step, data in result["steps"].items():
+        latency = data["latency_seconds"]
+        columns = " ".join(
+            f"{latency[key] * 1000:>9.1f}" if latency[key] is not None else f"{'-':>9}"
+            for key in ("p50", "p95", "p99", "max")
+        )
+        print(f"{step:<16} {data['requests']:>9} {columns}  {data['errors'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500, help="login flows to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="flows in flight")
+    parser.add_argument("--base-url", help="use a running server instead of starting one")
+    parser.add_argument("--bot-token", default=os.getenv("BOT_API_KEY"), help="X-Bot-Token for --base-url")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-log", default="load_login_flow.server.log")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--output", help="JSON results file (default: load_login_flow-<timestamp>.json)")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        if not args.bot_token:
+            parser.error("--bot-token (or BOT_API_KEY) is required with --base-url")
+        base_url = args.base_url.rstrip("/")
+        bot_token = args.bot_token
+    else:
+        if not os.getenv("DATABASE_URL"):
+            parser.error("DATABASE_URL must point at a local Postgres")
+        base_url = f"http://127.0.0.1:{args.port}"
+        bot_token = secrets.token_urlsafe(16)
+        server = start_server(args.port, bot_token, args.server_log)
+
+    started_at = datetime.now(timezone.utc)
+    # Telegram ids unique per run, so every flow creates a new user
+    telegram_id_base = int(started_at.timestamp()) * 100_000
+
+    try:
+        if server is not None:
+            asyncio.run(_wait_until_ready(base_url, bot_token, server, args.startup_timeout))
+        result = asyncio.run(
+            run_load(base_url, bot_token, args.users, args.concurrency, telegram_id_base)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result = {
+        "started_at": started_at.isoformat(),
+        "git_revision": _git_revision(),
+        "base_url": base_url if args.base_url else None,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        **result,
+    }
+    print_report(result)
+
+    output = args.output or f"load_login_flow-{started_at:%Y%m%dT%H%M%S}.json"
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Micro-benchmark suite for hot functions, checked against stored baselines
+
+    python -m benchmarks.suite                     # compare with baseline.json
+    python -m benchmarks.suite -k token            # only cases containing "token"
+    python -m benchmarks.suite --update-baseline   # record new baselines
+
+A case regresses when it is slower than its baseline by more than its
+threshold (--threshold, or the per-case value in the baseline file); the
+exit status is then 1. A case over its threshold is measured again up
+to --retries times and its best run counts, so a passing burst of
+machine noise does not fail the suite. Baselines are per machine:
+record them on the machine that runs the comparison, and commit them
+with the change that moved the numbers.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+import jwt
+from starlette.requests import Request
+
+from app.api.auth import JWT_ALGORITHM, JWT_SECRET, extract_device_info, get_client_ip
+from app.api.responses import FastJSONResponse, dump_json
+from app.api.users import get_bearer_claims
+from app.models.schemas import BotUserResponse
+from app.services.auth_service import AuthTokenService
+from app.services.user_agent import parse_user_agent
+from benchmarks.bench_serialization import build_fixtures
+from benchmarks.timing import autorange_ns
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.3
+TOKEN_STORE_SIZES = (10_000, 100_000, 1_000_000)
+
+USER_AGENTS = {
+    "desktop chrome": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "iphone safari": (
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+    ),
+    "android telegram webview": (
+        "Mozilla/5.0 (Linux; Android 14; SM-S918B Build/UP1A.231005.007; wv) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Version/4.0 Chrome/126.0.6478.71 Mobile Safari/537.36 Telegram-Android/11.0.0"
+    ),
+}
+
+# A case returns its per-call cost in nanoseconds
+Case = Tuple[str, Callable[[], float]]
+
+
+def _request(headers: Dict[str, str], client: Tuple[str, int] = ("198.51.100.7", 51234)) -> dict:
+    """ASGI scope for a fresh Request per call, as every request parses its own headers"""
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": client,
+    }
+
+
+def request_cases() -> List[Case]:
+    cases: List[Case] = []
+    for label, user_agent in USER_AGENTS.items():
+        cases.append((
+            f"extract_device_info, {label}",
+            lambda user_agent=user_agent: autorange_ns(lambda: extract_device_info(user_agent))
+        ))
+        cases.append((
+            f"parse_user_agent, {label}, uncached",
+            lambda user_agent=user_agent: autorange_ns(lambda: parse_user_agent.__wrapped__(user_agent))
+        ))
+
+    for label, headers in (
+        ("x-forwarded-for", {"X-Forwarded-For": "203.0.113.10, 10.0.0.2", "User-Agent": "x"}),
+        ("x-real-ip", {"X-Real-IP": "203.0.113.10", "User-Agent": "x"}),
+        ("client address", {"User-Agent": "x"}),
+    ):
+        scope = _request(headers)
+        cases.append((
+            f"get_client_ip, {label}",
+            lambda scope=scope: autorange_ns(lambda: get_client_ip(Request(scope)))
+        ))
+    return cases
+
+
+def jwt_cases() -> List[Case]:
+    def payload():
+        # As issued by verify_auth_token
+        return {
+            "user_id": 42,
+            "telegram_id": 5_123_456_789,
+            "exp": datetime.utcnow() + timedelta(hours=168),
+        }
+
+    token = jwt.encode(payload(), JWT_SECRET, algorithm=JWT_ALGORITHM)
+    scope = _request({"Authorization": f"Bearer {token}"})
+    return [
+        ("jwt.encode, session token", lambda: autorange_ns(
+            lambda: jwt.encode(payload(), JWT_SECRET, algorithm=JWT_ALGORITHM)
+        )),
+        ("jwt.decode, session token", lambda: autorange_ns(
+            lambda: jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        )),
+        ("get_bearer_claims (header + decode)", lambda: autorange_ns(
+            lambda: get_bearer_claims(Request(scope))
+        )),
+    ]
+
+
+def _filled_token_service(size: int) -> Tuple[AuthTokenService, List[str]]:
+    service = AuthTokenService()
+    loan_data = {"loan_amount": 50000, "loan_term": 12, "loan_purpose": "x", "monthly_income": 80000}
+    tokens = [service.create_auth_token(loan_data) for _ in range(size)]
+    for user_id, token in enumerate(tokens):
+        service.set_user_for_token(token, user_id)
+    return service, tokens
+
+
+def _consuming_ns(make_args: Callable[[int], list], func: Callable, count: int, repeat: int = 10) -> float:
+    """Best-of-repeat cost of calls that consume their argument (e.g. delete a
+    token), with fresh arguments prepared outside the timed loop"""
+    best = float("inf")
+    for _ in range(repeat):
+        args = make_args(count)
+        started = time.perf_counter()
+        for arg in args:
+            func(arg)
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e9
+
+
+def token_service_cases(size: int) -> List[Case]:
+    state: Dict[str, object] = {}
+
+    def service() -> Tuple[AuthTokenService, str]:
+        # Built lazily, so filtered runs do not pay for every store size
+        if state.get("size") != size:
+            state["service"], tokens = _filled_token_service(size)
+            state["token"] = tokens[size // 2]
+            state["size"] = size
+        return state["service"], state["token"]
+
+    # Calls that add or remove tokens run in batches of about 1% of the
+    # store, so its size barely moves while they are measured
+    batch = max(size // 100, 1_000)
+    loan_data = {"loan_amount": 50000}
+
+    def create():
+        svc, _ = service()
+        created: List[str] = []
+
+        def create_one(_):
+            created.append(svc.create_auth_token(loan_data))
+
+        ns = _consuming_ns(lambda count: range(count), create_one, batch)
+        for token in created:
+            svc.cleanup_auth_token(token)
+        return ns
+
+    def cleanup():
+        svc, _ = service()
+
+        def make_tokens(count):
+            tokens = [svc.create_auth_token(loan_data) for _ in range(count)]
+            for token in tokens:
+                svc.set_user_for_token(token, 1)
+            return tokens
+
+        return _consuming_ns(make_tokens, svc.cleanup_auth_token, batch)
+
+    def set_user():
+        svc, token = service()
+        return autorange_ns(lambda: svc.set_user_for_token(token, 7))
+
+    def lookup(method: str):
+        def run():
+            svc, token = service()
+            bound = getattr(svc, method)
+            return autorange_ns(lambda: bound(token))
+        return run
+
+    def cleanup_expired():
+        svc, _ = service()
+        # Nothing has expired: a full scan that removes no tokens
+        ns = autorange_ns(svc.cleanup_expired_tokens, repeat=5)
+        # Last case for this size: free the store before the next one
+        state.clear()
+        return ns
+
+    label = f"{size // 1000}k" if size < 1_000_000 else f"{size // 1_000_000}M"
+    return [
+        (f"AuthTokenService.create_auth_token, {label}", create),
+        (f"AuthTokenService.verify_auth_token, {label}", lookup("verify_auth_token")),
+        (f"AuthTokenService.get_loan_data, {label}", lookup("get_loan_data")),
+        (f"AuthTokenService.set_user_for_token, {label}", set_user),
+        (f"AuthTokenService.get_user_by_token, {label}", lookup("get_user_by_token")),
+        (f"AuthTokenService.cleanup_auth_token, {label}", cleanup),
+        (f"AuthTokenService.cleanup_expired_tokens, {label}", cleanup_expired),
+    ]
+
+
+def serialization_cases() -> List[Case]:
+    verify_response, bot_user = build_fixtures()
+    bot_user_response = BotUserResponse.model_validate(bot_user)
+    return [
+        ("VerifyTokenResponse, dump_json", lambda: autorange_ns(
+            lambda: dump_json(verify_response)
+        )),
+        ("VerifyTokenResponse, dump_json compact", lambda: autorange_ns(
+            lambda: dump_json(verify_response, exclude={"session": {"user"}})
+        )),
+        ("BotUserResponse, model_validate", lambda: autorange_ns(
+            lambda: BotUserResponse.model_validate(bot_user)
+        )),
+        ("BotUserResponse, model_dump_json", lambda: autorange_ns(
+            bot_user_response.model_dump_json
+        )),
+        ("bot user payload, FastJSONResponse", lambda: autorange_ns(
+            lambda: FastJSONResponse(bot_user)
+        )),
+    ]
+
+
+def all_cases() -> List[Case]:
+    cases = request_cases() + jwt_cases()
+    for size in TOKEN_STORE_SIZES:
+        cases += token_service_cases(size)
+    return cases + serialization_cases()
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+    }
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"cases": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, help=f"allowed slowdown (default: baseline file or {DEFAULT_THRESHOLD})")
+    parser.add_argument("--update-baseline", action="store_true", help="store the measured numbers as the baseline")
+    parser.add_argument("--retries", type=int, default=3, help="re-measurements of a case over its threshold")
+    parser.add_argument("--output", help="also write the measured numbers as JSON")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    default_threshold = args.threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+    if baseline.get("machine") and baseline["machine"] != machine() and not args.update_baseline:
+        print(f"Note: baseline recorded on {baseline['machine']}, comparing on {machine()}")
+
+    results: Dict[str, float] = {}
+    regressions: List[str] = []
+    print(f"{'case':<55} {'ns/call':>12} {'baseline':>12} {'change':>8}")
+    for name, measure in all_cases():
+        if args.pattern and args.pattern.lower() not in name.lower():
+            continue
+        ns = measure()
+
+        recorded = baseline["cases"].get(name)
+        if recorded is None or args.update_baseline:
+            results[name] = ns
+            previous = f"{recorded['ns']:>12,.0f}" if recorded else f"{'-':>12}"
+            print(f"{name:<55} {ns:>12,.0f} {previous} {'new':>8}")
+            continue
+        threshold = recorded.get("threshold", default_threshold)
+        for _ in range(args.retries):
+            if ns / recorded["ns"] - 1 <= threshold:
+                break
+            ns = min(ns, measure())
+        results[name] = ns
+
+        change = ns / recorded["ns"] - 1
+        flag = ""
+        if change > threshold:
+            flag = f"  REGRESSION (> {threshold:.0%})"
+            regressions.append(name)
+        print(f"{name:<55} {ns:>12,.0f} {recorded['ns']:>12,.0f} {change:>+8.0%}{flag}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "machine": machine(),
+                "cases": {name: {"ns": round(ns, 1)} for name, ns in results.items()},
+            }, f, indent=2)
+
+    if args.update_baseline:
+        for name, ns in results.items():
+            # Keep per-case thresholds tuned by hand
+            baseline["cases"].setdefault(name, {})["ns"] = round(ns, 1)
+        baseline["recorded_at"] = datetime.now(timezone.utc).isoformat()
+        baseline["machine"] = machine()
+        baseline.setdefault("threshold", DEFAULT_THRESHOLD)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
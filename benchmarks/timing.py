@@ -0,0 +1,36 @@
+"""
+Shared timing helpers for the benchmark scripts
+"""
+import timeit
+from typing import Callable
+
+
+def per_call_ns(func: Callable[[], object], number: int = 100_000, repeat: int = 5) -> float:
+    """Best-of-repeat cost of a single call in nanoseconds"""
+    timer = timeit.Timer(func)
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def report(name: str, ns: float):
+    """Print a single benchmark line"""
+    print(f"{name:<50} {ns:>12,.0f} ns/call")
+
+
+def autorange_ns(func: Callable[[], object], repeat: int = 20, min_seconds: float = 0.02) -> float:
+    """Best-of-repeat cost of a single call, with the loop count chosen so
+    each repeat runs for at least min_seconds.
+
+    Many short repeats rather than a few long ones: the minimum then
+    comes from a window the scheduler left alone, which keeps numbers
+    comparable across runs on shared machines.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_seconds:
+            break
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Скрипт для публикации модели скоринга в SCORING_MODEL_DIR.
+
+Записывает артефакт встроенной модели (или ее копии с другой версией)
+и переключает на него файл CURRENT. Запущенные воркеры подхватят новую
+версию без перезапуска.
+
+Использование: python publish_scoring_model.py [версия]
+"""
+import copy
+import os
+import sys
+from dotenv import load_dotenv
+
+# Загружаем переменные окружения до импорта app.services
+load_dotenv()
+
+from app.services.model_artifacts import model_registry, load_artifact
+from app.services.scoring import DEFAULT_MODEL
+
+
+def main():
+    if not model_registry.model_dir:
+        print("❌ SCORING_MODEL_DIR не задан")
+        sys.exit(1)
+    
+    model = DEFAULT_MODEL
+    if len(sys.argv) > 1:
+        model = copy.copy(DEFAULT_MODEL)
+        model.version = sys.argv[1]
+    
+    try:
+        os.makedirs(model_registry.model_dir, exist_ok=True)
+        print(f"🔄 Публикуем модель {model.version}...")
+        path = model_registry.publish(model)
+        # Проверяем, что артефакт читается
+        load_artifact(path)
+        print(f"✅ Готово: {path}")
+    except Exception as e:
+        print(f"❌ Ошибка при публикации модели: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
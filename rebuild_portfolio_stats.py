@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Скрипт для пересчета сводной таблицы portfolio_stats из loan_applications
+(исправление расхождений инкрементальной статистики)
+"""
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+# Загружаем переменные окружения до импорта app.database
+load_dotenv()
+
+from app.database import async_session, engine
+from app.services import portfolio_stats
+
+
+async def main():
+    """Пересчитываем статистику в одной транзакции"""
+    try:
+        async with async_session() as db:
+            print("🔄 Пересчитываем portfolio_stats...")
+            groups = await portfolio_stats.rebuild(db)
+            await db.commit()
+            print(f"✅ Готово: {groups} групп (день, статус, цель)")
+    except Exception as e:
+        print(f"❌ Ошибка при пересчете статистики: {e}")
+        sys.exit(1)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
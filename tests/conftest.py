@@ -0,0 +1,94 @@
+"""
+Shared fixtures.
+
+The app reads its settings when it is imported, so they are set here
+before any test module imports it. Tests that use the `client` fixture
+need a Postgres they may write to, named by TEST_DATABASE_URL
+(postgresql+asyncpg://...); without it they are skipped.
+"""
+import itertools
+import os
+import time
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+os.environ["BOT_API_KEY"] = "test-bot-key"
+os.environ["ADMIN_API_KEY"] = "test-admin-key"
+# Statements over a route's budget fail the request
+os.environ["QUERY_BUDGET_MODE"] = "strict"
+# Pipeline and automatic decisions stay at their default: off
+os.environ.pop("SCORING_PIPELINE_ENABLED", None)
+os.environ.pop("SCORING_AUTO_DECISIONS", None)
+os.environ["LOOP_MONITOR_ENABLED"] = "false"
+os.environ["TRACE_SAMPLE_RATE"] = "0"
+# Every request in a test run comes from the same client address
+os.environ["AUTH_RATE_LIMIT_BURST"] = "100000"
+os.environ["BOT_RATE_LIMIT_BURST"] = "100000"
+
+BOT_HEADERS = {"X-Bot-Token": "test-bot-key"}
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-key"}
+
+# Telegram ids unique per run, so every test creates new users
+_telegram_ids = itertools.count(int(time.time()) * 1000)
+
+
+@pytest.fixture(scope="session")
+def client():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def telegram_id() -> int:
+    return new_telegram_id()
+
+
+@pytest.fixture
+def auth_token(client, telegram_id) -> str:
+    return bot_login(client, telegram_id)
+
+
+@pytest.fixture
+def user_headers(client, auth_token) -> dict:
+    """Authorization header of a logged-in user"""
+    response = client.get(f"/api/auth/verify/{auth_token}")
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def new_telegram_id() -> int:
+    return next(_telegram_ids)
+
+
+def init_request() -> dict:
+    return {"loan_amount": 1000, "loan_term": 12, "loan_purpose": "car", "monthly_income": 500}
+
+
+def complete_request(auth_token: str, telegram_id: int) -> dict:
+    return {
+        "auth_token": auth_token,
+        "telegram_id": telegram_id,
+        "phone": f"+998{telegram_id % 10**9:09d}",
+        "first_name": "Test"
+    }
+
+
+def bot_login(client, telegram_id: int) -> str:
+    """Bot side of a login for a new user: the token the frontend verifies"""
+    response = client.post("/api/bot/auth/init", json=init_request(), headers=BOT_HEADERS)
+    assert response.status_code == 200
+    token = response.json()["auth_token"]
+
+    response = client.post("/api/bot/auth/complete", json=complete_request(token, telegram_id), headers=BOT_HEADERS)
+    assert response.status_code == 200
+    return token
@@ -0,0 +1,81 @@
+import time
+
+from app.services.bot_user_cache import BotUserCache
+
+
+def payload(user_id: int) -> dict:
+    return {"id": user_id, "phone_number": "+998900000000"}
+
+
+def test_get_returns_payload_and_etag():
+    cache = BotUserCache()
+    cache.put(1, payload(10), '"v1"')
+    assert cache.get(1) == (payload(10), '"v1"')
+    assert cache.get(2) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction():
+    cache = BotUserCache(max_size=2)
+    cache.put(1, payload(10), '"a"')
+    cache.put(2, payload(20), '"b"')
+    # Reading 1 makes 2 the least recently used
+    cache.get(1)
+    cache.put(3, payload(30), '"c"')
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+    assert 20 not in cache.telegram_id_by_user
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = BotUserCache(ttl_seconds=60)
+    cache.put(1, payload(10), '"a"')
+    now = time.monotonic() + 61
+    monkeypatch.setattr("app.services.bot_user_cache.time.monotonic", lambda: now)
+    assert cache.get(1) is None
+    assert not cache.entries
+    assert not cache.telegram_id_by_user
+
+
+def test_invalidate_user_by_primary_key():
+    cache = BotUserCache()
+    cache.put(1, payload(10), '"a"')
+    cache.invalidate_user(10)
+    assert cache.get(1) is None
+
+
+def test_fill_loaded_before_write_through_is_dropped():
+    cache = BotUserCache()
+    read_at = cache.clock()
+    # complete_bot_auth commits and writes through while the read is in flight
+    cache.put(1, payload(10), '"new"')
+    assert not cache.put(1, payload(10), '"old"', read_at=read_at)
+    assert cache.get(1)[1] == '"new"'
+    assert cache.stale_puts == 1
+
+
+def test_fill_loaded_before_invalidation_is_dropped():
+    cache = BotUserCache()
+    read_at = cache.clock()
+    # A status change for a user that is not cached yet
+    cache.invalidate_user(10)
+    assert not cache.put(1, payload(10), '"old"', read_at=read_at)
+    assert cache.get(1) is None
+
+
+def test_fill_after_unrelated_writes_is_stored():
+    cache = BotUserCache()
+    read_at = cache.clock()
+    cache.put(2, payload(20), '"b"')
+    cache.invalidate_user(30)
+    assert cache.put(1, payload(10), '"a"', read_at=read_at)
+    assert cache.get(1)[1] == '"a"'
+
+
+def test_fill_older_than_forgotten_stamps_is_dropped():
+    cache = BotUserCache(max_size=2)
+    read_at = cache.clock()
+    for telegram_id in range(2, 6):
+        cache.put(telegram_id, payload(telegram_id * 10), '"x"')
+    assert not cache.put(1, payload(10), '"a"', read_at=read_at)
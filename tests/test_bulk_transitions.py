@@ -0,0 +1,115 @@
+import json
+
+from conftest import ADMIN_HEADERS, BOT_HEADERS, bot_login, new_telegram_id
+
+TRANSITIONS = "/api/admin/applications/transitions"
+MISSING_ID = 2**31 - 1
+
+
+def new_application(client) -> int:
+    """A pending application of a new user"""
+    telegram_id = new_telegram_id()
+    bot_login(client, telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}", headers=BOT_HEADERS)
+    return response.json()["applications"][0]["id"]
+
+
+def transition(client, ids, from_status, to_status, **extra) -> dict:
+    response = client.post(
+        TRANSITIONS,
+        json={"ids": ids, "from_status": from_status, "to_status": to_status, **extra},
+        headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def exported(client, ids) -> dict:
+    """Stored rows by id, read through the admin export"""
+    response = client.get("/api/admin/applications/export", headers=ADMIN_HEADERS)
+    rows = (json.loads(line) for line in response.text.splitlines())
+    return {row["id"]: row for row in rows if row["id"] in ids}
+
+
+def portfolio_counts(client) -> dict:
+    response = client.get("/api/admin/stats/portfolio?group_by=status", headers=ADMIN_HEADERS)
+    return {item["status"]: item["application_count"] for item in response.json()["stats"]}
+
+
+def test_outcome_per_id(client):
+    first, second = new_application(client), new_application(client)
+    before = portfolio_counts(client)
+
+    body = transition(client, [first, MISSING_ID, second, first], "pending", "approved")
+    assert body["updated"] == 2
+    # In request order, duplicates reported once
+    assert body["results"] == [
+        {"id": first, "outcome": "updated", "status": "approved"},
+        {"id": MISSING_ID, "outcome": "not_found", "status": None},
+        {"id": second, "outcome": "updated", "status": "approved"},
+    ]
+
+    rows = exported(client, {first, second})
+    assert {row["status"] for row in rows.values()} == {"approved"}
+    assert all(row["approved_at"] for row in rows.values())
+
+    after = portfolio_counts(client)
+    assert after["approved"] == before.get("approved", 0) + 2
+    assert after["pending"] == before["pending"] - 2
+
+
+def test_from_status_mismatch_is_a_conflict(client):
+    approved, pending = new_application(client), new_application(client)
+    transition(client, [approved], "pending", "approved")
+
+    # The caller still believes both are pending
+    body = transition(client, [approved, pending], "pending", "rejected", rejection_reason="Low income")
+    assert body["updated"] == 1
+    assert body["results"] == [
+        {"id": approved, "outcome": "conflict", "status": "approved"},
+        {"id": pending, "outcome": "updated", "status": "rejected"},
+    ]
+
+    rows = exported(client, {approved, pending})
+    # The conflicting row is not overwritten
+    assert rows[approved]["status"] == "approved"
+    assert rows[approved]["rejection_reason"] is None
+    assert rows[pending]["status"] == "rejected"
+
+
+def test_rejection_reason_is_only_written_on_reject(client):
+    rejected, approved = new_application(client), new_application(client)
+    transition(client, [rejected], "pending", "rejected", rejection_reason="Debt too high")
+    transition(client, [approved], "pending", "approved", rejection_reason="ignored")
+
+    rows = exported(client, {rejected, approved})
+    assert rows[rejected]["rejection_reason"] == "Debt too high"
+    assert rows[approved]["rejection_reason"] is None
+
+    response = client.post(
+        TRANSITIONS,
+        json={"ids": [rejected], "from_status": "pending", "to_status": "rejected", "rejection_reason": "x" * 501},
+        headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 422
+
+
+def test_disallowed_transition(client):
+    application = new_application(client)
+    response = client.post(
+        TRANSITIONS,
+        json={"ids": [application], "from_status": "rejected", "to_status": "approved"},
+        headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Transition rejected -> approved is not allowed"
+    assert exported(client, {application})[application]["status"] == "pending"
+
+
+def test_requires_admin_token(client):
+    response = client.post(
+        TRANSITIONS,
+        json={"ids": [MISSING_ID], "from_status": "pending", "to_status": "approved"},
+        headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == 401
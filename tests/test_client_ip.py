@@ -0,0 +1,52 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import auth
+from app.api.auth import enforce_rate_limit, get_client_ip
+from app.services.rate_limiter import RateLimiter
+
+
+def request_from(client_host: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (client_host, 50000)})
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxy():
+    assert get_client_ip(request_from("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_address_appended_by_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(auth, "TRUSTED_PROXY_HOPS", 1)
+    # The client sent its own X-Forwarded-For; the proxy appended the real address
+    assert get_client_ip(request_from("10.0.0.2", "198.51.100.1, 203.0.113.7")) == "203.0.113.7"
+    # Nothing appended (request did not come through the proxy)
+    assert get_client_ip(request_from("203.0.113.7")) == "203.0.113.7"
+
+    monkeypatch.setattr(auth, "TRUSTED_PROXY_HOPS", 2)
+    assert get_client_ip(request_from("10.0.0.3", "198.51.100.1, 203.0.113.7, 10.0.0.2")) == "203.0.113.7"
+
+
+@pytest.mark.parametrize("trusted_proxy_hops", [0, 1])
+def test_rotating_forwarded_for_does_not_reset_bucket(monkeypatch, trusted_proxy_hops):
+    monkeypatch.setattr(auth, "TRUSTED_PROXY_HOPS", trusted_proxy_hops)
+    limiter = RateLimiter(rate=1 / 60, burst=3)
+
+    def hit(spoofed: str):
+        enforce_rate_limit(limiter, get_client_ip(request_from("203.0.113.7", f"{spoofed}, 203.0.113.7")))
+
+    for i in range(3):
+        hit(f"198.51.100.{i}")
+    with pytest.raises(HTTPException) as error:
+        hit("198.51.100.99")
+    assert error.value.status_code == 429
+    assert len(limiter.buckets) == 1
+
+
+def test_token_endpoint_limit_ignores_forwarded_for(client, monkeypatch):
+    monkeypatch.setattr(auth, "auth_rate_limiter", RateLimiter(rate=1 / 60, burst=2))
+    statuses = [
+        client.post("/api/auth/telegram", json={}, headers={"X-Forwarded-For": f"198.51.100.{i}"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
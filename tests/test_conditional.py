@@ -0,0 +1,74 @@
+from starlette.requests import Request
+
+from app.api.conditional import etag_matches, make_etag
+from conftest import BOT_HEADERS, bot_login
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+def test_make_etag_depends_on_every_part():
+    etag = make_etag("user", 1, "2026-01-01")
+    assert etag.startswith('W/"')
+    assert etag == make_etag("user", 1, "2026-01-01")
+    assert etag != make_etag("user", 1, "2026-01-02")
+    assert etag != make_etag("user", 2, "2026-01-01")
+
+
+def test_etag_matches_weak_list_and_wildcard():
+    etag = make_etag("user", 1)
+    strong = etag[2:]
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(strong), etag)
+    assert etag_matches(request_with(f'"other", {etag}'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"other"'), etag)
+    assert not etag_matches(Request({"type": "http", "headers": []}), etag)
+
+
+def test_me_not_modified(client, user_headers):
+    response = client.get("/api/users/me", headers=user_headers)
+    etag = response.headers["etag"]
+
+    response = client.get("/api/users/me", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # A projection is a different representation with its own validator
+    response = client.get("/api/users/me?fields=id", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_sessions_etag_changes_with_profile(client, telegram_id, user_headers):
+    response = client.get("/api/users/me/sessions", headers=user_headers)
+    etag = response.headers["etag"]
+
+    response = client.get("/api/users/me/sessions", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    # The bot completes another login for the user, updating its profile
+    bot_login(client, telegram_id)
+
+    response = client.get("/api/users/me/sessions", headers={**user_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_bot_user_not_modified(client, telegram_id, auth_token):
+    from app.services.bot_user_cache import bot_user_cache
+
+    response = client.get(f"/api/bot/users/{telegram_id}", headers=BOT_HEADERS)
+    etag = response.headers["etag"]
+
+    # From the cache, then from the version query after a miss
+    for _ in range(2):
+        response = client.get(f"/api/bot/users/{telegram_id}", headers={**BOT_HEADERS, "If-None-Match": etag})
+        assert response.status_code == 304
+        bot_user_cache.invalidate(telegram_id)
+
+    # A new application changes the version
+    bot_login(client, telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}", headers={**BOT_HEADERS, "If-None-Match": etag})
+    assert response.status_code == 200
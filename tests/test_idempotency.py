@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.idempotency_service import IdempotencyConflictError, IdempotencyService
+from conftest import BOT_HEADERS, complete_request, init_request
+
+
+def test_replays_first_result():
+    service = IdempotencyService()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return {"user_id": len(calls)}
+
+    async def run():
+        first = await service.execute("key", service.fingerprint("payload"), handler)
+        second = await service.execute("key", service.fingerprint("payload"), handler)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == {"user_id": 1}
+    assert len(calls) == 1
+
+
+def test_concurrent_duplicates_run_once():
+    service = IdempotencyService()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        fingerprint = service.fingerprint("payload")
+        return await asyncio.gather(*(service.execute("key", fingerprint, handler) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["done"] * 5
+    assert len(calls) == 1
+
+
+def test_failure_is_not_cached():
+    service = IdempotencyService()
+    attempts = []
+
+    async def handler():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return "done"
+
+    async def run():
+        fingerprint = service.fingerprint("payload")
+        with pytest.raises(RuntimeError):
+            await service.execute("key", fingerprint, handler)
+        return await service.execute("key", fingerprint, handler)
+
+    assert asyncio.run(run()) == "done"
+    assert len(attempts) == 2
+
+
+def test_key_reused_with_other_payload_conflicts():
+    service = IdempotencyService()
+
+    async def handler():
+        return "done"
+
+    asyncio.run(service.execute("key", service.fingerprint("payload"), handler))
+    with pytest.raises(IdempotencyConflictError):
+        asyncio.run(service.execute("key", service.fingerprint("other payload"), handler))
+
+
+def test_expired_result_is_dropped(monkeypatch):
+    service = IdempotencyService(ttl_seconds=10)
+    service.store("key", "fingerprint", "done")
+    assert service.get("key", "fingerprint") == "done"
+
+    now = time.monotonic() + 11
+    monkeypatch.setattr("app.services.idempotency_service.time.monotonic", lambda: now)
+    assert service.get("key", "fingerprint") is None
+    assert "key" not in service.completed
+
+
+def test_complete_bot_auth_replay_and_conflict(client, telegram_id):
+    response = client.post("/api/bot/auth/init", json=init_request(), headers=BOT_HEADERS)
+    token = response.json()["auth_token"]
+    body = complete_request(token, telegram_id)
+
+    first = client.post("/api/bot/auth/complete", json=body, headers=BOT_HEADERS)
+    assert first.status_code == 200
+    replay = client.post("/api/bot/auth/complete", json=body, headers=BOT_HEADERS)
+    assert replay.status_code == 200
+    assert replay.json() == first.json()
+
+    conflict = client.post(
+        "/api/bot/auth/complete", json={**body, "first_name": "Other"}, headers=BOT_HEADERS
+    )
+    assert conflict.status_code == 409
@@ -0,0 +1,52 @@
+import tracemalloc
+
+import pytest
+
+from app.api import admin
+from app.services.memory import gc_object_count, process_memory
+from app.services.rate_limiter import RateLimiter
+from conftest import ADMIN_HEADERS
+
+
+@pytest.fixture
+def heap_walk_limiter(monkeypatch):
+    limiter = RateLimiter(rate=1 / 60, burst=1)
+    monkeypatch.setattr(admin, "heap_walk_limiter", limiter)
+    return limiter
+
+
+def test_process_memory():
+    memory = process_memory()
+    assert len(memory["gc_counts"]) == 3
+    assert gc_object_count() > 0
+
+
+def test_gc_object_count_is_rate_limited(client, heap_walk_limiter):
+    response = client.get("/api/admin/memory?gc_objects=true", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json()["gc_objects"] > 0
+
+    response = client.get("/api/admin/memory?gc_objects=true", headers=ADMIN_HEADERS)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+
+    # The plain report does not walk the heap
+    response = client.get("/api/admin/memory", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert "gc_objects" not in response.json()
+
+
+def test_tracemalloc_snapshots_share_the_limit(client, heap_walk_limiter):
+    try:
+        assert client.post("/api/admin/memory/tracemalloc/start", headers=ADMIN_HEADERS).status_code == 200
+        response = client.post("/api/admin/memory/tracemalloc/snapshot?limit=5", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert len(response.json()["top"]) <= 5
+
+        response = client.get("/api/admin/memory/tracemalloc/diff", headers=ADMIN_HEADERS)
+        assert response.status_code == 429
+        response = client.get("/api/admin/memory?gc_objects=true", headers=ADMIN_HEADERS)
+        assert response.status_code == 429
+    finally:
+        client.post("/api/admin/memory/tracemalloc/stop", headers=ADMIN_HEADERS)
+    assert not tracemalloc.is_tracing()
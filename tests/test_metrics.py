@@ -0,0 +1,11 @@
+from conftest import ADMIN_HEADERS
+
+
+def test_metrics_require_admin_token(client):
+    assert client.get("/metrics").status_code == 422
+    assert client.get("/metrics", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_requests_total" in response.text
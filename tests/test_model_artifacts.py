@@ -0,0 +1,56 @@
+import copy
+import os
+
+import numpy as np
+import pytest
+
+from app.services.model_artifacts import (
+    CURRENT_POINTER, ModelArtifactError, ModelRegistry, load_artifact, write_artifact
+)
+from app.services.scoring import DEFAULT_MODEL
+
+
+def model_version(version: str, **changes):
+    model = copy.copy(DEFAULT_MODEL)
+    model.version = version
+    for name, value in changes.items():
+        setattr(model, name, value)
+    return model
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "v1.ksmodel")
+    write_artifact(model_version("v1"), path)
+    model = load_artifact(path)
+    assert model.version == "v1"
+    assert model.intercept == DEFAULT_MODEL.intercept
+    np.testing.assert_array_equal(model.term_bucket_weights, DEFAULT_MODEL.term_bucket_weights)
+    assert os.listdir(tmp_path) == ["v1.ksmodel"]
+
+
+def test_existing_artifact_is_not_overwritten(tmp_path):
+    path = str(tmp_path / "v1.ksmodel")
+    write_artifact(model_version("v1"), path)
+    with open(path, "rb") as f:
+        original = f.read()
+
+    with pytest.raises(ModelArtifactError, match="already exists"):
+        write_artifact(model_version("v1", intercept=DEFAULT_MODEL.intercept + 1), path)
+    with open(path, "rb") as f:
+        assert f.read() == original
+    # The temp file is cleaned up
+    assert os.listdir(tmp_path) == ["v1.ksmodel"]
+
+
+def test_publish_refuses_a_published_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path), check_interval=0)
+    registry.publish(model_version("v1"))
+    registry.publish(model_version("v2"))
+
+    with pytest.raises(ModelArtifactError):
+        registry.publish(model_version("v1", intercept=DEFAULT_MODEL.intercept + 1))
+    with open(tmp_path / CURRENT_POINTER) as f:
+        assert f.read().strip() == "v2.ksmodel"
+    assert registry.model.version == "v2"
+    assert load_artifact(str(tmp_path / "v1.ksmodel")).intercept == DEFAULT_MODEL.intercept
+    assert registry.available_versions() == ["v1", "v2"]
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.application import ApplicationStatus
+from app.services.portfolio_stats import apply_deltas, transition_deltas, utc_day
+
+PENDING = ApplicationStatus.PENDING
+APPROVED = ApplicationStatus.APPROVED
+DAY = date(2026, 3, 1)
+CREATED = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+class RecordingSession:
+    """Stands in for AsyncSession: keeps the parameters of each execute"""
+
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, statement, params=None):
+        self.executed.append(params)
+
+
+def test_utc_day():
+    tashkent = timezone(timedelta(hours=5))
+    assert utc_day(datetime(2026, 3, 2, 3, tzinfo=tashkent)) == DAY
+    assert utc_day(datetime(2026, 3, 1, 23, 59)) == DAY
+
+
+def test_one_transition_moves_count_and_amount():
+    deltas = transition_deltas([(CREATED, "car", 1000.0)], PENDING, APPROVED)
+    assert dict(deltas) == {
+        (DAY, PENDING, "car"): (-1, -1000.0),
+        (DAY, APPROVED, "car"): (1, 1000.0),
+    }
+
+
+def test_rows_in_one_bucket_are_aggregated():
+    rows = [
+        (CREATED, "car", 1000.0),
+        (CREATED + timedelta(hours=1), "car", 500.0),
+        (CREATED, "home", 200.0),
+        (CREATED + timedelta(days=1), "car", 300.0),
+    ]
+    deltas = transition_deltas(rows, PENDING, APPROVED)
+    assert dict(deltas) == {
+        (DAY, PENDING, "car"): (-2, -1500.0),
+        (DAY, APPROVED, "car"): (2, 1500.0),
+        (DAY, PENDING, "home"): (-1, -200.0),
+        (DAY, APPROVED, "home"): (1, 200.0),
+        (DAY + timedelta(days=1), PENDING, "car"): (-1, -300.0),
+        (DAY + timedelta(days=1), APPROVED, "car"): (1, 300.0),
+    }
+    # Every transition only moves applications between statuses
+    assert sum(count for count, _ in deltas.values()) == 0
+    assert sum(amount for _, amount in deltas.values()) == pytest.approx(0.0)
+
+
+def test_transition_into_the_same_bucket_nets_to_zero():
+    rows = [(CREATED, "car", 1000.5), (CREATED, "car", 0.1)]
+    deltas = transition_deltas(rows, APPROVED, APPROVED)
+    assert dict(deltas) == {(DAY, APPROVED, "car"): (0, 0.0)}
+
+
+def test_no_rows_no_deltas():
+    assert not transition_deltas([], PENDING, APPROVED)
+
+
+def test_apply_deltas_in_fixed_key_order():
+    deltas = transition_deltas(
+        [(CREATED + timedelta(days=1), "car", 10.0), (CREATED, "home", 20.0), (CREATED, "car", 30.0)],
+        PENDING,
+        APPROVED
+    )
+    db = RecordingSession()
+    asyncio.run(apply_deltas(db, deltas))
+
+    [params] = db.executed
+    keys = [(row["day"], row["status"].value, row["loan_purpose"]) for row in params]
+    assert keys == sorted(keys)
+    assert keys[:2] == [(DAY, "approved", "car"), (DAY, "approved", "home")]
+    assert {(row["day"], row["status"], row["loan_purpose"]): (row["application_count"], row["total_amount"])
+            for row in params} == dict(deltas)
+
+
+def test_apply_no_deltas_skips_the_statement():
+    db = RecordingSession()
+    asyncio.run(apply_deltas(db, {}))
+    assert db.executed == []
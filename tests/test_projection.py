@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.projection import parse_fields, project
+from conftest import BOT_HEADERS
+
+ALLOWED = ("id", "telegram_id", "phone_number")
+
+
+def test_absent_fields_mean_full_representation():
+    assert parse_fields(None, ALLOWED) is None
+
+
+def test_fields_in_allowed_order_without_duplicates():
+    assert parse_fields("phone_number, id,id,", ALLOWED) == ["id", "phone_number"]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as error:
+        parse_fields("id,phone,bogus", ALLOWED)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown fields: bogus, phone"
+
+
+def test_project_keeps_selected_keys():
+    assert project({"id": 1, "telegram_id": 2, "phone_number": "x"}, ["id"]) == {"id": 1}
+
+
+def test_me_fields(client, user_headers):
+    response = client.get("/api/users/me?fields=telegram_id,id", headers=user_headers)
+    assert response.status_code == 200
+    assert list(response.json()) == ["id", "telegram_id"]
+
+    response = client.get("/api/users/me?fields=id,password", headers=user_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password"
+
+
+def test_sessions_fields(client, user_headers):
+    response = client.get("/api/users/me/sessions?fields=id,device_info", headers=user_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert "user" not in body
+    assert list(body["sessions"][0]) == ["id", "device_info"]
+
+    response = client.get("/api/users/me/sessions?fields=token", headers=user_headers)
+    assert response.status_code == 400
+
+
+def test_bot_user_fields(client, telegram_id, auth_token):
+    response = client.get(f"/api/bot/users/{telegram_id}?fields=id,phone_number", headers=BOT_HEADERS)
+    assert response.status_code == 200
+    assert list(response.json()) == ["id", "phone_number"]
+
+    response = client.get(f"/api/bot/users/{telegram_id}?fields=bogus", headers=BOT_HEADERS)
+    assert response.status_code == 400
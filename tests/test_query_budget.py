@@ -0,0 +1,119 @@
+"""
+Statement counts of the budgeted routes.
+
+QUERY_BUDGET_MODE=strict (see conftest) fails a request whose statements
+go over its route's budget, and every response reports the count in
+X-Query-Count, so these tests pin the exact number of statements.
+"""
+import secrets
+
+from conftest import BOT_HEADERS, bot_login, complete_request, init_request, new_telegram_id
+
+
+def query_count(response) -> int:
+    assert response.status_code in (200, 304), response.text
+    return int(response.headers["x-query-count"])
+
+
+def test_complete_bot_auth(client, telegram_id):
+    response = client.post("/api/bot/auth/init", json=init_request(), headers=BOT_HEADERS)
+    assert query_count(response) == 0
+
+    token = response.json()["auth_token"]
+    response = client.post("/api/bot/auth/complete", json=complete_request(token, telegram_id), headers=BOT_HEADERS)
+    # User upsert, application INSERT, portfolio counter, applications reload
+    assert query_count(response) == 4
+    assert response.headers["x-query-budget"] == "4"
+
+    # Replayed from the idempotency cache
+    response = client.post("/api/bot/auth/complete", json=complete_request(token, telegram_id), headers=BOT_HEADERS)
+    assert query_count(response) == 0
+
+
+def test_get_bot_user(client, telegram_id, auth_token):
+    from app.services.bot_user_cache import bot_user_cache
+
+    # Written through by complete_bot_auth
+    response = client.get(f"/api/bot/users/{telegram_id}", headers=BOT_HEADERS)
+    assert query_count(response) == 0
+    etag = response.headers["etag"]
+
+    bot_user_cache.invalidate(telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}", headers=BOT_HEADERS)
+    # User, then its applications
+    assert query_count(response) == 2
+
+    bot_user_cache.invalidate(telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}", headers={**BOT_HEADERS, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert query_count(response) == 1
+
+    bot_user_cache.invalidate(telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}", headers={**BOT_HEADERS, "If-None-Match": '"stale"'})
+    assert query_count(response) == 3
+    assert response.headers["x-query-budget"] == "3"
+
+    bot_user_cache.invalidate(telegram_id)
+    response = client.get(f"/api/bot/users/{telegram_id}?fields=id,phone_number", headers=BOT_HEADERS)
+    assert query_count(response) == 1
+
+
+def test_verify_auth_token(client, auth_token):
+    # A User-Agent no login has sent yet is added to user_agents
+    user_agent = f"Mozilla/5.0 (X11; Linux x86_64) Firefox/127.0 test-{secrets.token_hex(4)}"
+    response = client.get(f"/api/auth/verify/{auth_token}", headers={"User-Agent": user_agent})
+    # User, user_agents upsert, session INSERT
+    assert query_count(response) == 3
+    assert response.headers["x-query-budget"] == "3"
+
+
+def test_verify_auth_token_known_user_agent(client):
+    user_agent = f"Mozilla/5.0 (X11; Linux x86_64) Firefox/127.0 test-{secrets.token_hex(4)}"
+    counts = []
+    for _ in range(2):
+        token = bot_login(client, new_telegram_id())
+        response = client.get(f"/api/auth/verify/{token}", headers={"User-Agent": user_agent})
+        counts.append(query_count(response))
+    # The second login finds the User-Agent's id in the in-process dictionary
+    assert counts == [3, 2]
+
+
+def test_me(client, user_headers):
+    response = client.get("/api/users/me", headers=user_headers)
+    # Session check, user
+    assert query_count(response) == 2
+    assert response.headers["x-query-budget"] == "2"
+
+    response = client.get("/api/users/me", headers={**user_headers, "If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert query_count(response) == 2
+
+    response = client.get("/api/users/me?fields=id,telegram_id", headers=user_headers)
+    assert query_count(response) == 2
+
+
+def test_me_sessions(client, user_headers):
+    response = client.get("/api/users/me/sessions", headers=user_headers)
+    # Session check, user, sessions with their User-Agents
+    assert query_count(response) == 3
+    assert response.headers["x-query-budget"] == "4"
+
+    response = client.get(
+        "/api/users/me/sessions", headers={**user_headers, "If-None-Match": response.headers["etag"]}
+    )
+    assert response.status_code == 304
+    assert query_count(response) == 3
+
+    response = client.get(
+        "/api/users/me/sessions", headers={**user_headers, "If-None-Match": '"stale"'}
+    )
+    assert query_count(response) == 4
+
+    response = client.get("/api/users/me/sessions?fields=id,expires_at", headers=user_headers)
+    # No user: session check and sessions only
+    assert query_count(response) == 2
+
+
+def test_logout(client, user_headers):
+    response = client.post("/api/auth/logout", headers=user_headers)
+    assert query_count(response) == 2
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.rate_limiter import RateLimiter
+
+
+def test_burst_then_limited():
+    limiter = RateLimiter(rate=1, burst=3)
+    assert [limiter.hit("ip", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.hit("ip", now=0.0) == pytest.approx(1.0)
+
+
+def test_refills_at_rate():
+    limiter = RateLimiter(rate=2, burst=2)
+    limiter.hit("ip", now=0.0)
+    limiter.hit("ip", now=0.0)
+    # Half a token back after 0.25s: the rest arrives in another 0.25s
+    assert limiter.hit("ip", now=0.25) == pytest.approx(0.25)
+    assert limiter.hit("ip", now=0.5) == 0.0
+    assert limiter.hit("ip", now=0.5) == pytest.approx(0.5)
+
+
+def test_refill_is_capped_at_burst():
+    limiter = RateLimiter(rate=1, burst=2)
+    limiter.hit("ip", now=0.0)
+    # A long idle period refills only up to the burst
+    assert [limiter.hit("ip", now=100.0) for _ in range(2)] == [0.0, 0.0]
+    assert limiter.hit("ip", now=100.0) > 0
+
+
+def test_keys_are_independent():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.hit("a", now=0.0) == 0.0
+    assert limiter.hit("a", now=0.0) > 0
+    assert limiter.hit("b", now=0.0) == 0.0
+
+
+def test_sweep_drops_refilled_buckets():
+    limiter = RateLimiter(rate=1, burst=2, sweep_interval=10)
+    limiter.hit("idle", now=0.0)
+    limiter.hit("active", now=9.0)
+    limiter.cleanup_expired(now=10.0)
+    assert set(limiter.buckets) == {"active"}
+
+
+def test_max_keys_evicts_oldest():
+    limiter = RateLimiter(rate=1, burst=5, max_keys=10)
+    for i in range(10):
+        limiter.hit(f"ip{i}", now=0.0)
+    limiter.hit("new", now=0.0)
+    assert len(limiter.buckets) <= 10
+    assert "new" in limiter.buckets
+    assert "ip0" not in limiter.buckets
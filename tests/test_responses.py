@@ -0,0 +1,40 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.api.responses import FastJSONResponse, dump_json
+from app.models.schemas import BotUserResponse
+
+MOMENT = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+
+
+def test_datetime_wire_format():
+    # UTC as "Z" (json.dumps of isoformat() gave "+00:00"), other offsets
+    # as is, naive timestamps without a suffix
+    assert dump_json({
+        "utc": MOMENT,
+        "whole_seconds": MOMENT.replace(microsecond=0),
+        "offset": MOMENT.astimezone(timezone(timedelta(hours=5))),
+        "naive": MOMENT.replace(tzinfo=None),
+    }) == (
+        b'{"utc":"2026-01-02T03:04:05.123456Z",'
+        b'"whole_seconds":"2026-01-02T03:04:05Z",'
+        b'"offset":"2026-01-02T08:04:05.123456+05:00",'
+        b'"naive":"2026-01-02T03:04:05.123456"}'
+    )
+
+
+def test_model_datetimes_use_the_same_format():
+    payload = json.loads(dump_json(BotUserResponse(id=1, telegram_id=2, created_at=MOMENT)))
+    assert payload["created_at"] == "2026-01-02T03:04:05.123456Z"
+    assert payload["updated_at"] is None
+
+
+def test_response_renders_payload_or_prerendered_bytes():
+    assert FastJSONResponse({"at": MOMENT}).body == b'{"at":"2026-01-02T03:04:05.123456Z"}'
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+
+
+def test_api_timestamps_are_utc_with_z(client, user_headers):
+    created_at = client.get("/api/users/me", headers=user_headers).json()["created_at"]
+    assert created_at.endswith("Z")
+    assert datetime.fromisoformat(created_at).utcoffset() == timedelta(0)
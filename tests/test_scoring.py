@@ -0,0 +1,62 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.api.responses import dump_json
+from app.api.scoring import _finite_or_none
+from app.models.schemas import MAX_SCORE_BATCH, ScoreBatchRequest, ScoreRequest
+from app.services.scoring import DEFAULT_MODEL
+
+
+def test_score_request_bounds():
+    ScoreRequest(loan_amount=1000, loan_term=12, monthly_income=0)
+    for bad in (
+        {"loan_amount": 0, "loan_term": 12, "monthly_income": 500},
+        {"loan_amount": 1e13, "loan_term": 12, "monthly_income": 500},
+        {"loan_amount": math.inf, "loan_term": 12, "monthly_income": 500},
+        {"loan_amount": 1000, "loan_term": 121, "monthly_income": 500},
+        {"loan_amount": 1000, "loan_term": 12, "monthly_income": -1},
+        {"loan_amount": 1000, "loan_term": 12, "monthly_income": math.nan},
+    ):
+        with pytest.raises(ValidationError):
+            ScoreRequest(**bad)
+
+
+def test_batch_elements_are_bounded_like_single_requests():
+    ScoreBatchRequest(loan_amount=[1000, 5000], loan_term=[12, 3], monthly_income=[0, 800])
+    with pytest.raises(ValidationError):
+        ScoreBatchRequest(loan_amount=[1000, -5], loan_term=[12, 3], monthly_income=[0, 800])
+    with pytest.raises(ValidationError):
+        ScoreBatchRequest(loan_amount=[1000, math.inf], loan_term=[12, 3], monthly_income=[0, 800])
+    with pytest.raises(ValidationError):
+        ScoreBatchRequest(loan_amount=[1000, 5000], loan_term=[12, 0], monthly_income=[0, 800])
+
+
+def test_batch_columns_must_have_equal_length():
+    with pytest.raises(ValidationError, match="equal length"):
+        ScoreBatchRequest(loan_amount=[1000, 5000], loan_term=[12], monthly_income=[0, 800])
+
+
+def test_batch_size_is_capped():
+    with pytest.raises(ValidationError):
+        ScoreBatchRequest(loan_amount=[], loan_term=[], monthly_income=[])
+    size = MAX_SCORE_BATCH + 1
+    with pytest.raises(ValidationError):
+        ScoreBatchRequest(loan_amount=[1.0] * size, loan_term=[1] * size, monthly_income=[1.0] * size)
+
+
+def test_non_finite_results_serialize_as_null():
+    result = DEFAULT_MODEL.score([1000, 5000], [12, 3], [0, 800])
+    debt_to_income = _finite_or_none(result["debt_to_income"])
+    assert debt_to_income[0] is None
+    assert debt_to_income[1] == pytest.approx(float(result["debt_to_income"][1]))
+
+    # Strict JSON: no Infinity or NaN tokens
+    assert json.loads(dump_json({"debt_to_income": debt_to_income}), parse_constant=pytest.fail)
+
+
+def test_finite_or_none_keeps_finite_values():
+    assert _finite_or_none(np.array([1.5, np.nan, -np.inf, 2.0])) == [1.5, None, None, 2.0]
@@ -0,0 +1,24 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.scoring_pipeline import SCORING_PIPELINE_ENABLED, ScoringPipeline, _scored_update
+
+
+def set_columns(statement) -> set:
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assignments = sql.split(" SET ", 1)[1].split(" FROM ", 1)[0]
+    return {assignment.split("=", 1)[0].strip() for assignment in assignments.split(", ")}
+
+
+def test_disabled_by_default():
+    assert not SCORING_PIPELINE_ENABLED
+    assert not ScoringPipeline().auto_decisions
+
+
+def test_scores_without_decisions_leave_status_alone():
+    columns = set_columns(_scored_update("builtin-1", [1], [700], [0], auto_decisions=False))
+    assert columns == {"score", "score_model_version", "scored_at", "updated_at"}
+
+
+def test_auto_decisions_set_status():
+    columns = set_columns(_scored_update("builtin-1", [1], [700], [0], auto_decisions=True))
+    assert {"status", "approved_at", "rejection_reason"} <= columns
@@ -0,0 +1,55 @@
+from app.services.slow_queries import SlowQueryLog, fingerprint
+
+
+def test_values_are_stripped():
+    fingerprint_id, text = fingerprint(
+        "SELECT * FROM users WHERE telegram_id = $1 AND phone_number = 'x''y' LIMIT 10"
+    )
+    assert text == "SELECT * FROM users WHERE telegram_id = ? AND phone_number = ? LIMIT ?"
+    assert fingerprint_id == fingerprint("SELECT * FROM users WHERE telegram_id = $7 AND phone_number = 'z' LIMIT 5")[0]
+
+
+def test_placeholder_styles_share_a_fingerprint():
+    texts = {
+        fingerprint(statement)[1]
+        for statement in (
+            "SELECT id FROM users WHERE id = $1",
+            "SELECT id FROM users WHERE id = %(id_1)s",
+            "SELECT id FROM users WHERE id = %s",
+            "SELECT id FROM users WHERE id = :id",
+            "SELECT id FROM users WHERE id = 42",
+        )
+    }
+    assert texts == {"SELECT id FROM users WHERE id = ?"}
+
+
+def test_value_lists_collapse():
+    two = fingerprint("SELECT id FROM loan_applications WHERE id IN ($1, $2)")
+    three = fingerprint("SELECT id FROM loan_applications WHERE id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER)")
+    assert two[1] == "SELECT id FROM loan_applications WHERE id IN (...)"
+    assert two == three
+
+    rows = fingerprint("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)")
+    assert rows[1] == "INSERT INTO t (a, b) VALUES (...)"
+
+
+def test_comments_and_whitespace_are_ignored():
+    assert fingerprint("SELECT 1 /* route */ FROM t\n  WHERE a = $1 -- note")[1] == "SELECT ? FROM t WHERE a = ?"
+
+
+def test_identifiers_with_digits_are_kept():
+    assert fingerprint("SELECT col1 FROM t2 WHERE x = $1")[1] == "SELECT col1 FROM t2 WHERE x = ?"
+
+
+def test_slow_statements_are_grouped_by_fingerprint(capsys):
+    log = SlowQueryLog(threshold_ms=100)
+    log.observe("SELECT * FROM users WHERE id = $1", 0.2)
+    log.observe("SELECT * FROM users WHERE id = 5", 0.01)
+    log.observe("SELECT * FROM auth_sessions", 0.05)
+
+    top = log.top()
+    assert [entry["count"] for entry in top] == [2, 1]
+    assert top[0]["statement"] == "SELECT * FROM users WHERE id = ?"
+    assert top[0]["slow_count"] == 1
+    assert log.stats()["slow_statements"] == 1
+    assert "Slow query 200.0 ms" in capsys.readouterr().out
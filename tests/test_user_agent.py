@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.user_agent import DeviceInfo, parse_user_agent
+
+parse = parse_user_agent.__wrapped__
+
+
+@pytest.mark.parametrize("user_agent, expected", [
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36 Edg/126.0.2592.68",
+        DeviceInfo("Edge", "Windows", "Desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36 OPR/111.0.0.0",
+        DeviceInfo("Opera", "Windows", "Desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0.0.0 YaBrowser/24.6.0.0 Safari/537.36",
+        DeviceInfo("Yandex", "Windows", "Desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.6478.71 Mobile Safari/537.36 EdgA/126.0.2592.80",
+        DeviceInfo("Edge", "Android", "Mobile"),
+    ),
+])
+def test_chromium_based_browsers_rank_over_chrome(user_agent, expected):
+    assert parse(user_agent) == expected
+
+
+def test_ipad_is_a_tablet_despite_mobile():
+    user_agent = (
+        "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+        "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+    )
+    assert parse(user_agent) == DeviceInfo("Safari", "iOS", "Tablet")
+
+
+def test_android_without_mobile_is_a_tablet():
+    tablet = (
+        "Mozilla/5.0 (Linux; Android 13; SM-X710) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    )
+    phone = (
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.6478.71 Mobile Safari/537.36"
+    )
+    assert parse(tablet) == DeviceInfo("Chrome", "Android", "Tablet")
+    assert parse(phone) == DeviceInfo("Chrome", "Android", "Mobile")
+
+
+def test_chromebook():
+    user_agent = (
+        "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    )
+    assert parse(user_agent) == DeviceInfo("Chrome", "ChromeOS", "Desktop")
+
+
+def test_keywords_match_whole_words_only():
+    # "cros" inside "Microsoft", "mobi" inside "automobile"
+    assert parse("Microsoft automobile client") == DeviceInfo("Unknown", "Unknown", "Desktop")
+    # Non-ASCII characters separate words like any other
+    assert parse("Приложение/1.0 (iPhoneé; iOS 17)") == DeviceInfo("Unknown", "iOS", "Mobile")
+
+
+def test_results_are_cached_by_raw_string():
+    user_agent = "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0"
+    assert parse_user_agent(user_agent) is parse_user_agent(user_agent)
+    assert parse_user_agent(user_agent) == DeviceInfo("Firefox", "Linux", "Desktop")
@@ -0,0 +1,75 @@
+from app.services.velocity import DistinctWindowCounter, SlidingWindowCounter, VelocityIndex
+
+
+def test_window_expiry():
+    counter = SlidingWindowCounter(window_seconds=60, limit=2)
+    assert [counter.hit("phone", now=t) for t in (0.0, 10.0, 20.0)] == [1, 2, 3]
+    # Events at 0 and 10 left the window; the one at 20 remains
+    assert counter.hit("phone", now=75.0) == 2
+    assert counter.hit("phone", now=200.0) == 1
+
+
+def test_count_is_capped_at_limit_plus_one():
+    counter = SlidingWindowCounter(window_seconds=60, limit=2)
+    assert [counter.hit("phone", now=0.0) for _ in range(5)] == [1, 2, 3, 3, 3]
+    assert len(counter.events["phone"]) == 3
+
+
+def test_distinct_members_threshold():
+    counter = DistinctWindowCounter(window_seconds=60, limit=1)
+    assert counter.hit("phone", 1, now=0.0) == 1
+    # Repeat sightings of the same account do not count
+    assert counter.hit("phone", 1, now=10.0) == 1
+    assert counter.hit("phone", 2, now=20.0) == 2
+    assert counter.hit("phone", 3, now=30.0) == 2
+    # Accounts 2 and 3 left the window, account 1 is seen again
+    assert counter.hit("phone", 1, now=95.0) == 1
+
+
+def test_distinct_repeat_refreshes_member():
+    counter = DistinctWindowCounter(window_seconds=60, limit=5)
+    counter.hit("phone", 1, now=0.0)
+    counter.hit("phone", 2, now=10.0)
+    counter.hit("phone", 1, now=50.0)
+    # Account 2 expired, account 1 was refreshed at 50
+    assert counter.hit("phone", 3, now=80.0) == 2
+    assert list(counter.events["phone"]) == [1, 3]
+
+
+def test_sweep_drops_expired_keys():
+    for counter, hit in (
+        (SlidingWindowCounter(window_seconds=60, limit=3, sweep_interval=10),
+         lambda counter, key, now: counter.hit(key, now)),
+        (DistinctWindowCounter(window_seconds=60, limit=3, sweep_interval=10),
+         lambda counter, key, now: counter.hit(key, 1, now)),
+    ):
+        hit(counter, "idle", 0.0)
+        hit(counter, "active", 50.0)
+        counter.cleanup_expired(now=70.0)
+        assert set(counter.events) == {"active"}
+
+
+def test_max_keys_evicts_oldest():
+    counter = DistinctWindowCounter(window_seconds=60, limit=3, max_keys=10)
+    for i in range(10):
+        counter.hit(f"phone{i}", 1, now=0.0)
+    counter.hit("new", 1, now=0.0)
+    assert len(counter.events) <= 10
+    assert "new" in counter.events
+    assert "phone0" not in counter.events
+
+
+def test_check_application_reports_every_exceeded_limit():
+    index = VelocityIndex(window_seconds=60, phone_limit=5, telegram_limit=5, phone_accounts_limit=1)
+    assert index.check_application("+998900000000", 1, now=0.0) == []
+    violations = index.check_application("+998900000000", 2, now=1.0)
+    assert violations == ["telegram accounts per phone over 1 in 60s"]
+    assert index.flagged == 1
+
+
+def test_check_login_per_ip():
+    index = VelocityIndex(window_seconds=60, ip_limit=2, mode="block")
+    assert [index.check_login("203.0.113.7", now=t) for t in (0.0, 1.0)] == [[], []]
+    assert index.check_login("203.0.113.7", now=2.0) == ["logins per IP over 2 in 60s"]
+    assert index.check_login("198.51.100.1", now=2.0) == []
+    assert index.blocked == 1